@@ -30,10 +30,13 @@ class Baggage(vqpy.VObjBase):
     @vqpy.stateful(length=2)
     @vqpy.cross_vobj_property(
         vobj_type=Person, vobj_num="ALL",
-        vobj_input_fields=("track_id", "tlbr")
+        vobj_input_fields=("track_id", "tlbr"),
+        # only persons within the threshold below can be the owner
+        vobj_radius=lambda self: self.getv("tlbr")[3] - self.getv("tlbr")[1],
     )
     # function decorator responsible for retrieving list of properties
-    # Person_id and Person_tlbr given as a list of track_id's and tlbr's
+    # Person_id and Person_tlbr given as a list of track_id's and tlbr's,
+    # of the persons near the baggage
     def owner(self, person_ids_tlbrs):
         # if previous owner within distance, return previous owner track id
         # else: find the nearest person within distance, return the track id
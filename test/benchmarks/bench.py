@@ -0,0 +1,302 @@
+"""
+Benchmarks of the backend operators on synthetic videos and detections.
+They run on CPU and need no model weights.
+
+Each operator is timed alone, on frames prepared by the operators before
+it, and the full Planner and Executor chain is timed on the synthetic
+video. Results are reported in frames/s and microseconds per vobj.
+
+    python test/benchmarks/bench.py --n_objects 20 --save_baseline b.json
+    python test/benchmarks/bench.py --n_objects 20 --baseline b.json
+
+With --baseline, it exits with status 1 if any benchmark is slower than
+the baseline by more than --tolerance.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import deque
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from vqpy.backend.executor import Executor
+from vqpy.backend.frame import Frame
+from vqpy.backend.operator.base import Operator
+from vqpy.backend.operator.output_formatter import FrameOutputFormatter
+from vqpy.backend.operator.tracker import Tracker
+from vqpy.backend.operator.video_reader import VideoReader
+from vqpy.backend.operator.vobj_filter import VObjFilter
+from vqpy.backend.operator.vobj_projector import VObjProjector
+from vqpy.backend.planner import Planner
+from vqpy.frontend.query import QueryBase
+from vqpy.frontend.vobj import VObjBase, vobj_property
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from synthetic import SyntheticScene, register_synthetic_detector  # noqa
+
+# frames of history of the speed property
+HIST_LEN = 5
+
+
+def speed(values):
+    # average speed of the box center in pixels per frame
+    tlbrs = [tlbr for tlbr in values["tlbr"] if tlbr is not None]
+    if len(tlbrs) < 2:
+        return 0.0
+    first, last = tlbrs[0], tlbrs[-1]
+    shift = (last[:2] + last[2:] - first[:2] - first[2:]) / 2
+    return float(np.linalg.norm(shift)) / (len(tlbrs) - 1)
+
+
+class Person(VObjBase):
+    def __init__(self) -> None:
+        self.class_name = "person"
+        self.object_detector = "synthetic"
+        self.detector_kwargs = {"device": "cpu"}
+        super().__init__()
+
+    @vobj_property(inputs={"tlbr": HIST_LEN})
+    def speed(self, values):
+        return speed(values)
+
+
+class MovingPersonQuery(QueryBase):
+    def __init__(self) -> None:
+        self.person = Person()
+
+    def frame_constraint(self):
+        return (self.person.score > 0.5) & (self.person.speed > 1.0)
+
+    def frame_output(self):
+        return (self.person.track_id, self.person.tlbr, self.person.speed)
+
+
+class ReplaySource(Operator):
+    def __init__(self, frames: List[Frame]):
+        """Emit prepared frames, so that only the next operator is timed."""
+        self._frames = deque(frames)
+        super().__init__(None)
+
+    def has_next(self) -> bool:
+        return len(self._frames) > 0
+
+    def next(self) -> Frame:
+        return self._frames.popleft()
+
+
+def drain(operator) -> list:
+    outputs = []
+    while operator.has_next():
+        outputs.append(operator.next())
+    return outputs
+
+
+def time_operator(create_operator: Callable[[Operator], Operator],
+                  frames: List[Frame], repeat: int):
+    """
+    Time the operator created on a replay of frames, and return the best
+    time and the outputs of the last run.
+    """
+    best_time = float("inf")
+    outputs = None
+    for _ in range(repeat):
+        # copied outside of the timing, operators modify frames
+        source = ReplaySource([frame.copy() for frame in frames])
+        operator = create_operator(source)
+        start_time = time.perf_counter()
+        outputs = drain(operator)
+        best_time = min(best_time, time.perf_counter() - start_time)
+    return best_time, outputs
+
+
+def report(name: str, elapsed: float, n_frames: int, n_vobjs: int) -> Dict:
+    result = dict(
+        seconds=elapsed,
+        frames=n_frames,
+        vobjs=n_vobjs,
+        fps=n_frames / elapsed,
+        us_per_vobj=elapsed / n_vobjs * 1e6 if n_vobjs else None,
+    )
+    us_per_vobj = f"{result['us_per_vobj']:10.2f}" if n_vobjs \
+        else f"{'-':>10}"
+    print(f"{name:<28}{result['fps']:12.1f}{us_per_vobj}")
+    return result
+
+
+def count_vobjs(frames: List[Frame], filter_index=None) -> int:
+    if filter_index is None:
+        return sum(len(vobjs) for frame in frames
+                   for vobjs in frame.vobj_data.values())
+    return sum(len(indexes) for frame in frames
+               for indexes in frame.filtered_vobjs[filter_index].values())
+
+
+def run_benchmarks(scene: SyntheticScene, work_dir: str,
+                   repeat: int) -> Dict[str, Dict]:
+    video_path = os.path.join(work_dir, "synthetic.mp4")
+    detections_path = os.path.join(work_dir, "synthetic_detections.pkl")
+    scene.write_video(video_path)
+    scene.save_detections(detections_path)
+    register_synthetic_detector(detections_path)
+    metadata = dict(frame_width=float(scene.width),
+                    frame_height=float(scene.height),
+                    fps=scene.fps, n_frames=scene.n_frames)
+    results = dict()
+    print(f"{'benchmark':<28}{'frames/s':>12}{'us/vobj':>10}")
+
+    # video decoding
+    best_time = float("inf")
+    for _ in range(repeat):
+        video_reader = VideoReader(video_path, headless=True)
+        start_time = time.perf_counter()
+        drain(video_reader)
+        best_time = min(best_time, time.perf_counter() - start_time)
+    results["video_reader"] = report("video_reader", best_time,
+                                     scene.n_frames, 0)
+
+    # frames with detections, sharing one blank image
+    image = np.zeros((scene.height, scene.width, 3), dtype=np.uint8)
+    detected = []
+    for frame_id, detections in enumerate(scene.detections):
+        frame = Frame(video_metadata=metadata, id=frame_id, image=image)
+        for d in detections:
+            frame.vobj_data[scene.class_name].append(
+                dict(tlbr=d["tlbr"], score=d["score"]))
+        detected.append(frame)
+    n_vobjs = count_vobjs(detected)
+
+    elapsed, tracked = time_operator(
+        lambda prev: Tracker(prev, class_name=scene.class_name,
+                             fps=scene.fps),
+        detected, repeat)
+    results["tracker"] = report("tracker", elapsed, len(detected), n_vobjs)
+
+    elapsed, class_filtered = time_operator(
+        lambda prev: VObjFilter(prev, condition_func=scene.class_name),
+        tracked, repeat)
+    results["vobj_filter_class"] = report(
+        "vobj_filter_class", elapsed, len(tracked), n_vobjs)
+
+    elapsed, _ = time_operator(
+        lambda prev: VObjFilter(prev, lambda vobj: vobj["score"] > 0.5),
+        class_filtered, repeat)
+    results["vobj_filter"] = report(
+        "vobj_filter", elapsed, len(class_filtered), n_vobjs)
+
+    elapsed, _ = time_operator(
+        lambda prev: VObjFilter(
+            prev, lambda columns: columns["score"].values > 0.5,
+            vectorized=True),
+        class_filtered, repeat)
+    results["vobj_filter_vectorized"] = report(
+        "vobj_filter_vectorized", elapsed, len(class_filtered), n_vobjs)
+
+    # only tracked vobjs have history and a track_id to output
+    with_track = drain(VObjFilter(
+        ReplaySource([frame.copy() for frame in class_filtered]),
+        lambda vobj: "track_id" in vobj))
+    elapsed, projected = time_operator(
+        lambda prev: VObjProjector(
+            prev, property_name="speed", property_func=speed,
+            dependencies={"tlbr": HIST_LEN}, class_name=scene.class_name,
+            is_stateful=True),
+        with_track, repeat)
+    results["vobj_projector_history"] = report(
+        "vobj_projector_history", elapsed, len(with_track),
+        count_vobjs(with_track, filter_index=0))
+
+    elapsed, _ = time_operator(
+        lambda prev: FrameOutputFormatter(
+            prev, {0: {scene.class_name: ["track_id", "tlbr", "speed"]}},
+            {0: scene.class_name}),
+        projected, repeat)
+    results["frame_output_formatter"] = report(
+        "frame_output_formatter", elapsed, len(projected),
+        count_vobjs(projected, filter_index=0))
+
+    # the full plan, from decoding to the output
+    best_time = float("inf")
+    for _ in range(repeat):
+        root_plan_node = Planner().parse(MovingPersonQuery())
+        launch_args = dict(video_path=video_path,
+                           query_name="MovingPersonQuery", headless=True)
+        executor = Executor(root_plan_node, launch_args)
+        start_time = time.perf_counter()
+        for _ in executor.execute():
+            pass
+        best_time = min(best_time, time.perf_counter() - start_time)
+    results["full_chain"] = report("full_chain", best_time, scene.n_frames,
+                                   n_vobjs)
+    return results
+
+
+def compare_baseline(results: Dict, baseline: Dict,
+                     tolerance: float) -> List[str]:
+    """Names of the benchmarks that are slower than the baseline."""
+    if baseline["config"] != results["config"]:
+        print(f"Warning: the baseline config {baseline['config']} is "
+              f"different from {results['config']}")
+    regressions = []
+    for name, result in results["benchmarks"].items():
+        if name not in baseline["benchmarks"]:
+            continue
+        baseline_fps = baseline["benchmarks"][name]["fps"]
+        change = result["fps"] / baseline_fps - 1
+        status = "REGRESSION" if change < -tolerance else "ok"
+        print(f"{name:<28}{baseline_fps:12.1f} -> {result['fps']:10.1f} "
+              f"({change:+.1%}) {status}")
+        if change < -tolerance:
+            regressions.append(name)
+    return regressions
+
+
+def make_parser():
+    parser = argparse.ArgumentParser("VQPy backend benchmarks")
+    parser.add_argument("--n_frames", type=int, default=300)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=360)
+    parser.add_argument("--n_objects", type=int, default=10,
+                        help="objects on every frame")
+    parser.add_argument("--track_lifetime", type=int, default=60,
+                        help="mean lifetime of objects in frames")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="runs of each benchmark, the best is reported")
+    parser.add_argument("--output", default=None,
+                        help="path to save the results as json")
+    parser.add_argument("--save_baseline", default=None,
+                        help="path to save the results as the baseline")
+    parser.add_argument("--baseline", default=None,
+                        help="path of the baseline to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed slowdown relative to the baseline")
+    return parser
+
+
+def main(argv=None) -> int:
+    args = make_parser().parse_args(argv)
+    config = dict(n_frames=args.n_frames, width=args.width,
+                  height=args.height, n_objects=args.n_objects,
+                  track_lifetime=args.track_lifetime, seed=args.seed)
+    scene = SyntheticScene(**config)
+    with tempfile.TemporaryDirectory() as work_dir:
+        benchmarks = run_benchmarks(scene, work_dir, args.repeat)
+    results = dict(config=config, benchmarks=benchmarks)
+    for path in (args.output, args.save_baseline):
+        if path is not None:
+            with open(path, "w") as f:
+                json.dump(results, f, indent=2)
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if compare_baseline(results, baseline, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+# synthetic videos and detection streams for benchmarks, which need no
+# model weights
+import pickle
+from typing import Dict, List
+
+import cv2
+import numpy as np
+
+from vqpy.class_names.coco import COCO_CLASSES
+from vqpy.operator.detector import vqpy_detectors
+from vqpy.operator.detector.base import DetectorBase
+
+# minimum width and height of the detected boxes, since degenerate boxes
+# break the Kalman filter of the tracker
+MIN_BOX_SIZE = 5.0
+
+
+class SyntheticScene:
+    def __init__(
+        self,
+        n_frames: int = 300,
+        width: int = 640,
+        height: int = 360,
+        fps: float = 30.0,
+        n_objects: int = 10,
+        track_lifetime: int = 60,
+        class_name: str = "person",
+        seed: int = 0,
+    ):
+        """
+        Objects moving at constant speed, with {n_objects} objects on every
+        frame. Objects bounce off the borders of the frame. The lifetime of
+        each object (in frames) is drawn from a Poisson distribution with
+        mean {track_lifetime}, and a new object appears when one disappears.
+        Detections are the boxes of the objects with some noise, and scores
+        in [0.3, 1).
+        """
+        self.n_frames = n_frames
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.n_objects = n_objects
+        self.track_lifetime = track_lifetime
+        self.class_name = class_name
+        self.class_id = COCO_CLASSES.index(class_name)
+        self.seed = seed
+        self.detections = self._generate()
+
+    def _spawn(self, rng):
+        # boxes fit in small frames too
+        w, h = np.minimum(rng.uniform(20, 80, size=2),
+                          [self.width / 2, self.height / 2])
+        x = rng.uniform(0, self.width - w)
+        y = rng.uniform(0, self.height - h)
+        return dict(
+            tlbr=np.array([x, y, x + w, y + h]),
+            velocity=rng.uniform(-3, 3, size=2),
+            lifetime=max(1, rng.poisson(self.track_lifetime)),
+            score=rng.uniform(0.3, 1.0),
+            color=tuple(int(c) for c in rng.integers(0, 256, size=3)),
+        )
+
+    def _generate(self) -> List[List[Dict]]:
+        rng = np.random.default_rng(self.seed)
+        objects = []
+        # boxes of the objects on every frame, for drawing the video
+        self.boxes = []
+        detections = []
+        bounds = np.array([self.width, self.height] * 2) - 1
+        for _ in range(self.n_frames):
+            while len(objects) < self.n_objects:
+                objects.append(self._spawn(rng))
+            frame_boxes = []
+            frame_detections = []
+            for obj in objects:
+                frame_boxes.append((obj["tlbr"].copy(), obj["color"]))
+                tlbr = np.clip(obj["tlbr"] + rng.normal(0, 1, size=4),
+                               0, bounds)
+                tlbr[:2] = np.maximum(
+                    np.minimum(tlbr[:2], tlbr[2:] - MIN_BOX_SIZE), 0)
+                tlbr[2:] = np.maximum(tlbr[2:], tlbr[:2] + MIN_BOX_SIZE)
+                score = float(np.clip(obj["score"] + rng.normal(0, 0.02),
+                                      0.3, 0.99))
+                frame_detections.append(dict(tlbr=tlbr, score=score,
+                                             class_id=self.class_id))
+            self.boxes.append(frame_boxes)
+            detections.append(frame_detections)
+            for obj in objects:
+                # move, bouncing off the borders, so that the size of the
+                # box is kept
+                size = obj["tlbr"][2:] - obj["tlbr"][:2]
+                top_left = obj["tlbr"][:2] + obj["velocity"]
+                outside = (top_left < 0) | (top_left + size > bounds[:2])
+                obj["velocity"][outside] *= -1
+                top_left = np.clip(top_left, 0, bounds[:2] - size)
+                obj["tlbr"] = np.concatenate((top_left, top_left + size))
+                obj["lifetime"] -= 1
+            objects = [obj for obj in objects if obj["lifetime"] > 0]
+        return detections
+
+    @property
+    def n_vobjs(self) -> int:
+        return sum(len(d) for d in self.detections)
+
+    def write_video(self, video_path: str):
+        writer = cv2.VideoWriter(video_path,
+                                 cv2.VideoWriter_fourcc(*"mp4v"),
+                                 self.fps, (self.width, self.height))
+        for frame_boxes in self.boxes:
+            image = np.full((self.height, self.width, 3), 127, np.uint8)
+            for tlbr, color in frame_boxes:
+                x1, y1, x2, y2 = tlbr.astype(int)
+                cv2.rectangle(image, (x1, y1), (x2, y2), color, -1)
+            writer.write(image)
+        writer.release()
+
+    def save_detections(self, path: str):
+        with open(path, "wb") as f:
+            pickle.dump(self.detections, f)
+
+
+class SyntheticDetector(DetectorBase):
+    cls_names = COCO_CLASSES
+    output_fields = ["tlbr", "score", "class_id"]
+
+    def __init__(self, model_path, **detector_kwargs):
+        # the "model" is the pickled detections of a SyntheticScene
+        super().__init__(model_path)
+        with open(model_path, "rb") as f:
+            self.detections = pickle.load(f)
+        self.frame_index = 0
+
+    def inference(self, img) -> List[Dict]:
+        outputs = [d.copy() for d in self.detections[self.frame_index]]
+        self.frame_index += 1
+        return outputs
+
+
+def register_synthetic_detector(detections_path: str,
+                                detector_name: str = "synthetic"):
+    # replace the detections of an earlier scene
+    vqpy_detectors[detector_name] = (SyntheticDetector, detections_path,
+                                     None)
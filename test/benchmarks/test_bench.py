@@ -0,0 +1,25 @@
+import numpy as np
+
+from bench import run_benchmarks
+from synthetic import SyntheticScene
+
+
+def test_synthetic_scene():
+    scene = SyntheticScene(n_frames=100, width=160, height=120, n_objects=8,
+                           track_lifetime=30)
+    assert len(scene.detections) == 100
+    bounds = np.array([160, 120] * 2) - 1
+    for detections in scene.detections:
+        assert len(detections) == 8
+        for d in detections:
+            tlbr = d["tlbr"]
+            assert (tlbr >= 0).all() and (tlbr <= bounds).all()
+            assert (tlbr[2:] - tlbr[:2] >= 5).all()
+
+
+def test_run_benchmarks(tmp_path):
+    scene = SyntheticScene(n_frames=30, width=160, height=120, n_objects=5)
+    results = run_benchmarks(scene, tmp_path.as_posix(), repeat=1)
+    assert "full_chain" in results
+    for result in results.values():
+        assert result["fps"] > 0
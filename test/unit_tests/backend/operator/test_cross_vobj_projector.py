@@ -0,0 +1,104 @@
+from vqpy.backend.operator.base import Operator
+from vqpy.backend.operator.vobj_filter import VObjFilter
+from vqpy.backend.operator.vobj_projector import CrossVObjProjector
+from vqpy.backend.frame import Frame
+from vqpy.common import InvalidProperty
+
+import numpy as np
+import pytest
+
+
+class ReplayReader(Operator):
+    # replays frames with the given vobj data
+    def __init__(self, frames_vobj_data):
+        self.frames_vobj_data = frames_vobj_data
+        self.frame_id = -1
+        super().__init__(None)
+
+    def has_next(self) -> bool:
+        return self.frame_id + 1 < len(self.frames_vobj_data)
+
+    def next(self) -> Frame:
+        self.frame_id += 1
+        frame = Frame(video_metadata={}, id=self.frame_id,
+                      image=np.zeros((4, 4, 3)))
+        for class_name, vobjs in \
+                self.frames_vobj_data[self.frame_id].items():
+            frame.vobj_data[class_name] = [dict(vobj) for vobj in vobjs]
+        return frame
+
+
+def box(x, y, size=10):
+    return np.array([x, y, x + size, y + size], dtype=float)
+
+
+FRAMES = [
+    {
+        "person": [{"tlbr": box(0, 0), "track_id": 1},
+                   {"tlbr": box(500, 500), "track_id": 2}],
+        "baggage": [{"tlbr": box(30, 0), "track_id": 10},
+                    {"tlbr": box(10, 0), "track_id": 11},
+                    {"tlbr": box(5, 5), "track_id": InvalidProperty()},
+                    {"tlbr": box(200, 200, size=305), "track_id": 12},
+                    {"tlbr": box(0, 15), "track_id": 13}],
+    },
+    {
+        "person": [{"tlbr": box(0, 0), "track_id": 1}],
+    },
+]
+
+
+def create_projector(other_filter_index=1, **kwargs):
+    reader = ReplayReader(FRAMES)
+    person_filter = VObjFilter(reader, condition_func="person")
+    # baggage 13 is filtered out
+    baggage_filter = VObjFilter(person_filter, condition_func="baggage",
+                                filter_index=1)
+    baggage_filter = VObjFilter(
+        baggage_filter, filter_index=1,
+        condition_func=lambda vobj: vobj["track_id"] != 13)
+    return CrossVObjProjector(
+        prev=baggage_filter,
+        property_name="baggage_ids",
+        property_func=lambda values, others: [
+            (values["track_id"], other["track_id"]) for other in others],
+        dependencies={"track_id": 0},
+        is_stateful=False,
+        class_name="person",
+        other_class_name="baggage",
+        other_dependencies=["track_id"],
+        other_filter_index=other_filter_index,
+        **kwargs,
+    )
+
+
+def run(projector):
+    outputs = []
+    while projector.has_next():
+        frame = projector.next()
+        outputs.append([vobj["baggage_ids"]
+                        for vobj in frame.vobj_data["person"]])
+    return outputs
+
+
+def test_max_distance():
+    projector = create_projector(max_distance=40)
+    # from the nearest, without the baggage with invalid track_id
+    assert run(projector) == [[[(1, 11), (1, 10)], []], [[]]]
+
+    projector = create_projector(other_filter_index=None, max_distance=40)
+    assert run(projector) == [[[(1, 11), (1, 13), (1, 10)], []], [[]]]
+
+
+def test_overlap():
+    projector = create_projector(overlap=True)
+    assert run(projector) == [[[(1, 11)], [(2, 12)]], [[]]]
+
+
+def test_invalid_pruning():
+    with pytest.raises(ValueError):
+        create_projector()
+    with pytest.raises(ValueError):
+        create_projector(max_distance=40, overlap=True)
+    with pytest.raises(ValueError):
+        create_projector(max_distance=-1)
@@ -0,0 +1,54 @@
+from vqpy.backend.operator.fan_out import FanOut
+from vqpy.backend.operator.frame_filter import VObjFrameFilter
+from vqpy.backend.operator.object_detector import ObjectDetector
+from vqpy.backend.operator.video_reader import VideoReader
+from vqpy.backend.operator.vobj_filter import VObjFilter
+
+import os
+import fake_yolox  # noqa: F401
+current_dir = os.path.dirname(os.path.abspath(__file__))
+resource_dir = os.path.join(current_dir, "..", "..", "resources/")
+video_path = os.path.join(resource_dir, "pedestrian_10s.mp4")
+
+
+def create_detector(class_names):
+    assert os.path.isfile(video_path)
+    return ObjectDetector(
+        prev=VideoReader(video_path),
+        class_names=class_names,
+        detector_name="fake_yolox",
+        detector_kwargs={"device": "cpu"}
+    )
+
+
+def create_branch(prev, class_name):
+    vobj_filter = VObjFilter(prev=prev, condition_func=class_name)
+    return VObjFrameFilter(prev=vobj_filter)
+
+
+def test_fan_out():
+    class_names = ("person", "car")
+    # expected results of each class with its own detector
+    expected = dict()
+    for class_name in class_names:
+        branch = create_branch(create_detector({class_name}), class_name)
+        expected[class_name] = []
+        while branch.has_next():
+            frame = branch.next()
+            expected[class_name].append(
+                (frame.id, frame.filtered_vobjs[0][class_name]))
+
+    fan_out = FanOut(prev=create_detector(set(class_names)),
+                     n_branches=len(class_names))
+    branches = [create_branch(fan_out.branches[i], class_name)
+                for i, class_name in enumerate(class_names)]
+    results = {class_name: [] for class_name in class_names}
+    while fan_out.advance():
+        for class_name, branch in zip(class_names, branches):
+            while branch.has_next():
+                frame = branch.next()
+                # branches do not see the filters of each other
+                assert list(frame.filtered_vobjs[0]) == [class_name]
+                results[class_name].append(
+                    (frame.id, frame.filtered_vobjs[0][class_name]))
+    assert results == expected
@@ -0,0 +1,93 @@
+from vqpy.backend.operator.base import Operator
+from vqpy.backend.operator.frame_sampler import FrameSampler
+from vqpy.backend.operator.prefetcher import Prefetcher
+from vqpy.backend.frame import Frame
+
+import pytest
+
+
+class CountingReader(Operator):
+    def __init__(self, n_frames, fps=30.0, busy_frames=()):
+        self.n_frames = n_frames
+        self.fps = fps
+        self.busy_frames = set(busy_frames)
+        self.frame_id = -1
+        super().__init__(None)
+
+    def has_next(self) -> bool:
+        return self.frame_id + 1 < self.n_frames
+
+    def next(self) -> Frame:
+        self.frame_id += 1
+        return Frame(video_metadata={"fps": self.fps},
+                     id=self.frame_id, image=None)
+
+
+def run(sampler, busy_frames=()):
+    frame_ids = []
+    while sampler.has_next():
+        frame = sampler.next()
+        # mimic a vobj filter after the sampler
+        person_indexes = [0] if frame.id in busy_frames else []
+        frame.filtered_vobjs[0]["person"] = person_indexes
+        frame.filters_done = True
+        frame_ids.append(frame.id)
+    return frame_ids
+
+
+def test_stride():
+    sampler = FrameSampler(CountingReader(10), stride=3)
+    assert run(sampler) == [0, 3, 6, 9]
+    with pytest.raises(StopIteration):
+        sampler.next()
+
+
+def test_target_fps():
+    sampler = FrameSampler(CountingReader(10, fps=30.0), target_fps=10)
+    assert run(sampler) == [0, 3, 6, 9]
+
+
+def test_adaptive():
+    sampler = FrameSampler(CountingReader(40), stride=1, max_stride=8)
+    frame_ids = run(sampler, busy_frames=range(15, 40))
+    # the stride doubles on empty frames, and is reset on busy frames
+    assert frame_ids[:6] == [0, 2, 6, 14, 22, 23]
+    assert frame_ids[5:] == list(range(23, 40))
+
+
+@pytest.mark.parametrize("busy", [True, False])
+def test_adaptive_pipelined(busy):
+    # the sampler runs ahead of the vobj filters on the prefetcher thread
+    sampler = FrameSampler(CountingReader(200), stride=1, max_stride=8)
+    pipeline = Prefetcher(sampler, max_queue_size=4)
+    frame_ids = run(pipeline, busy_frames=range(200) if busy else ())
+    pipeline.close()
+    strides = [b - a for a, b in zip(frame_ids, frame_ids[1:])]
+    if busy:
+        assert frame_ids == list(range(200))
+    else:
+        assert strides[-1] == 8
+
+
+@pytest.mark.parametrize("other_index, output_index",
+                         [(1, 0), ((0, 1), (0, 0))])
+def test_adaptive_output_index(other_index, output_index):
+    # vobjs at other filter indexes, e.g. of cross vobj properties, or of
+    # the branches of a FanOut, do not keep the sampling dense
+    sampler = FrameSampler(CountingReader(40), stride=1, max_stride=8)
+    frame_ids = []
+    while sampler.has_next():
+        frame = sampler.next()
+        frame.filtered_vobjs[other_index]["car"] = [0]
+        frame.filtered_vobjs[output_index]["person"] = \
+            [0] if frame.id >= 30 else []
+        frame.filters_done = True
+        frame_ids.append(frame.id)
+    assert frame_ids == [0, 2, 6, 14, 22, 30, 31] + list(range(32, 40))
+
+
+def test_invalid_args():
+    with pytest.raises(ValueError):
+        FrameSampler(CountingReader(10), stride=0)
+    with pytest.raises(ValueError):
+        FrameSampler(CountingReader(10), stride=4, max_stride=2)
@@ -1,9 +1,14 @@
 from vqpy.backend.operator.object_detector import ObjectDetector
 from vqpy.backend.operator.video_reader import VideoReader
+from vqpy.class_names.coco import COCO_CLASSES
+from vqpy.operator.detector import register
+from vqpy.operator.detector.base import DetectorBase
 
+from typing import Dict, List
+import numpy as np
 import pytest
 import os
-import fake_yolox  # noqa: F401
+import fake_yolox
 current_dir = os.path.dirname(os.path.abspath(__file__))
 resource_dir = os.path.join(current_dir, "..", "..", "resources/")
 
@@ -59,3 +64,86 @@ def test_multi_class_object_detector(video_reader):
         counter += 1
     assert counter == video_reader.metadata["n_frames"]
     assert car_detected
+
+
+def test_batched_object_detector(video_reader):
+    object_detector = ObjectDetector(
+        prev=video_reader,
+        class_names="person",
+        detector_name="fake_yolox",
+        batch_size=4,
+    )
+    video_path = os.path.join(resource_dir, "pedestrian_10s.mp4")
+    expected_detector = ObjectDetector(
+        prev=VideoReader(video_path),
+        class_names="person",
+        detector_name="fake_yolox",
+    )
+    counter = 0
+    while object_detector.has_next():
+        frame = object_detector.next()
+        expected_frame = expected_detector.next()
+        assert frame.id == expected_frame.id == counter
+        persons = frame.vobj_data["person"]
+        expected_persons = expected_frame.vobj_data["person"]
+        assert len(persons) == len(expected_persons)
+        for person, expected_person in zip(persons, expected_persons):
+            assert (person["tlbr"] == expected_person["tlbr"]).all()
+            assert person["score"] == expected_person["score"]
+        counter += 1
+    assert counter == video_reader.metadata["n_frames"]
+    assert not expected_detector.has_next()
+
+
+def test_invalid_batch_size(video_reader):
+    with pytest.raises(ValueError):
+        ObjectDetector(
+            prev=video_reader,
+            class_names="person",
+            detector_name="fake_yolox",
+            batch_size=0,
+        )
+
+
+class CropRecorder(DetectorBase):
+    # detects one person at a fixed box of every image, and records the
+    # shapes of the images
+    cls_names = COCO_CLASSES
+    output_fields = ["tlbr", "score", "class_id"]
+
+    def __init__(self, model_path, **detector_kwargs):
+        self.shapes = []
+
+    def inference(self, img) -> List[Dict]:
+        self.shapes.append(img.shape)
+        return [dict(tlbr=np.array([1., 2., 11., 22.]), score=0.9,
+                     class_id=COCO_CLASSES.index("person"))]
+
+
+register("crop_recorder", CropRecorder, fake_yolox.precomputed_path, None)
+
+
+def test_object_detector_roi(video_reader):
+    width = int(video_reader.metadata["frame_width"])
+    object_detector = ObjectDetector(
+        prev=video_reader,
+        class_names="person",
+        detector_name="crop_recorder",
+        # the roi is clipped to the frame
+        roi=(100.5, -20, width + 50, 200),
+    )
+    frame = object_detector.next()
+    assert object_detector.detector.shapes == [(200, width - 100, 3)]
+    assert frame.image.shape[1] == width
+    tlbr = frame.vobj_data["person"][0]["tlbr"]
+    assert (tlbr == np.array([101., 2., 111., 22.])).all()
+
+
+def test_invalid_roi(video_reader):
+    with pytest.raises(ValueError):
+        ObjectDetector(
+            prev=video_reader,
+            class_names="person",
+            detector_name="crop_recorder",
+            roi=(100, 100, 50, 200),
+        )
@@ -0,0 +1,85 @@
+from vqpy.backend.operator.base import Operator
+from vqpy.backend.operator.object_detector import ObjectDetector
+from vqpy.backend.operator.video_reader import VideoReader
+from vqpy.backend.operator.prefetcher import Prefetcher
+from vqpy.backend.operator.tracker import Tracker
+from vqpy.backend.frame import Frame
+
+import pytest
+import os
+import fake_yolox  # noqa: F401
+current_dir = os.path.dirname(os.path.abspath(__file__))
+resource_dir = os.path.join(current_dir, "..", "..", "resources/")
+
+
+@pytest.fixture
+def video_reader():
+    video_path = os.path.join(resource_dir, "pedestrian_10s.mp4")
+    assert os.path.isfile(video_path)
+    video_reader = VideoReader(video_path)
+    return video_reader
+
+
+class CountingReader(Operator):
+    def __init__(self, n_frames, fail_at=None):
+        self.n_frames = n_frames
+        self.fail_at = fail_at
+        self.frame_id = -1
+        super().__init__(None)
+
+    def has_next(self) -> bool:
+        return self.frame_id + 1 < self.n_frames
+
+    def next(self) -> Frame:
+        self.frame_id += 1
+        if self.frame_id == self.fail_at:
+            raise IOError
+        return Frame(video_metadata={}, id=self.frame_id, image=None)
+
+
+def test_pipelined_tracker(video_reader):
+    fps = video_reader.metadata["fps"]
+    object_detector = ObjectDetector(
+        prev=Prefetcher(video_reader, max_queue_size=2),
+        class_names="person",
+        detector_name="fake_yolox",
+    )
+    tracker = Tracker(
+        prev=Prefetcher(object_detector, max_queue_size=2),
+        class_name="person",
+        fps=fps,
+    )
+    pipeline = Prefetcher(tracker, max_queue_size=2)
+    counter = 0
+    while pipeline.has_next():
+        frame = pipeline.next()
+        assert frame.id == counter
+        if "person" in frame.vobj_data:
+            num_person_tracked = len([p for p in frame.vobj_data["person"]
+                                      if p.get("track_id")])
+            assert num_person_tracked > 0
+        counter += 1
+    assert counter == video_reader.metadata["n_frames"]
+    with pytest.raises(StopIteration):
+        pipeline.next()
+
+
+def test_error_propagation():
+    pipeline = Prefetcher(CountingReader(10, fail_at=5))
+    frame_ids = []
+    with pytest.raises(IOError):
+        while pipeline.has_next():
+            frame_ids.append(pipeline.next().id)
+    assert frame_ids == [0, 1, 2, 3, 4]
+
+
+def test_close():
+    reader = CountingReader(1000)
+    upstream = Prefetcher(reader, max_queue_size=1)
+    pipeline = Prefetcher(upstream, max_queue_size=1)
+    assert pipeline.next().id == 0
+    upstream.close()
+    pipeline.close()
+    assert not pipeline.has_next()
+    # backpressure: the reader is never far ahead of the consumer
+    assert reader.frame_id < 10
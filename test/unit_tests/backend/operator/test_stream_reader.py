@@ -0,0 +1,171 @@
+from vqpy.backend.operator.stream_reader import StreamReader, is_stream_url
+from vqpy.backend.operator.object_detector import ObjectDetector
+from vqpy.backend.operator.tracker import Tracker
+from vqpy.backend.operator.vobj_filter import VObjFilter
+from vqpy.backend.operator.vobj_projector import VObjProjector
+from vqpy.common import InvalidProperty
+
+import cv2
+import pytest
+import os
+import time
+import fake_yolox  # noqa: F401
+current_dir = os.path.dirname(os.path.abspath(__file__))
+resource_dir = os.path.join(current_dir, "..", "..", "resources/")
+video_path = os.path.join(resource_dir, "pedestrian_10s.mp4")
+
+
+class FakeCapture:
+    # a session of the fake stream, which breaks after {n_frames} frames
+    def __init__(self, cap, n_frames):
+        self._cap = cap
+        self._n_frames = n_frames
+
+    def isOpened(self):
+        return self._cap.isOpened()
+
+    def get(self, prop):
+        return self._cap.get(prop)
+
+    def read(self):
+        if self._n_frames == 0:
+            return False, None
+        self._n_frames -= 1
+        return self._cap.read()
+
+    def release(self):
+        self._cap.release()
+
+
+class FakeStreamServer:
+    def __init__(self, n_sessions, n_frames_per_session):
+        """Replays the video file, accepting {n_sessions} connections."""
+        self.n_sessions = n_sessions
+        self.n_frames_per_session = n_frames_per_session
+        self.n_connects = 0
+        self._video_capture = cv2.VideoCapture
+
+    def connect(self, url):
+        self.n_connects += 1
+        if self.n_connects > self.n_sessions:
+            return FakeCapture(self._video_capture(), 0)
+        return FakeCapture(self._video_capture(video_path),
+                           self.n_frames_per_session)
+
+
+@pytest.fixture
+def n_frames():
+    cap = cv2.VideoCapture(video_path)
+    n_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+    return n_frames
+
+
+def test_is_stream_url():
+    assert is_stream_url("rtsp://127.0.0.1:8554/cam")
+    assert is_stream_url("HTTP://127.0.0.1/cam.mjpg")
+    assert not is_stream_url(video_path)
+    assert not is_stream_url(None)
+
+
+def test_block(n_frames):
+    reader = StreamReader(video_path, drop_policy="block", max_queue_size=2,
+                          max_reconnect_attempts=0)
+    assert reader.metadata["fps"]
+    assert reader.metadata["n_frames"] is None
+    frame_ids = []
+    while reader.has_next():
+        frame_ids.append(reader.next().id)
+    assert frame_ids == list(range(n_frames))
+    assert reader.n_dropped == 0
+    with pytest.raises(StopIteration):
+        reader.next()
+
+
+@pytest.mark.parametrize("drop_policy", ["drop_oldest", "latest"])
+def test_drop(n_frames, drop_policy):
+    reader = StreamReader(video_path, drop_policy=drop_policy,
+                          max_queue_size=2, max_reconnect_attempts=0)
+    frame_ids = []
+    while reader.has_next():
+        frame_ids.append(reader.next().id)
+        # slow consumer
+        time.sleep(0.01)
+    assert reader.n_dropped > 0
+    assert len(frame_ids) + reader.n_dropped == n_frames
+    assert frame_ids == sorted(set(frame_ids))
+    # the newest frame is never dropped
+    assert frame_ids[-1] == n_frames - 1
+
+
+def test_reconnect(monkeypatch):
+    server = FakeStreamServer(n_sessions=3, n_frames_per_session=20)
+    monkeypatch.setattr(cv2, "VideoCapture", server.connect)
+    reader = StreamReader("rtsp://127.0.0.1:8554/cam", drop_policy="block",
+                          reconnect_interval=0.01, max_reconnect_attempts=2)
+    frame_ids = []
+    while reader.has_next():
+        frame_ids.append(reader.next().id)
+    # frame ids keep increasing across reconnects
+    assert frame_ids == list(range(60))
+    # 2 successful reconnects, then 2 failed ones
+    assert reader.n_reconnects == 4
+
+
+def test_connect_failure(monkeypatch):
+    server = FakeStreamServer(n_sessions=0, n_frames_per_session=0)
+    monkeypatch.setattr(cv2, "VideoCapture", server.connect)
+    with pytest.raises(IOError):
+        StreamReader("rtsp://127.0.0.1:8554/cam", reconnect_interval=0.01,
+                     max_reconnect_attempts=1)
+    assert server.n_connects == 2
+
+
+def test_close():
+    reader = StreamReader(video_path, drop_policy="block", max_queue_size=1)
+    assert reader.next().id == 0
+    reader.close()
+    assert not reader.has_next()
+    # backpressure: the reader is never far ahead of the consumer
+    assert reader.frame_id < 10
+
+
+def test_stateful_projector_dropped_frames():
+    reader = StreamReader(video_path, drop_policy="latest",
+                          max_reconnect_attempts=0)
+    object_detector = ObjectDetector(
+        prev=reader,
+        class_names="person",
+        detector_name="fake_yolox",
+    )
+    tracker = Tracker(
+        prev=object_detector,
+        class_name="person",
+        fps=reader.metadata["fps"],
+    )
+    person_filter = VObjFilter(prev=tracker, condition_func="person")
+    projector = VObjProjector(
+        prev=person_filter,
+        property_name="last_score",
+        property_func=lambda values: values["score"][0],
+        dependencies={"score": 1},
+        is_stateful=True,
+        class_name="person",
+    )
+    last_frame_id = -1
+    n_tracked = 0
+    n_with_history = 0
+    while projector.has_next():
+        frame = projector.next()
+        assert frame.id > last_frame_id
+        last_frame_id = frame.id
+        for vobj in frame.vobj_data["person"]:
+            if vobj.get("track_id"):
+                n_tracked += 1
+                if not isinstance(vobj["last_score"], InvalidProperty):
+                    n_with_history += 1
+        # slow consumer
+        time.sleep(0.01)
+    assert reader.n_dropped > 0
+    assert n_tracked > 0
+    assert n_with_history > 0
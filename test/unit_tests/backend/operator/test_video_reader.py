@@ -1,5 +1,6 @@
 from vqpy.backend.operator.video_reader import VideoReader
 from vqpy.backend.frame import Frame
+from vqpy.utils import interrupt
 import pytest
 import os
 
@@ -36,3 +37,107 @@ def test_next(video_reader):
         assert frame.image.shape == (frame_height, frame_width, 3)
         counter += 1
     assert counter == video_reader.metadata["n_frames"]
+
+
+def test_frame_id_range():
+    video_path = os.path.join(resource_dir, "pedestrian_10s.mp4")
+    full_reader = VideoReader(video_path)
+    images = dict()
+    while full_reader.has_next():
+        frame = full_reader.next()
+        if 100 <= frame.id < 110:
+            images[frame.id] = frame.image
+
+    video_reader = VideoReader(video_path, frame_id_range=(100, 110))
+    frame_ids = []
+    while video_reader.has_next():
+        frame = video_reader.next()
+        assert (frame.image == images[frame.id]).all()
+        frame_ids.append(frame.id)
+    assert frame_ids == list(range(100, 110))
+
+
+@pytest.mark.parametrize("frame_id_range",
+                         [(5, 5), (0, 0), (240, 250), (100000, 100010)])
+def test_empty_frame_id_range(frame_id_range):
+    video_path = os.path.join(resource_dir, "pedestrian_10s.mp4")
+    video_reader = VideoReader(video_path, frame_id_range=frame_id_range)
+    assert not video_reader.has_next()
+    with pytest.raises(StopIteration):
+        video_reader.next()
+
+
+def test_interrupt_hook():
+    video_path = os.path.join(resource_dir, "pedestrian_10s.mp4")
+    video_reader = VideoReader(
+        video_path,
+        interrupt_hook=lambda: video_reader.frame_id == 5,
+    )
+    frame_ids = []
+    with pytest.raises(KeyboardInterrupt):
+        while video_reader.has_next():
+            frame_ids.append(video_reader.next().id)
+    assert frame_ids == [0, 1, 2, 3, 4]
+
+
+def test_default_interrupt_hook(monkeypatch):
+    # waitKey is only polled when opted in, even with a display
+    monkeypatch.setattr(interrupt, "has_display", lambda: True)
+    video_path = os.path.join(resource_dir, "pedestrian_10s.mp4")
+    video_reader = VideoReader(video_path)
+    assert video_reader._interrupt_hook is None
+    video_reader.close()
+    assert interrupt.resolve_interrupt_hook(None, "highgui") is \
+        interrupt.highgui_interrupt_hook
+    assert interrupt.resolve_interrupt_hook(True, "highgui") is None
+    with pytest.raises(ValueError):
+        interrupt.resolve_interrupt_hook(None, "keyboard")
+
+
+def test_output_size():
+    video_path = os.path.join(resource_dir, "pedestrian_10s.mp4")
+    video_reader = VideoReader(video_path, output_size=(320, 180),
+                               pixel_format="rgb24")
+    assert video_reader.metadata["frame_width"] == 320
+    assert video_reader.metadata["frame_height"] == 180
+    frame = video_reader.next()
+    assert frame.image.shape == (180, 320, 3)
+    video_reader.close()
+
+
+def test_pyav_decoder():
+    pytest.importorskip("av")
+    video_path = os.path.join(resource_dir, "pedestrian_10s.mp4")
+    cv_reader = VideoReader(video_path)
+    av_reader = VideoReader(video_path, decoder="pyav")
+    assert av_reader.metadata == cv_reader.metadata
+    counter = 0
+    while av_reader.has_next():
+        frame = av_reader.next()
+        assert frame.id == counter
+        assert frame.image.shape == cv_reader.next().image.shape
+        counter += 1
+    assert counter == cv_reader.metadata["n_frames"]
+
+    av_reader = VideoReader(video_path, decoder="pyav",
+                            frame_id_range=(100, 110),
+                            output_size=(320, 180))
+    frame_ids = []
+    while av_reader.has_next():
+        frame = av_reader.next()
+        assert frame.image.shape == (180, 320, 3)
+        frame_ids.append(frame.id)
+    assert frame_ids == list(range(100, 110))
+
+
+def test_pyav_keyframes_only():
+    pytest.importorskip("av")
+    video_path = os.path.join(resource_dir, "pedestrian_10s.mp4")
+    video_reader = VideoReader(video_path, decoder="pyav",
+                               keyframes_only=True)
+    frame_ids = []
+    while video_reader.has_next():
+        frame_ids.append(video_reader.next().id)
+    assert 0 < len(frame_ids) < video_reader.metadata["n_frames"]
+    assert frame_ids[0] == 0
+    assert frame_ids == sorted(set(frame_ids))
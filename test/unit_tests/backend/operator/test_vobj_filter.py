@@ -135,3 +135,27 @@ def test_existed_class(object_detector):
     )
     with pytest.raises(ValueError):
         dup_car_vobj_filter.next()
+
+
+def test_vectorized_condition(object_detector):
+    person_vobj_filter = VObjFilter(
+        prev=object_detector,
+        condition_func="person",
+        filter_index=0,
+    )
+
+    def score_gt_half(columns):
+        values, valid = columns["score"]
+        return (values > 0.5) & valid
+
+    score_filter = VObjFilter(
+        prev=person_vobj_filter,
+        condition_func=score_gt_half,
+        filter_index=0,
+        vectorized=True,
+    )
+    while score_filter.has_next():
+        frame = score_filter.next()
+        expected = [i for i, vobj in enumerate(frame.vobj_data["person"])
+                    if vobj["score"] > 0.5]
+        assert frame.filtered_vobjs[0]["person"] == expected
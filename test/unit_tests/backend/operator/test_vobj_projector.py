@@ -7,6 +7,7 @@ from vqpy.common import InvalidProperty
 from collections import defaultdict
 
 
+import numpy as np
 import pytest
 import os
 import fake_yolox  # noqa: F401
@@ -157,10 +158,8 @@ def test_stateful_projector(stateful_filter):
                 else:
                     assert not isinstance(vobj["hist_scores"], InvalidProperty)
                     hist_buffer = projector._hist_buffer
-                    row = (hist_buffer["track_id"] == track_id) & \
-                        (hist_buffer["frame_id"] == frame.id)
-                    assert hist_buffer.loc[row, "score"].values[0] == \
-                        vobj["score"]
+                    assert hist_buffer.get_value(
+                        track_id, frame.id, "score") == vobj["score"]
                     data = {"frame_id": frame.id,
                             "hist_scores": vobj["hist_scores"]}
                     result[track_id].append(data)
@@ -313,3 +312,39 @@ def test_projector_multi_index():
 
 def test_graph():
     pass
+
+
+def test_vectorized_projector(stateless_filter):
+    def bottom_center(values):
+        tlbr = values["tlbr"]
+        assert tlbr.shape[1] == 4
+        return np.stack(((tlbr[:, 0] + tlbr[:, 2]) / 2, tlbr[:, 3]), axis=1)
+
+    projector = VObjProjector(
+        prev=stateless_filter,
+        property_name="bottom_center",
+        property_func=bottom_center,
+        dependencies={"tlbr": 0},
+        is_stateful=False,
+        class_name="person",
+        vectorized=True,
+    )
+    while projector.has_next():
+        frame = projector.next()
+        for vobj in frame.vobj_data["person"]:
+            tlbr = vobj["tlbr"]
+            assert np.allclose(vobj["bottom_center"],
+                               [(tlbr[0] + tlbr[2]) / 2, tlbr[3]])
+
+
+def test_vectorized_projector_dep_on_hist(stateful_filter):
+    with pytest.raises(ValueError):
+        VObjProjector(
+            prev=stateful_filter,
+            property_name="hist_scores",
+            property_func=lambda values: values["score"],
+            dependencies={"score": 1},
+            is_stateful=True,
+            class_name="person",
+            vectorized=True,
+        )
@@ -0,0 +1,192 @@
+from vqpy.backend.executor import Executor
+from vqpy.backend.plan_nodes.base import AbstractPlanNode
+from vqpy.backend.plan_nodes.object_detector import (
+    create_object_detector_node,
+)
+from vqpy.backend.plan_nodes.tracker import TrackerNode, create_tracker_node
+from vqpy.backend.plan_nodes.vobj_filter import (
+    VObjFilterNode,
+    create_vobj_class_filter_node,
+)
+from vqpy.backend.plan_nodes.vobj_projector import (
+    CrossProjectorNode,
+    ProjectorNode,
+    create_cross_vobj_nodes,
+    create_frame_output_projector,
+    create_projector_adjacent_to_filter,
+    get_cross_filter_indexes,
+    optimize_projectors,
+)
+from vqpy.backend.planner import Planner
+from vqpy.frontend.query import QueryBase
+from vqpy.frontend.vobj import VObjBase, cross_vobj_property, vobj_property
+
+import fake_yolox  # noqa: F401
+import os
+import pytest
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+resource_dir = os.path.join(current_dir, "..", "..", "resources/")
+video_path = os.path.join(resource_dir, "pedestrian_10s.mp4")
+
+
+class InputNode(AbstractPlanNode):
+    def to_operator(self, lauch_args: dict):
+        raise NotImplementedError
+
+
+class Baggage(VObjBase):
+
+    def __init__(self) -> None:
+        self.class_name = "backpack"
+        self.object_detector = "yolox"
+        self.detector_kwargs = {"device": "cpu"}
+        super().__init__()
+
+    @vobj_property(inputs={"tlbr": 0})
+    def bottom(self, values):
+        return values["tlbr"][3]
+
+    @vobj_property(inputs={"tlbr": 0})
+    def unused(self, values):
+        return 0
+
+
+class Person(VObjBase):
+
+    def __init__(self) -> None:
+        self.class_name = "person"
+        self.object_detector = "yolox"
+        self.detector_kwargs = {"device": "cpu"}
+        super().__init__()
+
+    @cross_vobj_property(vobj_type=Baggage, inputs={"tlbr": 0},
+                         other_inputs=["track_id", "bottom"],
+                         max_distance=100)
+    def baggage_ids(self, values, others):
+        return [other["track_id"] for other in others]
+
+    @vobj_property(inputs={"baggage_ids": 0})
+    def n_baggage(self, values):
+        return len(values["baggage_ids"])
+
+
+class BaggageQuery(QueryBase):
+
+    def __init__(self) -> None:
+        self.person = Person()
+
+    def frame_constraint(self):
+        return self.person.n_baggage > 0
+
+    def frame_output(self):
+        return [self.person.track_id, self.person.baggage_ids]
+
+
+def get_steps(node):
+    steps = []
+    while not isinstance(node, InputNode):
+        if isinstance(node, ProjectorNode):
+            steps.append((node.class_name, node.filter_index,
+                          node.projection_field.field_name))
+        else:
+            assert isinstance(node, VObjFilterNode)
+            steps.append((type(node.predicate).__name__, node.filter_index))
+        node = node.prev
+    return steps[::-1]
+
+
+def test_cross_vobj_plan():
+    query = BaggageQuery()
+    assert get_cross_filter_indexes(query) == {"person": 0, "backpack": 1}
+
+    node = create_vobj_class_filter_node(query, InputNode())
+    node = create_cross_vobj_nodes(query, node)
+    node, vobj_properties_map = create_projector_adjacent_to_filter(
+        query, node)
+    node = create_frame_output_projector(query, node, vobj_properties_map)
+    node = optimize_projectors(query, node)
+    assert get_steps(node) == [
+        ("IsInstance", 0),
+        ("IsInstance", 1),
+        ("backpack", 1, "bottom"),
+        ("person", 0, "baggage_ids"),
+        ("person", 0, "n_baggage"),
+        ("GreaterThan", 0),
+    ]
+    cross_node = node.prev.prev
+    assert isinstance(cross_node, CrossProjectorNode)
+    assert cross_node.other_class_name == "backpack"
+    assert cross_node.other_filter_index == 1
+    assert cross_node.other_fields == ["track_id", "bottom"]
+    assert cross_node.max_distance == 100
+
+
+def test_cross_vobj_detector_and_tracker():
+    query = BaggageQuery()
+    node = create_object_detector_node(query, InputNode())
+    # detected by the same detector, on the full frames
+    assert node.class_names == {"person", "backpack"}
+    assert node.roi is None
+
+    node = create_tracker_node(query, InputNode())
+    assert isinstance(node, TrackerNode)
+    assert node.class_name == "backpack"
+    assert node.prev.class_name == "person"
+
+
+def test_invalid_cross_vobj_property():
+    with pytest.raises(ValueError):
+        class Invalid(Person):
+            @cross_vobj_property(vobj_type=Baggage, inputs={},
+                                 other_inputs=["tlbr"])
+            def nearby(self, values, others):
+                return others
+        Invalid().nearby
+
+
+class Pedestrian(VObjBase):
+
+    def __init__(self) -> None:
+        self.class_name = "person"
+        self.object_detector = "fake_yolox"
+        self.detector_kwargs = {"device": "cpu"}
+        super().__init__()
+
+
+class Car(VObjBase):
+
+    def __init__(self) -> None:
+        self.class_name = "car"
+        self.object_detector = "fake_yolox"
+        self.detector_kwargs = {"device": "cpu"}
+        super().__init__()
+
+    @cross_vobj_property(vobj_type=Pedestrian, inputs={"tlbr": 0},
+                         other_inputs=["tlbr"], max_distance=100)
+    def n_pedestrians(self, values, others):
+        return len(others)
+
+
+class NoCarQuery(QueryBase):
+
+    def __init__(self) -> None:
+        self.car = Car()
+
+    def frame_constraint(self):
+        # no car passes, while there are persons on every frame
+        return self.car.score > 2
+
+    def frame_output(self):
+        return self.car.n_pedestrians
+
+
+def test_cross_vobj_adaptive_sampling():
+    root_plan_node = Planner().parse(NoCarQuery(), max_sample_stride=8,
+                                     output_per_frame_results=True)
+    executor = Executor(root_plan_node, {"video_path": video_path})
+    frame_ids = [result["frame_id"] for result in executor.execute()]
+    strides = [b - a for a, b in zip(frame_ids, frame_ids[1:])]
+    # the persons of the cross vobj property do not keep sampling dense
+    assert strides[:3] == [2, 4, 8]
+    assert set(strides[3:]) == {8}
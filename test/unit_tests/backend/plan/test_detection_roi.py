@@ -0,0 +1,112 @@
+from vqpy.backend.frame import VObjColumns
+from vqpy.backend.plan_nodes.base import AbstractPlanNode
+from vqpy.backend.plan_nodes.object_detector import (
+    DEFAULT_ROI_MARGIN,
+    create_object_detector_node,
+    create_shared_object_detector_nodes,
+    get_detection_roi,
+)
+from vqpy.backend.predicate_compiler import compile_predicate
+from vqpy.frontend.query import QueryBase
+from vqpy.frontend.vobj import VObjBase
+
+import numpy as np
+import pytest
+
+REGION = [(100, 100), (300, 100), (300, 200), (100, 200)]
+TRIANGLE = [(200, 150), (400, 150), (400, 400)]
+
+
+class InputNode(AbstractPlanNode):
+    def to_operator(self, lauch_args: dict):
+        raise NotImplementedError
+
+
+class Person(VObjBase):
+
+    def __init__(self) -> None:
+        self.class_name = "person"
+        self.object_detector = "yolox"
+        self.detector_kwargs = {"device": "cpu"}
+        super().__init__()
+
+
+class RegionQuery(QueryBase):
+
+    def __init__(self) -> None:
+        self.person = Person()
+
+    def frame_constraint(self):
+        return self.person.tlbr.within_regions([REGION]) \
+            & (self.person.score > 0.6) \
+            & self.person.tlbr.within_regions([TRIANGLE], anchor="center")
+
+    def frame_output(self):
+        return self.person.tlbr
+
+
+class AnyRegionQuery(RegionQuery):
+
+    def frame_constraint(self):
+        # vobjs outside of the region may satisfy the constraint
+        return self.person.tlbr.within_regions([REGION]) \
+            | (self.person.score > 0.6)
+
+
+def test_within_regions():
+    predicate = Person().tlbr.within_regions([REGION, TRIANGLE])
+    tlbrs = np.array([
+        [150, 50, 170, 150],   # bottom center inside REGION
+        [150, 150, 170, 250],  # bottom center below REGION
+        [330, 200, 370, 300],  # bottom center inside TRIANGLE
+        [0, 0, 10, 10],
+    ], dtype=float)
+    expected = [True, False, True, False]
+    assert [predicate.compare_func(tlbr) for tlbr in tlbrs] == expected
+    columns = VObjColumns([{"tlbr": tlbr} for tlbr in tlbrs],
+                          range(len(tlbrs)))
+    condition_func = compile_predicate(predicate)
+    assert condition_func(columns).tolist() == expected
+    assert predicate.get_roi() == (100, 100, 400, 400)
+
+
+def test_invalid_within_regions():
+    person = Person()
+    with pytest.raises(ValueError):
+        person.score.within_regions([REGION])
+    with pytest.raises(ValueError):
+        person.tlbr.within_regions([REGION], anchor="top_left")
+    with pytest.raises(ValueError):
+        person.tlbr.within_regions([REGION[:2]])
+
+
+def test_detection_roi():
+    margin = DEFAULT_ROI_MARGIN
+    node = create_object_detector_node(RegionQuery(), InputNode())
+    # the intersection of the bounding boxes of the regions
+    assert node.roi == (200 - margin, 150 - margin,
+                        300 + margin, 200 + margin)
+
+    node = create_object_detector_node(RegionQuery(), InputNode(),
+                                       crop_detection_roi=False)
+    assert node.roi is None
+    node = create_object_detector_node(AnyRegionQuery(), InputNode())
+    assert node.roi is None
+
+    query = RegionQuery()
+    query.person.detector_roi_margin = 0
+    assert get_detection_roi(query.frame_constraint(), query.person) == \
+        (200, 150, 300, 200)
+
+
+def test_shared_detection_roi():
+    query = RegionQuery()
+    query.person.detector_roi_margin = 0
+    node = create_shared_object_detector_nodes([query, RegionQuery()],
+                                               InputNode())
+    margin = DEFAULT_ROI_MARGIN
+    assert node.roi == (200 - margin, 150 - margin,
+                        300 + margin, 200 + margin)
+    node = create_shared_object_detector_nodes([query, AnyRegionQuery()],
+                                               InputNode())
+    assert node.roi is None
@@ -0,0 +1,98 @@
+from vqpy.backend.plan_nodes.base import AbstractPlanNode
+from vqpy.backend.plan_nodes.vobj_filter import VObjFilterNode
+from vqpy.backend.plan_nodes.vobj_projector import (
+    ProjectorNode,
+    create_frame_output_projector,
+    create_projector_adjacent_to_filter,
+    optimize_projectors,
+    _create_projector_node,
+)
+from vqpy.frontend.query import QueryBase
+from vqpy.frontend.vobj import VObjBase, vobj_property
+
+
+class InputNode(AbstractPlanNode):
+    def to_operator(self, lauch_args: dict):
+        raise NotImplementedError
+
+
+class Person(VObjBase):
+
+    def __init__(self) -> None:
+        self.class_name = "person"
+        super().__init__()
+
+    @vobj_property(inputs={"tlbr": 0})
+    def center(self, values):
+        tlbr = values["tlbr"]
+        return (tlbr[:2] + tlbr[2:]) / 2
+
+    @vobj_property(inputs={"center": 0})
+    def center_x(self, values):
+        return values["center"][0]
+
+    @vobj_property(inputs={"center": 0, "tlbr": 0})
+    def offset(self, values):
+        return values["center"] - values["tlbr"][:2]
+
+    @vobj_property(inputs={"tlbr": 0})
+    def height(self, values):
+        return values["tlbr"][3] - values["tlbr"][1]
+
+
+class CenterQuery(QueryBase):
+
+    def __init__(self) -> None:
+        self.person = Person()
+
+    def frame_constraint(self):
+        return self.person.center_x > 100
+
+    def frame_output(self):
+        return [self.person.offset, self.person.center_x]
+
+
+def get_steps(node):
+    steps = []
+    while not isinstance(node, InputNode):
+        if isinstance(node, ProjectorNode):
+            steps.append(node.projection_field.field_name)
+        else:
+            assert isinstance(node, VObjFilterNode)
+            steps.append(type(node.predicate).__name__)
+        assert node.prev.next is node
+        node = node.prev
+    return steps[::-1]
+
+
+def build_plan(query):
+    node, vobj_properties_map = create_projector_adjacent_to_filter(
+        query, InputNode())
+    return create_frame_output_projector(query, node, vobj_properties_map)
+
+
+def test_shared_dependency():
+    query = CenterQuery()
+    node = optimize_projectors(query, build_plan(query))
+    # center is shared by center_x and offset, and is projected once
+    assert get_steps(node) == ["center", "center_x", "GreaterThan", "offset"]
+
+
+def test_missing_dependency():
+    query = CenterQuery()
+    node = InputNode().set_next(
+        _create_projector_node("person", query.person.offset))
+    node = node.set_next(
+        _create_projector_node("person", query.person.center_x))
+    node = optimize_projectors(query, node)
+    assert get_steps(node) == ["center", "offset", "center_x"]
+
+
+def test_duplicate_and_unused():
+    query = CenterQuery()
+    node = build_plan(query)
+    # a duplicate of a projector and a projector that is never used
+    for prop in (query.person.center_x, query.person.height):
+        node = node.set_next(_create_projector_node("person", prop))
+    node = optimize_projectors(query, node)
+    assert get_steps(node) == ["center", "center_x", "GreaterThan", "offset"]
@@ -0,0 +1,97 @@
+from vqpy.backend.plan_nodes.base import AbstractPlanNode
+from vqpy.backend.plan_nodes.vobj_filter import VObjFilterNode
+from vqpy.backend.plan_nodes.vobj_projector import (
+    ProjectorNode,
+    create_projector_adjacent_to_filter,
+    estimate_selectivity,
+)
+from vqpy.frontend.query import QueryBase
+from vqpy.frontend.vobj import VObjBase, vobj_property
+
+import pytest
+
+
+class InputNode(AbstractPlanNode):
+    def to_operator(self, lauch_args: dict):
+        raise NotImplementedError
+
+
+class Vehicle(VObjBase):
+
+    def __init__(self) -> None:
+        self.class_name = "car"
+        super().__init__()
+
+    @vobj_property(inputs={"image": 0}, cost=50)
+    def license_plate(self, values):
+        return "ABC123"
+
+    @vobj_property(inputs={"tlbr": 0})
+    def bottom(self, values):
+        return values["tlbr"][3]
+
+    @vobj_property(inputs={"tlbr": 1})
+    def velocity(self, values):
+        return 0
+
+
+class PlateQuery(QueryBase):
+
+    def __init__(self) -> None:
+        self.car = Vehicle()
+
+    def frame_constraint(self):
+        return self.car.license_plate.cmp(lambda x: x.startswith("ABC")) \
+            & (self.car.bottom > 100) & (self.car.score > 0.6)
+
+    def frame_output(self):
+        return self.car.license_plate
+
+
+class VelocityQuery(PlateQuery):
+
+    def frame_constraint(self):
+        return (self.car.velocity > 1) & (self.car.score > 0.6)
+
+
+def get_steps(query, reorder_predicates):
+    node, _ = create_projector_adjacent_to_filter(
+        query, InputNode(), reorder_predicates=reorder_predicates)
+    steps = []
+    while not isinstance(node, InputNode):
+        if isinstance(node, ProjectorNode):
+            steps.append(node.projection_field.field_name)
+        else:
+            assert isinstance(node, VObjFilterNode)
+            steps.append(type(node.predicate).__name__)
+        node = node.prev
+    return steps[::-1]
+
+
+def test_keep_order():
+    assert get_steps(PlateQuery(), reorder_predicates=False) == [
+        "license_plate", "Compare", "bottom", "GreaterThan", "GreaterThan",
+    ]
+
+
+def test_cheap_filters_first():
+    # the score filter needs no projector, and the expensive license plate
+    # is only computed for vobjs passing the other filters
+    assert get_steps(PlateQuery(), reorder_predicates=True) == [
+        "GreaterThan", "bottom", "GreaterThan",
+        "license_plate", "Compare",
+    ]
+
+
+def test_stateful_not_reordered():
+    assert get_steps(VelocityQuery(), reorder_predicates=True) == \
+        get_steps(VelocityQuery(), reorder_predicates=False)
+
+
+def test_selectivity():
+    car = Vehicle()
+    assert estimate_selectivity(car.score > 0.6) == pytest.approx(1 / 3)
+    assert estimate_selectivity(car.score == 1) == pytest.approx(0.1)
+    assert estimate_selectivity(car.score != 1) == pytest.approx(0.9)
+    assert estimate_selectivity(
+        (car.score > 0.6) & (car.score == 1)) == pytest.approx(1 / 30)
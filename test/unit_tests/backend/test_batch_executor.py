@@ -0,0 +1,78 @@
+from vqpy.backend.batch_executor import (
+    BatchExecutor, expand_video_paths, _output_names)
+from vqpy.frontend.vobj import VObjBase
+from vqpy.frontend.query import QueryBase
+import fake_yolox  # noqa: F401
+
+import json
+import os
+import shutil
+
+import pytest
+current_dir = os.path.dirname(os.path.abspath(__file__))
+resource_dir = os.path.join(current_dir, "..", "resources/")
+
+
+def test_expand_video_paths():
+    video_path = os.path.join(resource_dir, "pedestrian_10s.mp4")
+    assert expand_video_paths(video_path) == [video_path]
+    pattern = os.path.join(resource_dir, "*.mp4")
+    assert video_path in expand_video_paths([pattern])
+
+
+def test_output_names():
+    names = _output_names(["a/clip.mp4", "b/clip.mp4", "c/other.avi"],
+                          "ListPerson")
+    assert names == ["clip_0_ListPerson.jsonl", "clip_1_ListPerson.jsonl",
+                     "other_ListPerson.jsonl"]
+
+
+class Person(VObjBase):
+    def __init__(self) -> None:
+        self.class_name = "person"
+        self.object_detector = "fake_yolox"
+        self.detector_kwargs = {"device": "cpu"}
+        super().__init__()
+
+
+class ListPerson(QueryBase):
+    def __init__(self) -> None:
+        self.person = Person()
+
+    def frame_constraint(self):
+        return self.person.score > 0.6
+
+    def frame_output(self):
+        return (self.person.score, self.person.tlbr)
+
+
+@pytest.mark.parametrize("frame_id_range, n_frames", [(None, 240),
+                                                      ((10, 40), 30)])
+def test_batch_executor(tmp_path, frame_id_range, n_frames):
+    video_path = os.path.join(resource_dir, "pedestrian_10s.mp4")
+    video_paths = []
+    for name in ["a.mp4", "b.mp4"]:
+        shutil.copy(video_path, tmp_path / name)
+        video_paths.append(str(tmp_path / name))
+    save_folder = tmp_path / "results"
+
+    # fork, so that the workers have fake_yolox registered
+    executor = BatchExecutor(ListPerson(), str(tmp_path / "*.mp4"),
+                             num_workers=2, mp_context="fork",
+                             frame_id_range=frame_id_range)
+    summary = executor.execute(str(save_folder))
+
+    assert summary["n_videos"] == 2
+    assert summary["n_failed"] == 0
+    assert summary["n_frames"] == 2 * n_frames
+    reports = sorted(summary["videos"], key=lambda r: r["video_path"])
+    for report, video_path, name in zip(reports, video_paths,
+                                        ["a", "b"]):
+        assert report["error"] is None
+        assert report["video_path"] == video_path
+        assert report["n_frames"] == n_frames
+        output_path = save_folder / f"{name}_ListPerson.jsonl"
+        assert report["output_path"] == str(output_path)
+        with open(output_path) as f:
+            results = [json.loads(line) for line in f]
+        assert len(results) == report["n_results"] > 0
@@ -0,0 +1,81 @@
+from vqpy.backend.detection_cache import DetectionCache
+from vqpy.backend.plan_nodes.object_detector import ObjectDetectorNode
+from vqpy.backend.plan_nodes.video_reader import VideoReaderNode
+import fake_yolox  # noqa: F401
+
+import os
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+resource_dir = os.path.join(current_dir, "..", "resources/")
+
+
+def make_outputs(frame_id, n):
+    return [{"tlbr": np.array([frame_id, i, frame_id + 10, i + 10],
+                              dtype=float),
+             "score": 0.5,
+             "class_id": i}
+            for i in range(n)]
+
+
+def test_cache(tmp_path):
+    video_path = tmp_path / "video.mp4"
+    video_path.write_bytes(b"fake video content")
+    cache_dir = (tmp_path / "cache").as_posix()
+
+    cache = DetectionCache(cache_dir, video_path.as_posix(), "yolox")
+    assert cache.get(0) is None
+    for frame_id in [3, 0, 1]:
+        cache.put(frame_id, make_outputs(frame_id, frame_id))
+    cache.flush()
+
+    # a new cache with the same key loads the cached outputs
+    cache = DetectionCache(cache_dir, video_path.as_posix(), "yolox")
+    assert cache.get(0) == []
+    assert cache.get(2) is None
+    outputs = cache.get(3)
+    assert [d["class_id"] for d in outputs] == [0, 1, 2]
+    assert (outputs[1]["tlbr"] == [3, 1, 13, 11]).all()
+    assert outputs[1]["score"] == 0.5
+
+    # new outputs are merged into the cache file
+    cache.put(2, make_outputs(2, 1))
+    cache.put(3, make_outputs(3, 1))
+    cache.flush()
+    cache = DetectionCache(cache_dir, video_path.as_posix(), "yolox")
+    assert len(cache.get(1)) == 1
+    assert len(cache.get(2)) == 1
+    assert len(cache.get(3)) == 1
+
+    # different detector settings do not share the cache
+    cache = DetectionCache(cache_dir, video_path.as_posix(), "yolox",
+                           {"conf_thre": 0.3})
+    assert cache.get(3) is None
+
+    # nor do different decoder settings
+    cache = DetectionCache(cache_dir, video_path.as_posix(), "yolox",
+                           decoder="pyav")
+    assert cache.get(3) is None
+    cache = DetectionCache(cache_dir, video_path.as_posix(), "yolox",
+                           decoder_kwargs={"output_size": (320, 240)})
+    assert cache.get(3) is None
+
+
+def test_cache_key_of_decoder(tmp_path):
+    video_path = os.path.join(resource_dir, "pedestrian_10s.mp4")
+    launch_args = {"video_path": video_path,
+                   "detection_cache_dir": tmp_path.as_posix()}
+
+    def cache_path(**decoder_args):
+        detector_node = ObjectDetectorNode(class_names="person",
+                                           detector_name="fake_yolox")
+        VideoReaderNode().set_next(detector_node)
+        operator = detector_node.to_operator(dict(launch_args,
+                                                  **decoder_args))
+        return operator.cache.path
+
+    default_path = cache_path()
+    assert cache_path(decoder="opencv") == default_path
+    resized_path = cache_path(decoder_kwargs={"output_size": (320, 240)})
+    gray_path = cache_path(decoder_kwargs={"pixel_format": "gray"})
+    assert len({default_path, resized_path, gray_path}) == 3
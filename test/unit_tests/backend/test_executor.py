@@ -0,0 +1,101 @@
+from vqpy.backend.executor import Executor, async_iterate
+from vqpy.backend.operator.prefetcher import Prefetcher
+from vqpy.backend.operator.stream_reader import StreamReader
+
+import asyncio
+import os
+import pytest
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+resource_dir = os.path.join(current_dir, "..", "resources/")
+video_path = os.path.join(resource_dir, "pedestrian_10s.mp4")
+
+
+class CountingIterator:
+    def __init__(self, n_items, fail_at=None):
+        self.n_items = n_items
+        self.fail_at = fail_at
+        self.n_produced = 0
+        self.closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.n_produced == self.n_items:
+            raise StopIteration
+        if self.n_produced == self.fail_at:
+            raise IOError
+        self.n_produced += 1
+        return self.n_produced - 1
+
+    def close(self):
+        self.closed = True
+
+
+def test_async_iterate():
+    async def consume():
+        return [item async for item in async_iterate(CountingIterator(20))]
+
+    assert asyncio.run(consume()) == list(range(20))
+
+
+def test_async_iterate_error():
+    items = []
+
+    async def consume():
+        async for item in async_iterate(CountingIterator(10, fail_at=5)):
+            items.append(item)
+
+    with pytest.raises(IOError):
+        asyncio.run(consume())
+    assert items == [0, 1, 2, 3, 4]
+
+
+def test_async_iterate_cancel():
+    iterator = CountingIterator(1000)
+
+    async def consume():
+        async for item in async_iterate(iterator, max_queue_size=1):
+            if item == 2:
+                # slow consumer
+                await asyncio.sleep(0.5)
+
+    async def cancel():
+        task = asyncio.ensure_future(consume())
+        await asyncio.sleep(0.2)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel())
+    # backpressure: the iterator is never far ahead of the consumer, and it
+    # is closed when the consumer is cancelled
+    assert iterator.n_produced < 10
+    assert iterator.closed
+
+
+class OperatorNode:
+    # a plan node of an existing operator
+    def __init__(self, operator):
+        self.operator = operator
+
+    def to_operator(self, launch_args: dict):
+        return self.operator
+
+
+@pytest.mark.parametrize("drop_policy", ["block", "drop_oldest"])
+@pytest.mark.parametrize("pipelined", [False, True])
+def test_close_stream_reader(drop_policy, pipelined):
+    # a file is read like a live stream, whose grabber keeps decoding
+    reader = StreamReader(video_path, drop_policy=drop_policy,
+                          max_queue_size=1)
+    root_operator = Prefetcher(reader, max_queue_size=1) if pipelined \
+        else reader
+    executor = Executor(OperatorNode(root_operator),
+                        {"video_path": video_path})
+    results = executor.execute()
+    assert next(results).id == 0
+    executor.close()
+    assert not reader._grabber.is_alive()
+    assert not root_operator.has_next()
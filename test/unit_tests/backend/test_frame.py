@@ -0,0 +1,85 @@
+from vqpy.backend.frame import Frame
+from vqpy.common import InvalidProperty
+
+import numpy as np
+
+
+def test_crop_cache():
+    image = np.arange(100 * 80 * 3, dtype=np.uint8).reshape(100, 80, 3)
+    frame = Frame(video_metadata={}, id=0, image=image)
+    tlbr = np.array([10.0, 20.0, 30.0, 60.0])
+
+    crop = frame.crop(tlbr)
+    assert np.shares_memory(crop, image)
+    assert (crop == image[20:61, 10:31]).all()
+    # shared by later callers
+    assert frame.crop(tlbr.copy()) is crop
+
+    resized = frame.crop(tlbr, size=(16, 32))
+    assert resized.shape == (32, 16, 3)
+    assert frame.crop(tlbr, size=(16, 32)) is resized
+
+    assert isinstance(frame.crop([500.0, 500.0, 600.0, 600.0]),
+                      InvalidProperty)
+
+
+def test_get_column():
+    frame = Frame(video_metadata={}, id=0, image=None)
+    frame.vobj_data["person"] = [
+        {"tlbr": np.array([0.0, 1.0, 2.0, 3.0]), "score": 0.9,
+         "color": "red", "track_id": 1},
+        {"tlbr": np.array([4.0, 5.0, 6.0, 7.0]), "score": 0.4,
+         "color": InvalidProperty()},
+        {"tlbr": np.array([8.0, 9.0, 10.0, 11.0]), "score": 0.6,
+         "color": "blue", "track_id": 3},
+    ]
+
+    tlbr, valid = frame.get_column("person", "tlbr")
+    assert tlbr.shape == (3, 4) and valid.all()
+    assert (tlbr[1] == [4.0, 5.0, 6.0, 7.0]).all()
+
+    score, _ = frame.get_column("person", "score", [0, 2])
+    assert (score == [0.9, 0.6]).all()
+
+    # untracked vobjs are invalid
+    track_id, valid = frame.get_column("person", "track_id")
+    assert valid.tolist() == [True, False, True]
+    assert track_id[0] == 1 and np.isnan(track_id[1])
+
+    color, valid = frame.get_column("person", "color")
+    assert color.dtype == object
+    assert valid.tolist() == [True, False, True]
+    assert ((color == "red") & valid).tolist() == [True, False, False]
+
+    values, valid = frame.get_column("car", "score")
+    assert len(values) == 0 and len(valid) == 0
+
+
+def test_copy():
+    frame = Frame(video_metadata={"fps": 30}, id=3, image=None)
+    frame.vobj_data["person"] = [{"score": 0.9}]
+    frame.filtered_vobjs[0]["person"] = [0]
+
+    copy = frame.copy()
+    assert copy.id == 3 and copy.video_metadata == {"fps": 30}
+    copy.vobj_data["person"][0]["speed"] = 1.0
+    copy.vobj_data["car"].append({"score": 0.5})
+    copy.filtered_vobjs[0]["person"] = []
+    assert frame.vobj_data["person"] == [{"score": 0.9}]
+    assert "car" not in frame.vobj_data
+    assert frame.filtered_vobjs[0]["person"] == [0]
+
+
+def test_spatial_index():
+    frame = Frame(video_metadata={}, id=0, image=None)
+    frame.vobj_data["person"] = [
+        {"tlbr": np.array([0.0, 0.0, 10.0, 10.0])},
+        {"tlbr": np.array([100.0, 100.0, 110.0, 110.0])},
+        {"tlbr": np.array([0.0, 10.0, 10.0, 20.0])},
+    ]
+    index = frame.spatial_index["person"]
+    # shared by later callers
+    assert frame.spatial_index["person"] is index
+    neighbors = index.neighbors(frame.vobj_data["person"][0]["tlbr"], 20)
+    assert neighbors == [frame.vobj_data["person"][0],
+                         frame.vobj_data["person"][2]]
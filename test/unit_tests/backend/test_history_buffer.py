@@ -0,0 +1,28 @@
+from vqpy.backend.history_buffer import HistoryBuffer
+
+
+def test_window():
+    buffer = HistoryBuffer(max_hist_len=3)
+    for frame_id in range(10):
+        if frame_id != 7:
+            buffer.append(1, frame_id, {"score": frame_id})
+    assert buffer.get_window(1, "score", 5, 8) == [None, 6, None, 8]
+    assert buffer.get_window(1, "score", 6, 9) == [6, None, 8, 9]
+    assert buffer.get_value(1, 9, "score") == 9
+    # overwritten slot of an old frame
+    assert buffer.get_value(1, 5, "score") is None
+    # unknown track
+    assert buffer.get_window(2, "score", 6, 8) == [None, None, None]
+
+
+def test_evict():
+    buffer = HistoryBuffer(max_hist_len=2)
+    buffer.append(1, 0, {"score": 0.1})
+    buffer.append(2, 0, {"score": 0.2})
+    buffer.append(2, 1, {"score": 0.2})
+    buffer.evict(2)
+    assert 1 in buffer and 2 in buffer
+    buffer.evict(3)
+    assert 1 not in buffer and 2 in buffer
+    buffer.evict(4)
+    assert buffer.empty
@@ -0,0 +1,123 @@
+from vqpy.backend.frame import Frame
+from vqpy.backend.predicate_compiler import compile_predicate
+from vqpy.common import InvalidProperty
+from vqpy.frontend.vobj import VObjBase, vobj_property
+from vqpy.frontend.vobj.predicates import IsInstance
+
+import numpy as np
+import pytest
+
+
+class Person(VObjBase):
+    class_name = "person"
+
+    @vobj_property(inputs={"tlbr": 0})
+    def bottom(self, values):
+        return values["tlbr"][3]
+
+    @vobj_property(inputs={})
+    def color(self, values):
+        return None
+
+
+@pytest.fixture
+def frame():
+    frame = Frame(video_metadata={}, id=0, image=None)
+    frame.vobj_data["person"] = [
+        {"tlbr": np.array([0.0, 0.0, 10.0, 90.0]), "score": 0.9,
+         "track_id": 1, "bottom": 90.0},
+        {"tlbr": np.array([0.0, 0.0, 10.0, 20.0]), "score": 0.3,
+         "bottom": InvalidProperty()},
+        {"tlbr": np.array([0.0, 0.0, 10.0, 60.0]), "score": 0.6,
+         "track_id": 3, "bottom": 60.0},
+        {"tlbr": np.array([0.0, 0.0, 10.0, 95.0]), "score": 0.2,
+         "track_id": 2, "bottom": 95.0},
+    ]
+    return frame
+
+
+def check_same_as_condition_function(predicate, frame):
+    vectorized_func = compile_predicate(predicate)
+    assert vectorized_func is not None
+    mask = vectorized_func(frame.get_columns("person"))
+    condition_func = predicate.generate_condition_function()
+    expected = [bool(condition_func(vobj))
+                for vobj in frame.vobj_data["person"]]
+    assert mask.tolist() == expected
+    return mask.tolist()
+
+
+def test_compare_with_literal(frame):
+    person = Person()
+    assert check_same_as_condition_function(person.score > 0.5, frame) == \
+        [True, False, True, False]
+    assert check_same_as_condition_function(person.score <= 0.3, frame) == \
+        [False, True, False, True]
+    # invalid values are never selected, also under not
+    assert check_same_as_condition_function(person.bottom > 50, frame) == \
+        [True, False, True, True]
+    assert check_same_as_condition_function(person.bottom != 60, frame) == \
+        [True, True, False, True]
+
+
+def test_logical(frame):
+    person = Person()
+    predicate = (person.score > 0.5) & (person.bottom > 70) \
+        | ~(person.score > 0.25)
+    assert check_same_as_condition_function(predicate, frame) == \
+        [True, False, False, True]
+
+
+def test_missing_property(frame):
+    person = Person()
+    mask = compile_predicate(person.track_id > 1)(frame.get_columns("person"))
+    assert mask.tolist() == [False, False, True, True]
+
+
+def test_compare_func(frame):
+    person = Person()
+    called = []
+
+    def is_low(tlbr):
+        called.append(tlbr)
+        return tlbr[3] > 80
+
+    predicate = (person.score > 0.5) & person.tlbr.cmp(is_low)
+    mask = compile_predicate(predicate)(frame.get_columns("person"))
+    assert mask.tolist() == [True, False, False, False]
+    # only evaluated on vobjs selected by the left predicate
+    assert len(called) == 2
+
+    predicate = person.tlbr.cmp(lambda tlbr: tlbr[:, 3] > 80,
+                                vectorized=True)
+    mask = compile_predicate(predicate)(frame.get_columns("person"))
+    assert mask.tolist() == [True, False, False, True]
+
+
+def test_not_compilable():
+    assert compile_predicate(IsInstance(Person())) is None
+
+
+def test_none_values(frame):
+    person = Person()
+    frame.vobj_data["person"][1]["color"] = "red"
+    frame.vobj_data["person"][2]["color"] = None
+    frame.vobj_data["person"][3]["color"] = None
+    frame.vobj_data["person"][0]["color"] = InvalidProperty()
+    # None values are compared as they are, unlike invalid values
+    is_none = person.color == None  # noqa: E711
+    assert check_same_as_condition_function(is_none, frame) == \
+        [False, False, True, True]
+    assert check_same_as_condition_function(~is_none, frame) == \
+        [True, True, False, False]
+    assert check_same_as_condition_function(
+        person.color.cmp(lambda color: color is None), frame) == \
+        [False, False, True, True]
+    frame.vobj_data["person"][0]["color"] = "blue"
+    assert check_same_as_condition_function(
+        person.color.cmp(lambda color: color in ("red", None)), frame) == \
+        [False, True, True, True]
+    # None is never ordered
+    frame.vobj_data["person"][1]["score"] = None
+    mask = compile_predicate(person.score > 0.1)(frame.get_columns("person"))
+    assert mask.tolist() == [True, False, True, True]
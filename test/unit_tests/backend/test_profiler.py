@@ -0,0 +1,83 @@
+from vqpy.backend.operator.base import Operator
+from vqpy.backend.operator.vobj_filter import VObjFilter
+from vqpy.backend.operator.frame_filter import VObjFrameFilter
+from vqpy.backend.frame import Frame
+from vqpy.backend.profiler import Profiler
+
+import json
+import numpy as np
+
+
+class PersonReader(Operator):
+    # frame i has i % 3 persons with scores 0.1, 0.6, ...
+    def __init__(self, n_frames):
+        self.n_frames = n_frames
+        self.frame_id = -1
+        super().__init__(None)
+
+    def has_next(self) -> bool:
+        return self.frame_id + 1 < self.n_frames
+
+    def next(self) -> Frame:
+        self.frame_id += 1
+        frame = Frame(video_metadata={}, id=self.frame_id,
+                      image=np.zeros((4, 4, 3)))
+        for i in range(self.frame_id % 3):
+            frame.vobj_data["person"].append({"score": 0.1 + 0.5 * i})
+        return frame
+
+
+def create_operators():
+    reader = PersonReader(30)
+    class_filter = VObjFilter(reader, condition_func="person")
+    score_filter = VObjFilter(class_filter,
+                              condition_func=lambda v: v["score"] > 0.5)
+    frame_filter = VObjFrameFilter(score_filter)
+    return frame_filter
+
+
+def test_profiler():
+    root = create_operators()
+    profiler = Profiler()
+    profiler.instrument(root)
+    frame_ids = []
+    while root.has_next():
+        frame_ids.append(root.next().id)
+    # frames with 2 persons
+    assert frame_ids == list(range(2, 30, 3))
+
+    stats = profiler.stats()
+    assert [s.name for s in stats] == \
+        ["PersonReader", "VObjFilter", "VObjFilter", "VObjFrameFilter"]
+    reader, class_filter, score_filter, frame_filter = stats
+    assert reader.frames_out == 30
+    assert reader.vobjs_out == 30
+    assert class_filter.frames_in == 30
+    assert class_filter.vobjs_out == 30
+    assert score_filter.vobjs_in == 30
+    assert score_filter.vobjs_out == 10
+    assert frame_filter.frames_in == 30
+    assert frame_filter.frames_out == 10
+    assert frame_filter.to_dict()["frame_selectivity"] == 10 / 30
+    for s in stats:
+        assert 0 <= s.self_time <= s.cumulative_time
+    assert frame_filter.cumulative_time <= profiler.elapsed_time
+    assert frame_filter.cumulative_time >= \
+        sum(s.self_time for s in stats) - 1e-6
+
+
+def test_export():
+    root = create_operators()
+    profiler = Profiler(trace_memory=True)
+    profiler.instrument(root)
+    while root.has_next():
+        root.next()
+
+    profile = json.loads(profiler.to_json())
+    assert len(profile["operators"]) == 4
+    assert profile["operators"][0]["peak_memory"] > 0
+
+    text = profiler.to_prometheus()
+    assert "# TYPE vqpy_operator_self_seconds_total counter" in text
+    assert 'vqpy_operator_frames_out_total{operator="VObjFrameFilter",' \
+        'index="0"} 10' in text
@@ -0,0 +1,119 @@
+from vqpy.backend.result_sink import (
+    JsonSink,
+    create_result_sink,
+    flatten_result,
+)
+
+import json
+import numpy as np
+import pytest
+
+
+def create_results(n_frames):
+    # frame i has i % 3 persons, and a car on even frames
+    results = []
+    for frame_id in range(n_frames):
+        persons = [{"track_id": i, "tlbr": np.array([i, i, i + 10, i + 20.]),
+                    "score": np.float32(0.5)}
+                   for i in range(frame_id % 3)]
+        cars = [{"track_id": 100, "tlbr": np.array([0, 0, 5, 5.]),
+                 "score": np.float32(0.9)}] if frame_id % 2 == 0 else []
+        results.append({"frame_id": frame_id, "person": persons,
+                        "car": cars})
+    return results
+
+
+def test_flatten_result():
+    result = create_results(3)[2]
+    rows = flatten_result(result)
+    assert [(row["frame_id"], row["vobj_name"], row["track_id"])
+            for row in rows] == [(2, "person", 0), (2, "person", 1),
+                                 (2, "car", 100)]
+    assert flatten_result(create_results(4)[3]) == \
+        [{"frame_id": 3, "vobj_name": None}]
+
+
+def test_json_sink(tmp_path):
+    results = create_results(5)
+    with create_result_sink(str(tmp_path / "result"), "json") as sink:
+        assert isinstance(sink, JsonSink)
+        for result in results:
+            sink.write(result)
+    with open(tmp_path / "result.json") as f:
+        lines = [json.loads(line) for line in f]
+    assert len(lines) == 5
+    assert lines[4]["car"][0]["tlbr"] == [0, 0, 5, 5]
+
+
+def test_unknown_format(tmp_path):
+    with pytest.raises(ValueError):
+        create_result_sink(str(tmp_path / "result"), "xml")
+
+
+@pytest.mark.parametrize("result_format", ["arrow", "parquet"])
+def test_columnar_sink(tmp_path, result_format):
+    pa = pytest.importorskip("pyarrow")
+    results = create_results(30)
+    path = str(tmp_path / "result")
+    with create_result_sink(path, result_format, row_group_size=8) as sink:
+        # the first frames have no vobjs
+        sink.write({"frame_id": -1, "person": [], "car": []})
+        for result in results:
+            sink.write(result)
+
+    if result_format == "arrow":
+        with pa.ipc.open_file(path + ".arrow") as reader:
+            assert reader.num_record_batches > 1
+            table = reader.read_all()
+    else:
+        pq = pytest.importorskip("pyarrow.parquet")
+        assert pq.ParquetFile(path + ".parquet").num_row_groups > 1
+        table = pq.read_table(path + ".parquet")
+    n_vobjs = sum(len(r["person"]) + len(r["car"]) for r in results)
+    n_empty = sum(1 for r in results if not r["person"] and not r["car"])
+    assert table.num_rows == n_vobjs + n_empty + 1
+    # parquet has no fixed size lists
+    list_size = 4 if result_format == "arrow" else -1
+    assert table.schema.field("tlbr").type == \
+        pa.list_(pa.float64(), list_size)
+    rows = table.to_pylist()
+    assert rows[0] == {"frame_id": -1, "vobj_name": None, "track_id": None,
+                       "tlbr": None, "score": None}
+    person = [row for row in rows if row["vobj_name"] == "person"][-1]
+    assert person["frame_id"] == 29
+    assert person["tlbr"] == [1, 1, 11, 21]
+    assert person["score"] == pytest.approx(0.5)
+
+
+def read_table(path, result_format):
+    pa = pytest.importorskip("pyarrow")
+    if result_format == "arrow":
+        with pa.ipc.open_file(path) as reader:
+            return reader.read_all()
+    pq = pytest.importorskip("pyarrow.parquet")
+    return pq.read_table(path)
+
+
+@pytest.mark.parametrize("result_format", ["arrow", "parquet"])
+def test_new_property(tmp_path, result_format):
+    pytest.importorskip("pyarrow")
+    path = str(tmp_path / "result")
+    tlbr = np.array([0, 0, 5, 5.])
+    with create_result_sink(path, result_format, row_group_size=2) as sink:
+        # tlbr has no value and speed is missing in the first batch
+        sink.write({"frame_id": 0, "person": [{"score": 0.5, "tlbr": None}]})
+        sink.write({"frame_id": 1, "person": [{"score": 0.6, "tlbr": None}]})
+        sink.write({"frame_id": 2, "person": [{"score": 0.7, "tlbr": tlbr,
+                                               "speed": 1.0}]})
+        sink.write({"frame_id": 3, "person": [{"score": 0.8, "tlbr": None}]})
+        sink.write({"frame_id": 4, "person": [{"speed": 2.0}]})
+
+    table = read_table(f"{path}.{result_format}", result_format)
+    assert table.column_names == ["frame_id", "vobj_name", "score", "tlbr",
+                                  "speed"]
+    rows = table.to_pylist()
+    assert [row["frame_id"] for row in rows] == [0, 1, 2, 3, 4]
+    assert [row["score"] for row in rows] == [0.5, 0.6, 0.7, 0.8, None]
+    assert [row["tlbr"] for row in rows] == \
+        [None, None, [0, 0, 5, 5], None, None]
+    assert [row["speed"] for row in rows] == [None, None, 1.0, None, 2.0]
@@ -0,0 +1,51 @@
+from vqpy.operator.tracker.byte_tracker import ByteTracker
+from vqpy.operator.tracker.array_byte_tracker import ArrayByteTracker
+from vqpy.operator.tracker.base_track import BaseTrack
+
+import copy
+import numpy as np
+import pytest
+
+
+def crowded_scene(seed, n_objects=200, n_frames=60):
+    rng = np.random.default_rng(seed)
+    centers = rng.uniform(0, 1800, (n_objects, 2))
+    velocities = rng.normal(0, 3, (n_objects, 2))
+    sizes = rng.uniform(20, 80, (n_objects, 2))
+    frames = []
+    for _ in range(n_frames):
+        centers += velocities
+        detections = []
+        for center, size in zip(centers, sizes):
+            # missed detections
+            if rng.random() < 0.1:
+                continue
+            center = center + rng.normal(0, 1.5, 2)
+            detections.append({
+                "tlbr": np.r_[center - size / 2, center + size / 2],
+                "score": float(rng.uniform(0.05, 1.0)),
+            })
+        for index, detection in enumerate(detections):
+            detection["index"] = index
+        frames.append(detections)
+    return frames
+
+
+def run_tracker(tracker_type, frames):
+    BaseTrack.reset()
+    tracker = tracker_type(fps=30)
+    results = []
+    for frame_id, detections in enumerate(frames):
+        tracked, lost = tracker.update(frame_id, copy.deepcopy(detections))
+        results.append(
+            ([(d["index"], d["track_id"]) for d in tracked],
+             [(d["index"], d["track_id"]) for d in lost])
+        )
+    return results
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_same_outputs_as_byte_tracker(seed):
+    frames = crowded_scene(seed)
+    expected = run_tracker(ByteTracker, frames)
+    assert run_tracker(ArrayByteTracker, frames) == expected
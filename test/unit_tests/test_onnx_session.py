@@ -0,0 +1,61 @@
+from vqpy.operator.detector.models.onnx import (
+    OnnxSessionManager,
+    onnx_inference,
+)
+import numpy as np
+import pytest
+import os
+
+onnx = pytest.importorskip("onnx")
+pytest.importorskip("onnxruntime")
+
+
+@pytest.fixture
+def model_path(tmp_path):
+    from onnx import helper, TensorProto
+    x = helper.make_tensor_value_info("x", TensorProto.FLOAT, [1, 3])
+    y = helper.make_tensor_value_info("y", TensorProto.FLOAT, [1, 3])
+    node = helper.make_node("Relu", ["x"], ["y"])
+    graph = helper.make_graph([node], "relu", [x], [y])
+    model = helper.make_model(
+        graph, opset_imports=[helper.make_opsetid("", 13)])
+    model.ir_version = 8
+    path = os.path.join(tmp_path, "relu.onnx")
+    onnx.save(model, path)
+    return path
+
+
+def test_session_reused(model_path):
+    manager = OnnxSessionManager()
+    session = manager.get_session(model_path, intra_op_num_threads=1,
+                                  providers=["CPUExecutionProvider"])
+    assert session is manager.get_session(
+        model_path, intra_op_num_threads=1,
+        providers=["CPUExecutionProvider"])
+
+    img_data = np.array([[-1.0, 0.0, 2.0]], dtype=np.float32)
+    outputs = onnx_inference(img_data, session)
+    assert np.allclose(outputs[0], [[0.0, 0.0, 2.0]])
+
+
+def test_optimized_model_cache(model_path, tmp_path):
+    optimized_model_path = os.path.join(tmp_path, "relu.opt.onnx")
+    OnnxSessionManager().get_session(
+        model_path, graph_optimization_level="basic",
+        optimized_model_path=optimized_model_path,
+        providers=["CPUExecutionProvider"])
+    assert os.path.isfile(optimized_model_path)
+
+    # a new manager loads the cached optimized model
+    session = OnnxSessionManager().get_session(
+        model_path, optimized_model_path=optimized_model_path,
+        providers=["CPUExecutionProvider"])
+    img_data = np.array([[-1.0, 0.0, 2.0]], dtype=np.float32)
+    assert np.allclose(onnx_inference(img_data, session)[0],
+                       [[0.0, 0.0, 2.0]])
+
+
+def test_invalid_optimization_level(model_path):
+    with pytest.raises(ValueError):
+        OnnxSessionManager().get_session(model_path,
+                                         graph_optimization_level="max")
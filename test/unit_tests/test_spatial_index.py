@@ -0,0 +1,106 @@
+from vqpy.query.utils.within_region import within_regions
+from vqpy.utils.spatial_index import (
+    FrameSpatialIndex,
+    RegionIndex,
+    SpatialIndex,
+)
+
+import numpy as np
+import pytest
+
+REGION = [(100, 100), (300, 100), (300, 200), (100, 200)]
+TRIANGLE = [(200, 150), (400, 150), (400, 400)]
+
+
+@pytest.fixture
+def tlbrs():
+    return [
+        np.array([0.0, 0.0, 10.0, 10.0]),      # center (5, 5)
+        np.array([10.0, 0.0, 20.0, 10.0]),     # center (15, 5)
+        None,
+        np.array([100.0, 100.0, 110.0, 110.0]),  # center (105, 105)
+        np.array([0.0, 20.0, 10.0, 30.0]),     # center (5, 25)
+    ]
+
+
+def brute_force_neighbors(tlbrs, point, radius):
+    neighbors = []
+    for i, tlbr in enumerate(tlbrs):
+        if tlbr is None:
+            continue
+        center = (tlbr[:2] + tlbr[2:]) / 2
+        distance = np.linalg.norm(center - point)
+        if distance <= radius:
+            neighbors.append((distance, i))
+    return [i for _, i in sorted(neighbors)]
+
+
+def test_neighbors(tlbrs):
+    index = SpatialIndex(tlbrs)
+    assert len(index) == 4
+    # sorted by distance, including the box itself
+    assert index.neighbors(tlbrs[0], 15) == [0, 1]
+    assert index.neighbors(tlbrs[0], 25) == [0, 1, 4]
+    assert index.neighbors((105, 105), 1) == [3]
+    assert index.neighbors((500, 500), 10) == []
+
+    rng = np.random.default_rng(0)
+    random_tlbrs = list(rng.uniform(0, 500, size=(200, 4)))
+    random_index = SpatialIndex(random_tlbrs)
+    for point in rng.uniform(0, 500, size=(20, 2)):
+        assert random_index.neighbors(point, 60) == \
+            brute_force_neighbors(random_tlbrs, point, 60)
+
+
+def test_nearest_and_pairs(tlbrs):
+    items = ["a", "b", "c", "d", "e"]
+    index = SpatialIndex(tlbrs, items)
+    assert index.nearest((6, 5)) == [("a", 1.0)]
+    assert [item for item, _ in index.nearest((6, 5), k=3)] == \
+        ["a", "b", "e"]
+    assert index.nearest((6, 5), k=10, max_distance=15) == \
+        [("a", 1.0), ("b", 9.0)]
+    # indexes of the indexed boxes, without the None box
+    assert index.pairs(20) == {(0, 1), (0, 3)}
+
+    with pytest.raises(ValueError):
+        SpatialIndex(tlbrs, items[:2])
+    with pytest.raises(ValueError):
+        index.neighbors([1.0, 2.0, 3.0], 10)
+
+
+def test_empty_index():
+    index = SpatialIndex([None])
+    assert len(index) == 0
+    assert index.neighbors((0, 0), 100) == []
+    assert index.nearest((0, 0)) == []
+    assert index.pairs(100) == set()
+
+
+def test_frame_spatial_index(tlbrs):
+    vobj_data = {
+        "person": [{"tlbr": tlbr, "track_id": i}
+                   for i, tlbr in enumerate(tlbrs)],
+    }
+    frame_index = FrameSpatialIndex(vobj_data)
+    neighbors = frame_index["person"].neighbors(tlbrs[0], 15)
+    assert [vobj["track_id"] for vobj in neighbors] == [0, 1]
+    assert neighbors[0] is vobj_data["person"][0]
+    # built once per class
+    assert frame_index["person"] is frame_index["person"]
+    assert len(frame_index["car"]) == 0
+
+
+def test_region_index():
+    pytest.importorskip("shapely")
+    index = RegionIndex([REGION, TRIANGLE])
+    assert index.bounds == (100, 100, 400, 400)
+    points = [(150, 150), (350, 200), (350, 390), (50, 50), (500, 150)]
+    assert index.contains_points(points).tolist() == \
+        [True, True, False, False, False]
+    assert index.contains((390, 380))
+    assert not index.contains((0, 0))
+
+    point_within_regions = within_regions([REGION, TRIANGLE])
+    assert [point_within_regions(point) for point in points] == \
+        [True, True, False, False, False]
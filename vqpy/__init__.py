@@ -1,6 +1,7 @@
+import contextlib
 import json
 import os
-from typing import List, Dict
+from typing import Callable, List, Dict, Optional, Tuple, Union
 
 from loguru import logger
 from tqdm import tqdm
@@ -96,11 +97,36 @@ def init(
     additional_frame_fields: List[str] = None,
     output_per_frame_results: bool = False,
     verbose: bool = True,
+    pipelined: bool = False,
+    pipeline_queue_size: int = 8,
+    sample_stride: int = 1,
+    sample_fps: float = None,
+    max_sample_stride: int = None,
+    frame_id_range: Tuple[int, int] = None,
+    headless: bool = None,
+    interrupt_hook: Union[Callable[[], bool], str] = None,
+    detection_cache_dir: str = None,
+    reorder_predicates: bool = True,
+    crop_detection_roi: bool = True,
+    stream_drop_policy: str = "drop_oldest",
+    stream_max_reconnect_attempts: int = None,
+    decoder: str = "opencv",
+    decoder_kwargs: dict = None,
+    profile: bool = False,
+    profile_memory: bool = False,
 ):
     """
     Args:
-        query_obj: the query object to apply.
-        video_path: the path of the video to query on.
+        query_obj: the query object to apply, or a list of query objects to
+            apply in one pass over the video. Queries in a list share video
+            decoding, object detection (for the union of their classes) and
+            tracking, and the returned MultiQueryExecutor yields
+            (query_name, result) pairs, see MultiQueryExecutor.streams for
+            one result stream per query.
+        video_path: the path of the video to query on, or the url of a
+            live stream, e.g. "rtsp://...". Live streams are read by a
+            grabber thread and run until the stream ends or the query is
+            interrupted.
         custom_video_reader: the custom video reader to use. If not None, will
             ignore video_path. Default: None. Note that fps must be provided
             if custom_video_reader is not None.
@@ -111,8 +137,77 @@ def init(
             frames without objects that meet the query constraints will have
             results as an empty list.
         verbose: whether to print the progress. Default: True.
+        pipelined: whether to run video decoding, object detection and
+            tracking on separate threads, connected by bounded queues.
+            Frames still go through every operator in order. Default: False.
+        pipeline_queue_size: the maximum number of frames buffered between
+            two pipelined stages. Default: 8.
+        sample_stride: only run the query on every {sample_stride}th frame.
+            Default: 1.
+        sample_fps: the frame rate to run the query at. If not None, the
+            stride is derived from the fps of the video and sample_stride is
+            ignored. Default: None.
+        max_sample_stride: if not None, adapt the stride between the stride
+            above and max_sample_stride, sampling densely after frames with
+            objects that meet the query constraints and sparsely otherwise.
+            Default: None.
+        frame_id_range: if not None, only query frames with ids in
+            range(*frame_id_range). The video reader seeks to the start
+            frame instead of decoding the frames before it. Default: None.
+        headless: whether the video reader never touches HighGUI. Default:
+            None, which is headless when there is no display.
+        interrupt_hook: a callable polled by the video reader on every
+            frame, the query is interrupted when it returns True. Use
+            "highgui" to interrupt on 'q' or ESC key presses in a HighGUI
+            window, checked with cv2.waitKey unless headless. Default: None,
+            which never interrupts the query.
+        detection_cache_dir: the folder to cache detection outputs in. If
+            not None, detection outputs are saved per video and detector
+            setting, and frames with cached outputs skip detection when the
+            query runs on the same video again. Default: None.
+        reorder_predicates: whether to reorder the conjunctive predicates of
+            frame_constraint by the estimated cost and selectivity, so that
+            expensive properties are only computed for the vobjs passing
+            the cheap filters. Costs can be declared with
+            vobj_property(cost=...). Default: True.
+        crop_detection_roi: whether to only run object detection on the
+            bounding box of the regions of tlbr.within_regions predicates
+            in the conjunction of frame_constraint, expanded by the
+            detector_roi_margin attribute of the vobj (100 pixels by
+            default). Objects with the anchor in the regions but the box
+            beyond the margin get clipped boxes. Default: True.
+        stream_drop_policy: what to do when a live stream is read faster
+            than it is queried: "drop_oldest" drops the oldest buffered
+            frame, "latest" only keeps the newest frame, and "block" stops
+            reading until the query catches up. Frame ids of live streams
+            keep counting dropped frames. Default: "drop_oldest".
+        stream_max_reconnect_attempts: the maximum number of reconnects in
+            a row to a live stream before it is considered ended. Default:
+            None, which reconnects forever.
+        decoder: the video decoder of video files, "opencv" or "pyav".
+            Default: "opencv".
+        decoder_kwargs: keyword arguments of the decoder. output_size
+            (width, height) decodes frames to a smaller size, which saves
+            memory bandwidth on high resolution videos, and pixel_format is
+            one of "bgr24", "rgb24" and "gray". The pyav decoder also
+            accepts thread_type (default: "AUTO") and keyframes_only.
+            Default: None.
+        profile: whether to record the time, calls, and frames and vobjs in
+            and out of every operator, see vqpy.backend.profiler. The stats
+            are printed with the plan by vqpy.run, and are available as
+            executor.profiler. Default: False.
+        profile_memory: whether to also record the peak memory of every
+            operator with tracemalloc, which slows down the query. Implies
+            profile. Default: False.
+        Note that with sampling, history dependencies of stateful properties
+        refer to the last sampled frames. Use the frame_id property to get
+        the frame gaps.
     """
-    from vqpy.backend import Planner, Executor
+    from vqpy.backend import Planner, Executor, MultiQueryExecutor
+    from vqpy.backend.executor import get_query_names
+    from vqpy.backend.operator.stream_reader import is_stream_url
+    from vqpy.backend.plan_nodes.fan_out import find_branch_node
+    from vqpy.backend.profiler import Profiler
 
     # input check
     if custom_video_reader is None:
@@ -120,7 +215,7 @@ def init(
             raise ValueError(
                 "video_path must be provided if custom_video_reader is None"
             )
-        if not os.path.exists(video_path):
+        if not is_stream_url(video_path) and not os.path.exists(video_path):
             raise ValueError(f"video_path {video_path} does not exist")
     else:
         if not isinstance(custom_video_reader, CustomizedVideoReader):
@@ -131,55 +226,173 @@ def init(
             )
 
     planner = Planner()
+    multi_query = isinstance(query_obj, (list, tuple))
+    query_names = get_query_names(query_obj) if multi_query \
+        else [query_obj.__class__.__name__]
     launch_args = {
         "video_path": video_path,
-        "query_name": query_obj.__class__.__name__,
+        "query_name": "_".join(query_names),
+        "headless": headless,
+        "interrupt_hook": interrupt_hook,
+        "detection_cache_dir": detection_cache_dir,
+        "stream_drop_policy": stream_drop_policy,
+        "stream_max_reconnect_attempts": stream_max_reconnect_attempts,
+        "decoder": decoder,
+        "decoder_kwargs": decoder_kwargs,
     }
-    root_plan_node = planner.parse(
-        query_obj,
+    plan_kwargs = dict(
         custom_video_reader=custom_video_reader,
         additional_frame_fields=additional_frame_fields,
         output_per_frame_results=output_per_frame_results,
+        pipelined=pipelined,
+        pipeline_queue_size=pipeline_queue_size,
+        sample_stride=sample_stride,
+        sample_fps=sample_fps,
+        max_sample_stride=max_sample_stride,
+        frame_id_range=frame_id_range,
+        reorder_predicates=reorder_predicates,
+        crop_detection_roi=crop_detection_roi,
     )
+    profiler = Profiler(trace_memory=profile_memory) \
+        if profile or profile_memory else None
+    if multi_query:
+        root_plan_nodes = planner.parse_queries(list(query_obj),
+                                                **plan_kwargs)
+        if verbose:
+            for i, root_plan_node in enumerate(root_plan_nodes):
+                print(f"Plan of {query_names[i]}:")
+                # the shared part is printed once
+                planner.print_plan(
+                    root_plan_node,
+                    until=None if i == 0 else find_branch_node(root_plan_node)
+                )
+        return MultiQueryExecutor(
+            root_plan_nodes, query_names, launch_args,
+            custom_video_reader=custom_video_reader, profiler=profiler
+        )
+    root_plan_node = planner.parse(query_obj, **plan_kwargs)
     if verbose:
         planner.print_plan(root_plan_node)
     executor = Executor(
-        root_plan_node, launch_args, custom_video_reader=custom_video_reader
+        root_plan_node, launch_args, custom_video_reader=custom_video_reader,
+        profiler=profiler
     )
     return executor
 
 
+def _run_queries(executor, save_folder: str, print_results: bool,
+                 result_format: str, result_sink_kwargs: dict):
+    # results of each query of a MultiQueryExecutor go to their own file
+    from vqpy.backend.result_sink import create_result_sink
+
+    result = executor.execute()
+    if save_folder:
+        os.makedirs(save_folder, exist_ok=True)
+        time = datetime.now().strftime("%Y%m%d_%H%M%S")
+        with contextlib.ExitStack() as stack:
+            sinks = dict()
+            for query_name in executor.query_names:
+                sinks[query_name] = stack.enter_context(create_result_sink(
+                    os.path.join(save_folder, f"{query_name}_{time}"),
+                    result_format, **result_sink_kwargs))
+                print(f"Saving result of {query_name} to "
+                      f"{sinks[query_name].path}")
+            for query_name, res in result:
+                sinks[query_name].write(res)
+                if print_results:
+                    print(query_name, res)
+        print(f"Done! Results saved to {save_folder}")
+    elif print_results:
+        for query_name, res in result:
+            print(query_name, res)
+    return result
+
+
+def _report_profile(executor, save_folder: str):
+    # print the stats of the operators with the plan, and save them
+    from vqpy.backend import Planner, MultiQueryExecutor
+    from vqpy.backend.plan_nodes.fan_out import find_branch_node
+
+    profiler = getattr(executor, "profiler", None)
+    if profiler is None or profiler.start_time is None:
+        return
+    planner = Planner()
+    print(f"Profile of the plan ({profiler.elapsed_time:.2f}s):")
+    if isinstance(executor, MultiQueryExecutor):
+        for i, root_plan_node in enumerate(executor.root_plan_nodes):
+            planner.print_plan(
+                root_plan_node,
+                until=None if i == 0 else find_branch_node(root_plan_node),
+                profiler=profiler,
+            )
+    else:
+        planner.print_plan(executor.root_plan_node, profiler=profiler)
+    if save_folder:
+        time = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = executor.launch_args["query_name"] + "_" + time + \
+            "_profile.json"
+        save_path = os.path.join(save_folder, filename)
+        profiler.to_json(save_path)
+        print(f"Profile saved to {save_path}")
+
+
 def run(
     executor,
     save_folder: str = None,
     print_results: bool = True,
+    result_format: str = "json",
+    result_sink_kwargs: dict = None,
 ):
     """
     Args:
         executor: the executor to run the query.
         save_folder: the folder to save query result.
             If None, will print to stdout. Default: None.
-            If not None, will save to json file with the name of
-            {query_name}.json in the save_folder.
+            If not None, will save to a file with the name of
+            {query_name}_{time} in the save_folder, with the extension of
+            result_format. Results of the queries of a MultiQueryExecutor
+            are saved to one file per query.
+            The profile of executors created with profile=True is saved
+            to {query_name}_{time}_profile.json.
         print_result: whether to print the result. Default: True.
+        result_format: the format of the saved results, see
+            vqpy.backend.result_sink. "json" saves one json line per frame,
+            while "arrow" (Arrow IPC) and "parquet" save one row per output
+            vobj with a column per property, written in batches, which is
+            much faster and smaller on dense scenes. The columnar formats
+            require pyarrow. Default: "json".
+        result_sink_kwargs: keyword arguments of the result sink, e.g.
+            row_group_size of "arrow" and "parquet", and compression of
+            "parquet". Default: None.
     """
+    from vqpy.backend import MultiQueryExecutor
+    from vqpy.backend.result_sink import create_result_sink, get_sink_type
+
+    # fail before running the query
+    get_sink_type(result_format)
+    result_sink_kwargs = result_sink_kwargs or dict()
+    if isinstance(executor, MultiQueryExecutor):
+        result = _run_queries(executor, save_folder, print_results,
+                              result_format, result_sink_kwargs)
+        _report_profile(executor, save_folder)
+        return result
 
     result = executor.execute()
     if save_folder:
         os.makedirs(save_folder, exist_ok=True)
         time = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = executor.launch_args["query_name"] + "_" + time + ".json"
-        save_path = os.path.join(save_folder, filename)
-        print(f"Saving result to {save_path}")
+        filename = executor.launch_args["query_name"] + "_" + time
+        sink = create_result_sink(os.path.join(save_folder, filename),
+                                  result_format, **result_sink_kwargs)
+        print(f"Saving result to {sink.path}")
         import time
 
         start_time = time.time()
         iteration_time = []
         i = 0
-        with open(save_path, "w") as f:
+        with sink:
             for res in result:
-                json.dump(res, f, cls=utils.NumpyEncoder)
-                f.write("\n")
+                sink.write(res)
                 if print_results:
                     print(res)
                 i += 1
@@ -191,8 +404,50 @@ def run(
             "Average iteration time:"
             f" {sum(iteration_time) / len(iteration_time)}"
         )
-        print(f"Done! Result saved to {save_path}")
+        print(f"Done! Result saved to {sink.path}")
     elif print_results:
         for res in result:
             print(res)
+    _report_profile(executor, save_folder)
     return result
+
+
+def run_batch(
+    query_obj,
+    videos: Union[str, List[str]],
+    save_folder: str,
+    num_workers: Optional[int] = None,
+    mp_context: Optional[str] = None,
+    **init_kwargs,
+):
+    """
+    Run the query on many videos with a pool of worker processes, e.g. for
+    reprocessing archived videos. Each worker loads the detector model once
+    and runs its videos one by one.
+    Args:
+        query_obj: the query object to apply.
+        videos: a glob pattern, or a list of paths or glob patterns of the
+            videos to query on.
+        save_folder: the folder to save query results. The results of each
+            video are saved to {video_name}_{query_name}.jsonl.
+        num_workers: the number of worker processes. Default: None, which is
+            the number of videos capped by the number of CPUs.
+        mp_context: the multiprocessing start method. Default: None, which
+            uses the platform default. Use "spawn" if the detector runs on
+            CUDA.
+        init_kwargs: other keyword arguments of vqpy.init, except
+            video_path and custom_video_reader.
+    Returns:
+        A summary with per-video reports and the aggregate throughput
+        (n_videos, n_failed, n_frames, elapsed_time and fps).
+    """
+    from vqpy.backend import BatchExecutor
+
+    batch_executor = BatchExecutor(
+        query_obj,
+        videos,
+        num_workers=num_workers,
+        mp_context=mp_context,
+        **init_kwargs,
+    )
+    return batch_executor.execute(save_folder)
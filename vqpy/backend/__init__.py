@@ -1,4 +1,5 @@
-from .executor import Executor
+from .executor import Executor, MultiQueryExecutor
+from .batch_executor import BatchExecutor
 from .planner import Planner
 
-__all__ = ["Planner", "Executor"]
+__all__ = ["Planner", "Executor", "MultiQueryExecutor", "BatchExecutor"]
@@ -0,0 +1,192 @@
+import glob
+import json
+import multiprocessing
+import os
+import time
+import traceback
+from typing import Dict, List, Optional, Union
+
+from loguru import logger
+
+from vqpy.utils import NumpyEncoder
+
+
+def expand_video_paths(videos: Union[str, List[str]]) -> List[str]:
+    """Expand a glob pattern or a list of paths (and patterns) of videos."""
+    if isinstance(videos, str):
+        videos = [videos]
+    video_paths = []
+    for video in videos:
+        if glob.has_magic(video):
+            video_paths.extend(sorted(glob.glob(video, recursive=True)))
+        else:
+            video_paths.append(video)
+    return video_paths
+
+
+def _output_names(video_paths: List[str], query_name: str) -> List[str]:
+    stems = [os.path.splitext(os.path.basename(p))[0] for p in video_paths]
+    names = []
+    for i, stem in enumerate(stems):
+        # videos in different folders may have the same file name
+        if stems.count(stem) > 1:
+            stem = f"{stem}_{i}"
+        names.append(f"{stem}_{query_name}.jsonl")
+    return names
+
+
+def _init_worker():
+    from vqpy.backend.operator.object_detector import enable_detector_cache
+
+    # load the detector model once per worker
+    enable_detector_cache()
+
+
+class _FrameCounter:
+    def __init__(self, executor):
+        """
+        Count the frames read by the input operator of the plan of the
+        executor, i.e. the frames of the video in frame_id_range, including
+        the frames skipped by sampling. The count is kept when the query
+        fails partway.
+        """
+        root_operators = getattr(executor, "root_operators", None) \
+            or [executor.root_operator]
+        operator = root_operators[0]
+        while getattr(operator, "prev", None) is not None:
+            operator = operator.prev
+        self.n_frames = 0
+        read_next = operator.next
+
+        def next():
+            frame = read_next()
+            self.n_frames += 1
+            return frame
+
+        operator.next = next
+
+
+def _run_video(task):
+    """Run the query on one video and stream the results to a json lines
+    file. Runs in a worker process."""
+    from vqpy import init
+
+    query_obj, video_path, output_path, init_kwargs = task
+    start_time = time.time()
+    n_results = 0
+    counter = None
+    try:
+        executor = init(query_obj, video_path=video_path, verbose=False,
+                        **init_kwargs)
+        counter = _FrameCounter(executor)
+        with open(output_path, "w") as f:
+            for res in executor.execute():
+                json.dump(res, f, cls=NumpyEncoder)
+                f.write("\n")
+                n_results += 1
+        error = None
+    except Exception:
+        error = traceback.format_exc()
+    return dict(
+        video_path=video_path,
+        output_path=output_path,
+        n_frames=counter.n_frames if counter is not None else 0,
+        n_results=n_results,
+        elapsed_time=time.time() - start_time,
+        error=error,
+    )
+
+
+class BatchExecutor:
+    def __init__(
+        self,
+        query_obj,
+        videos: Union[str, List[str]],
+        num_workers: Optional[int] = None,
+        mp_context: Optional[str] = None,
+        **init_kwargs,
+    ):
+        """
+        Run one query on many videos with a pool of worker processes.
+        Each worker runs its videos one by one. Detectors are shared within
+        a worker process, so a worker loads the detector model only once.
+        :param query_obj: the query object to apply. It is pickled to the
+            workers, so its class must be importable by them with the
+            "spawn" start method.
+        :param videos: a glob pattern, or a list of paths or glob patterns
+            of the videos.
+        :param num_workers: the number of worker processes. Defaults to the
+            number of videos, capped by the number of CPUs.
+        :param mp_context: the multiprocessing start method, e.g. "spawn",
+            which is required when the detector runs on CUDA. Defaults to
+            None, which uses the default start method of the platform.
+        :param init_kwargs: other keyword arguments of vqpy.init, e.g.
+            output_per_frame_results.
+        """
+        self.query_obj = query_obj
+        self.video_paths = expand_video_paths(videos)
+        if not self.video_paths:
+            raise ValueError(f"No video found with {videos}")
+        for video_path in self.video_paths:
+            if not os.path.exists(video_path):
+                raise ValueError(f"video_path {video_path} does not exist")
+        if num_workers is None:
+            num_workers = min(len(self.video_paths), os.cpu_count() or 1)
+        if num_workers < 1:
+            raise ValueError(f"Invalid num_workers: {num_workers}, which "
+                             f"should be a positive integer.")
+        self.num_workers = num_workers
+        self.mp_context = mp_context
+        self.init_kwargs = init_kwargs
+
+    def execute(self, save_folder: str) -> Dict:
+        """
+        Run the query on all videos. The results of each video are saved to
+        {video_name}_{query_name}.jsonl in save_folder, one frame result per
+        line. A video that fails does not stop the others.
+        Returns a summary with the per-video reports and the aggregate
+        throughput.
+        """
+        os.makedirs(save_folder, exist_ok=True)
+        query_name = self.query_obj.__class__.__name__
+        output_paths = [
+            os.path.join(save_folder, name)
+            for name in _output_names(self.video_paths, query_name)
+        ]
+        tasks = [
+            (self.query_obj, video_path, output_path, self.init_kwargs)
+            for video_path, output_path in zip(self.video_paths, output_paths)
+        ]
+
+        start_time = time.time()
+        reports = []
+        ctx = multiprocessing.get_context(self.mp_context)
+        with ctx.Pool(processes=self.num_workers,
+                      initializer=_init_worker) as pool:
+            # videos are long, so hand them out one at a time
+            for report in pool.imap_unordered(_run_video, tasks, chunksize=1):
+                if report["error"] is not None:
+                    logger.error(f"Failed to run {query_name} on "
+                                 f"{report['video_path']}:\n"
+                                 f"{report['error']}")
+                else:
+                    logger.info(f"Done {report['video_path']} "
+                                f"({len(reports) + 1}/{len(tasks)}), "
+                                f"results saved to {report['output_path']}")
+                reports.append(report)
+        elapsed_time = time.time() - start_time
+
+        n_frames = sum(report["n_frames"] for report in reports)
+        n_failed = sum(report["error"] is not None for report in reports)
+        summary = dict(
+            n_videos=len(reports),
+            n_failed=n_failed,
+            n_frames=n_frames,
+            elapsed_time=elapsed_time,
+            fps=n_frames / elapsed_time if elapsed_time > 0 else 0.0,
+            videos=reports,
+        )
+        logger.info(f"Processed {summary['n_videos']} videos "
+                    f"({n_failed} failed), {n_frames} frames in "
+                    f"{elapsed_time:.1f}s, {summary['fps']:.1f} fps")
+        return summary
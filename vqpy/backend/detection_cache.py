@@ -0,0 +1,149 @@
+import hashlib
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+
+CACHED_FIELDS = {"tlbr", "score", "class_id"}
+
+# bytes read from the start and the end of the video for its fingerprint
+_FINGERPRINT_CHUNK_SIZE = 1 << 20
+
+
+def video_fingerprint(video_path: str) -> str:
+    """
+    Fingerprint of the video content. It hashes the file size and the first
+    and last MiB of the file, which is cheap for long videos while still
+    changing when the video is re-encoded or cut.
+    """
+    size = os.path.getsize(video_path)
+    sha = hashlib.sha1(str(size).encode())
+    with open(video_path, "rb") as f:
+        sha.update(f.read(_FINGERPRINT_CHUNK_SIZE))
+        if size > _FINGERPRINT_CHUNK_SIZE:
+            f.seek(max(_FINGERPRINT_CHUNK_SIZE,
+                       size - _FINGERPRINT_CHUNK_SIZE))
+            sha.update(f.read())
+    return sha.hexdigest()
+
+
+class DetectionCache:
+    def __init__(self,
+                 cache_dir: str,
+                 video_path: str,
+                 detector_name: str,
+                 detector_kwargs: Optional[Dict] = None,
+                 decoder: str = "opencv",
+                 decoder_kwargs: Optional[Dict] = None):
+        """
+        On-disk cache of the detection outputs of one video.
+        It is keyed by the video fingerprint, the detector name, the
+        detector kwargs (e.g. thresholds), and the video decoder and its
+        kwargs, since decoders may number frames differently and output
+        frames of a different size or pixel format. Outputs are stored in
+        one .npz file per key as columnar arrays: tlbr, score and class_id
+        of all detections ordered by frame, the sorted frame ids and the
+        offsets of each frame's detections.
+        :param cache_dir: the folder of the cache files.
+        :param video_path: the path of the video.
+        :param detector_name: the name of the detector.
+        :param detector_kwargs: the keyword arguments of the detector.
+        :param decoder: the name of the video decoder.
+        :param decoder_kwargs: the keyword arguments of the video decoder.
+        """
+        detector_kwargs = detector_kwargs or dict()
+        decoder_kwargs = decoder_kwargs or dict()
+        key = hashlib.sha1("|".join([
+            video_fingerprint(video_path),
+            detector_name,
+            repr(sorted(detector_kwargs.items())),
+            decoder,
+            repr(sorted(decoder_kwargs.items())),
+        ]).encode()).hexdigest()[:16]
+        video_name = os.path.splitext(os.path.basename(video_path))[0]
+        self.path = os.path.join(cache_dir,
+                                 f"{video_name}_{detector_name}_{key}.npz")
+
+        self._frame_ids = np.zeros(0, dtype=np.int64)
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self._tlbr = np.zeros((0, 4), dtype=np.float32)
+        self._score = np.zeros(0, dtype=np.float32)
+        self._class_id = np.zeros(0, dtype=np.int32)
+        if os.path.exists(self.path):
+            with np.load(self.path) as cached:
+                self._frame_ids = cached["frame_ids"]
+                self._offsets = cached["offsets"]
+                self._tlbr = cached["tlbr"]
+                self._score = cached["score"]
+                self._class_id = cached["class_id"]
+        # outputs of frames detected since the cache file is loaded
+        self._new_outputs: Dict[int, List[Dict]] = dict()
+
+    def get(self, frame_id: int) -> Optional[List[Dict]]:
+        """Get the cached detection outputs of the frame, or None."""
+        if frame_id in self._new_outputs:
+            return [d.copy() for d in self._new_outputs[frame_id]]
+        pos = np.searchsorted(self._frame_ids, frame_id)
+        if pos == len(self._frame_ids) or self._frame_ids[pos] != frame_id:
+            return None
+        start, end = self._offsets[pos], self._offsets[pos + 1]
+        return [
+            {"tlbr": self._tlbr[i].astype(float),
+             "score": float(self._score[i]),
+             "class_id": int(self._class_id[i])}
+            for i in range(start, end)
+        ]
+
+    def put(self, frame_id: int, outputs: List[Dict]):
+        self._new_outputs[frame_id] = [
+            {field: d[field] for field in CACHED_FIELDS} for d in outputs
+        ]
+
+    def flush(self):
+        """Merge the new outputs into the cache file."""
+        if not self._new_outputs:
+            return
+        new_ids = np.asarray(sorted(self._new_outputs), dtype=np.int64)
+        new_counts = [len(self._new_outputs[i]) for i in new_ids]
+        new_detections = [d for i in new_ids for d in self._new_outputs[i]]
+        new_tlbr = np.asarray([d["tlbr"] for d in new_detections],
+                              dtype=np.float32).reshape(-1, 4)
+        new_score = np.asarray([d["score"] for d in new_detections],
+                               dtype=np.float32)
+        new_class_id = np.asarray([d["class_id"] for d in new_detections],
+                                  dtype=np.int32)
+
+        # keep cached frames that are not detected again
+        keep = ~np.isin(self._frame_ids, new_ids)
+        counts = np.diff(self._offsets)
+        keep_rows = np.repeat(keep, counts)
+        frame_ids = np.concatenate((self._frame_ids[keep], new_ids))
+        counts = np.concatenate((counts[keep], new_counts)).astype(np.int64)
+        tlbr = np.concatenate((self._tlbr[keep_rows], new_tlbr))
+        score = np.concatenate((self._score[keep_rows], new_score))
+        class_id = np.concatenate((self._class_id[keep_rows], new_class_id))
+
+        # sort frames by id, moving their detections with them
+        order = np.argsort(frame_ids, kind="stable")
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        rows = np.concatenate(
+            [np.arange(starts[i], starts[i] + counts[i]) for i in order]
+            + [np.zeros(0, dtype=np.int64)]).astype(np.int64)
+        self._frame_ids = frame_ids[order]
+        self._offsets = np.concatenate(([0], np.cumsum(counts[order])))
+        self._tlbr = tlbr[rows]
+        self._score = score[rows]
+        self._class_id = class_id[rows]
+        self._new_outputs = dict()
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        # write to a temporary file first, so that an interrupted run does
+        # not leave a broken cache file
+        tmp_path = self.path + ".tmp.npz"
+        np.savez(tmp_path,
+                 frame_ids=self._frame_ids,
+                 offsets=self._offsets,
+                 tlbr=self._tlbr,
+                 score=self._score,
+                 class_id=self._class_id)
+        os.replace(tmp_path, self.path)
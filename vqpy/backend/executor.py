@@ -1,5 +1,19 @@
 from vqpy.backend.operator import CustomizedVideoReader
 from vqpy.backend.operator.video_reader import VideoReader
+from vqpy.backend.operator.prefetcher import Prefetcher
+from vqpy.backend.operator.stream_reader import (
+    StreamReader,
+    get_stream_metadata,
+    is_stream_url,
+)
+from vqpy.backend.operator.object_detector import ObjectDetector
+from vqpy.backend.operator.fan_out import FanOut
+from vqpy.backend.profiler import Profiler
+from collections import deque
+from typing import AsyncIterator, Dict, Iterator, List, Optional
+import asyncio
+import concurrent.futures
+import threading
 
 
 def add_video_metadata(
@@ -7,10 +21,17 @@ def add_video_metadata(
 ):
     if custom_video_reader is not None:
         video_metadata = custom_video_reader.get_metadata()
+    elif is_stream_url(launch_args["video_path"]):
+        video_metadata = get_stream_metadata(launch_args["video_path"])
     else:
         video_path = launch_args["video_path"]
         assert video_path is not None
-        video_reader = VideoReader(video_path=video_path)
+        video_reader = VideoReader(
+            video_path=video_path,
+            headless=True,
+            decoder=launch_args.get("decoder", "opencv"),
+            **(launch_args.get("decoder_kwargs") or dict()),
+        )
         video_metadata = video_reader.get_metadata()
         video_reader.close()
     launch_args.update(video_metadata)
@@ -23,14 +44,214 @@ class Executor:
         root_plan_node,
         launch_args: dict,
         custom_video_reader: CustomizedVideoReader = None,
+        profiler: Optional[Profiler] = None,
     ):
         self.root_plan_node = root_plan_node
         self.launch_args = add_video_metadata(
             launch_args, custom_video_reader=custom_video_reader
         )
         self.root_operator = root_plan_node.to_operator(self.launch_args)
+        self.profiler = profiler
+        if profiler is not None:
+            profiler.instrument(self.root_operator, root_plan_node)
 
     def execute(self):
-        while self.root_operator.has_next():
-            result = self.root_operator.next()
-            yield result
+        try:
+            while self.root_operator.has_next():
+                result = self.root_operator.next()
+                yield result
+        finally:
+            self.close()
+
+    def aexecute(self, max_queue_size: int = 8) -> AsyncIterator:
+        """
+        Async version of execute, for use with `async for`. The operators
+        run on a worker thread, see async_iterate.
+        """
+        return async_iterate(self.execute(), max_queue_size=max_queue_size)
+
+    def close(self):
+        close_operators(self.root_operator)
+
+
+def close_operators(operator):
+    operators = []
+    while operator is not None:
+        operators.append(operator)
+        operator = getattr(operator, "prev", None)
+    # stop the grabber threads of live streams first, which also wakes up
+    # the pipeline stages waiting for their frames
+    for operator in operators:
+        if isinstance(operator, StreamReader):
+            operator.close()
+    # stop worker threads of pipeline stages, from the output side, and
+    # save the detection caches
+    for operator in operators:
+        if isinstance(operator, (Prefetcher, ObjectDetector)):
+            operator.close()
+    # release the video files once no stage is decoding them
+    for operator in operators:
+        if isinstance(operator, VideoReader):
+            operator.close()
+
+
+_END_OF_STREAM = object()
+
+
+async def async_iterate(
+    iterator: Iterator, max_queue_size: int = 8
+) -> AsyncIterator:
+    """
+    Drive a blocking iterator, e.g. Executor.execute(), on a worker thread
+    and yield its items on the running event loop, so that the event loop
+    is not blocked while frames are decoded and detected.
+    Items are handed over through a bounded asyncio queue. The worker
+    thread blocks when the queue is full (backpressure). When the consumer
+    stops early, e.g. the task is cancelled or the loop breaks, the worker
+    stops after the item it is computing and closes the iterator, which
+    closes the operators. Errors of the iterator are raised to the consumer.
+    :param iterator: the blocking iterator.
+    :param max_queue_size: the maximum number of items buffered in the
+        queue.
+    """
+    if max_queue_size < 1:
+        raise ValueError(f"Invalid max_queue_size: {max_queue_size}, "
+                         f"which should be a positive integer.")
+    loop = asyncio.get_running_loop()
+    items = asyncio.Queue(maxsize=max_queue_size)
+    stop_event = threading.Event()
+
+    def put(item):
+        try:
+            future = asyncio.run_coroutine_threadsafe(items.put(item), loop)
+        except RuntimeError:
+            # the event loop is closed
+            return False
+        # poll the stop event so that an abandoned queue does not block
+        # the worker forever
+        while not stop_event.is_set():
+            try:
+                future.result(timeout=0.1)
+                return True
+            except concurrent.futures.TimeoutError:
+                continue
+        future.cancel()
+        return False
+
+    def run():
+        try:
+            for item in iterator:
+                if not put((item, None)):
+                    return
+            put((_END_OF_STREAM, None))
+        except BaseException as e:
+            put((None, e))
+        finally:
+            if hasattr(iterator, "close"):
+                iterator.close()
+
+    worker = threading.Thread(target=run, daemon=True)
+    worker.start()
+    try:
+        while True:
+            item, error = await items.get()
+            if error is not None:
+                raise error
+            if item is _END_OF_STREAM:
+                return
+            yield item
+    finally:
+        stop_event.set()
+        # wait for the operators to be closed without blocking the loop
+        await loop.run_in_executor(None, worker.join)
+
+
+def get_query_names(query_objs) -> List[str]:
+    names = [query_obj.__class__.__name__ for query_obj in query_objs]
+    # several queries may be instances of the same class
+    return [f"{name}_{i}" if names.count(name) > 1 else name
+            for i, name in enumerate(names)]
+
+
+class MultiQueryExecutor:
+    def __init__(
+        self,
+        root_plan_nodes: list,
+        query_names: List[str],
+        launch_args: dict,
+        custom_video_reader: CustomizedVideoReader = None,
+        profiler: Optional[Profiler] = None,
+    ):
+        """
+        Run several queries on one video, sharing the operators before the
+        FanOut of their plans (see Planner.parse_queries).
+        :param root_plan_nodes: the output node of each query.
+        :param query_names: the name of each query.
+        :param launch_args: the launch arguments.
+        :param custom_video_reader: the custom video reader to use.
+        :param profiler: if not None, it instruments the operators.
+        """
+        assert len(root_plan_nodes) == len(query_names)
+        self.root_plan_nodes = root_plan_nodes
+        self.query_names = query_names
+        self.launch_args = add_video_metadata(
+            launch_args, custom_video_reader=custom_video_reader
+        )
+        self.root_operators = [
+            node.to_operator(self.launch_args) for node in root_plan_nodes
+        ]
+        self.profiler = profiler
+        if profiler is not None:
+            for node, operator in zip(root_plan_nodes, self.root_operators):
+                profiler.instrument(operator, node)
+        operator = self.root_operators[0]
+        while not isinstance(operator, FanOut):
+            operator = operator.prev
+        self.fan_out = operator
+
+    def execute(self) -> Iterator:
+        """
+        Yield (query_name, result) of all queries. Results are in the order
+        of frames, and in the order of queries for the same frame.
+        """
+        try:
+            while self.fan_out.advance():
+                for query_name, operator in zip(self.query_names,
+                                                self.root_operators):
+                    while operator.has_next():
+                        yield query_name, operator.next()
+        finally:
+            self.close()
+
+    def streams(self) -> Dict[str, Iterator]:
+        """
+        One result stream per query, keyed by the query name. The streams
+        can be consumed in any order, while the results of the other queries
+        are buffered.
+        """
+        results = self.execute()
+        buffers = {query_name: deque() for query_name in self.query_names}
+
+        def stream(query_name):
+            buffer = buffers[query_name]
+            while True:
+                while not buffer:
+                    try:
+                        other_name, result = next(results)
+                    except StopIteration:
+                        return
+                    buffers[other_name].append(result)
+                yield buffer.popleft()
+
+        return {query_name: stream(query_name)
+                for query_name in self.query_names}
+
+    def aexecute(self, max_queue_size: int = 8) -> AsyncIterator:
+        """
+        Async version of execute, for use with `async for`. The operators
+        run on a worker thread, see async_iterate.
+        """
+        return async_iterate(self.execute(), max_queue_size=max_queue_size)
+
+    def close(self):
+        close_operators(self.fan_out.prev)
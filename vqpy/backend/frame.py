@@ -1,6 +1,99 @@
-from typing import Dict
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
 import numpy
 from collections import defaultdict
+from vqpy.common import InvalidProperty, UnComputedProperty
+from vqpy.utils.images import crop_image
+from vqpy.utils.spatial_index import FrameSpatialIndex
+
+
+class Column(NamedTuple):
+    """
+    Values of one property of many vobjs.
+    values: numeric values are stacked into a float array, e.g. (N, 4) for
+        tlbr, where the rows of invalid values are NaN. Other values are kept
+        in an object array of length N.
+    valid: a boolean array of length N, False for missing, None, invalid and
+        uncomputed values.
+    """
+    values: numpy.ndarray
+    valid: numpy.ndarray
+
+
+_INVALID_TYPES = {type(None), InvalidProperty, UnComputedProperty}
+# value of the properties missing in vobj_data
+_MISSING = UnComputedProperty()
+
+
+def _is_numeric(value) -> bool:
+    # a number or a 1-d sequence of numbers, e.g. a score or a tlbr
+    if isinstance(value, (int, float, numpy.number)):
+        return True
+    if isinstance(value, (list, tuple, numpy.ndarray)):
+        array = numpy.asarray(value)
+        return array.ndim == 1 and array.dtype.kind in "biuf"
+    return False
+
+
+def to_column(values: Sequence) -> Column:
+    """Stack the property values of many vobjs into a Column."""
+    if _INVALID_TYPES.isdisjoint(map(type, values)):
+        valid = numpy.ones(len(values), dtype=bool)
+        valid_values = values
+    else:
+        valid = numpy.array([
+            v is not None
+            and not isinstance(v, (InvalidProperty, UnComputedProperty))
+            for v in values
+        ], dtype=bool)
+        valid_values = [v for v, ok in zip(values, valid) if ok]
+    # values of one property share the same type, so only the first one
+    # is checked
+    if not valid_values or _is_numeric(valid_values[0]):
+        try:
+            stacked = numpy.asarray(valid_values, dtype=float)
+        except (TypeError, ValueError):
+            # e.g. sequences of different lengths
+            stacked = None
+        if stacked is not None and stacked.ndim <= 2:
+            column = numpy.full((len(values),) + stacked.shape[1:],
+                                numpy.nan)
+            column[valid] = stacked
+            return Column(column, valid)
+    column = numpy.empty(len(values), dtype=object)
+    for i, v in enumerate(values):
+        column[i] = v
+    return Column(column, valid)
+
+
+class VObjColumns:
+    def __init__(self, vobjs: List[Dict], indexes: Sequence[int]):
+        """
+        Columns of the properties of some vobjs of a class, each built from
+        the vobj dicts on first access.
+        :param vobjs: the data of all vobjs of the class.
+        :param indexes: the indexes of the vobjs, one row per vobj.
+        """
+        self._vobjs = [vobjs[i] for i in indexes]
+        self._raw = dict()
+        self._columns = dict()
+
+    def __len__(self):
+        return len(self._vobjs)
+
+    def __getitem__(self, name: str) -> Column:
+        if name not in self._columns:
+            self._columns[name] = to_column(self.raw(name))
+        return self._columns[name]
+
+    def raw(self, name: str) -> List:
+        """
+        The property values of the vobjs as they are, UnComputedProperty if
+        missing, e.g. stateful properties of untracked vobjs.
+        """
+        if name not in self._raw:
+            self._raw[name] = [vobj.get(name, _MISSING)
+                               for vobj in self._vobjs]
+        return self._raw[name]
 
 
 class Frame:
@@ -28,6 +121,98 @@ class Frame:
         # eg. filtered_vobjs: {0: {"person": [0, 1]},
         #                      1: {"car": [0, 1, 2], "truck": [0, 1]}}
         self.filtered_vobjs = defaultdict(dict)
+        # whether all vobj filters of the queries have run on the frame, so
+        # that operators before them can read filtered_vobjs, e.g. the
+        # adaptive FrameSampler
+        self.filters_done = False
+
+        # cropped images of vobjs, shared by all operators on this frame.
+        # The key is (tlbr, ext, size), see crop.
+        self._crops = dict()
+        self._spatial_index = None
+
+    @property
+    def spatial_index(self) -> FrameSpatialIndex:
+        """
+        Spatial indexes over the boxes of the vobjs of each class, built on
+        first use and shared by all operators on this frame, e.g. for
+        properties on the neighbors of a vobj. Boxes should not change once
+        the indexes are built.
+        """
+        if self._spatial_index is None:
+            self._spatial_index = FrameSpatialIndex(self.vobj_data)
+        return self._spatial_index
+
+    def crop(self,
+             tlbr,
+             ext: float = 0,
+             size: Optional[Tuple[int, int]] = None):
+        """
+        Get the image cropped with the bounding box, computed on first use
+        and cached on the frame. Without resizing, the crop is a view of the
+        frame image, so it must not be modified in place.
+        :param tlbr: the bounding box.
+        :param ext: ratio to extend the bounding box, see crop_image.
+        :param size: if not None, resize the crop to (width, height).
+        :return: the cropped image, or InvalidProperty if the bounding box
+            is out of the image.
+        """
+        key = (tuple(float(x) for x in tlbr), ext, size)
+        if key not in self._crops:
+            if size is None:
+                image = crop_image(self.image, tlbr, ext)
+            else:
+                import cv2
+                image = self.crop(tlbr, ext)
+                if isinstance(image, numpy.ndarray):
+                    image = cv2.resize(image, size)
+            self._crops[key] = image
+        return self._crops[key]
+
+    def copy(self) -> "Frame":
+        """
+        Copy of the frame whose vobj_data and filtered_vobjs can be updated
+        without changing this frame. The image, the property values and the
+        cached crops are shared.
+        """
+        frame = Frame(self._video_metadata, self._id, self._image,
+                      **self._kwargs)
+        for class_name, vobjs in self.vobj_data.items():
+            frame.vobj_data[class_name] = [dict(vobj) for vobj in vobjs]
+        for filter_index, filtered in self.filtered_vobjs.items():
+            frame.filtered_vobjs[filter_index] = {
+                class_name: list(indexes)
+                for class_name, indexes in filtered.items()
+            }
+        frame._crops = self._crops
+        return frame
+
+    def get_columns(self,
+                    class_name: str,
+                    indexes: Optional[Sequence[int]] = None) -> VObjColumns:
+        """
+        Columnar view of the vobjs of a class, for operators working on all
+        vobjs at once. Columns are built from vobj_data, which stays the
+        source of truth, so the view should not be kept across operators.
+        :param class_name: the vobj class name.
+        :param indexes: the indexes of vobjs in the columns. Defaults to all
+            vobjs of the class.
+        """
+        vobjs = self.vobj_data.get(class_name, [])
+        if indexes is None:
+            indexes = range(len(vobjs))
+        return VObjColumns(vobjs, indexes)
+
+    def get_column(self,
+                   class_name: str,
+                   name: str,
+                   indexes: Optional[Sequence[int]] = None) -> Column:
+        """
+        Column of one property of the vobjs of a class, e.g. the (N, 4) tlbr
+        array. Vobjs without the property (e.g. untracked vobjs for
+        track_id) are invalid in the column. See get_columns.
+        """
+        return self.get_columns(class_name, indexes)[name]
 
     @property
     def video_metadata(self):
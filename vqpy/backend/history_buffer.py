@@ -0,0 +1,99 @@
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+
+class TrackHistory:
+    def __init__(self, size: int):
+        """
+        Fixed-length ring buffer of the history data of one track.
+        The data of frame {frame_id} is stored in slot {frame_id % size},
+        so appending is O(1) and reading a window of n frames is O(n).
+        Slots of frames where the track is missing keep stale data, which is
+        detected by comparing the frame id stored with the data.
+        :param size: the number of latest frames to keep.
+        """
+        self.size = size
+        self._frame_ids: List[Optional[int]] = [None] * size
+        self._data: List[Optional[Dict[str, Any]]] = [None] * size
+        self.last_frame_id = None
+
+    def append(self, frame_id: int, data: Dict[str, Any]):
+        slot = frame_id % self.size
+        self._frame_ids[slot] = frame_id
+        self._data[slot] = data
+        self.last_frame_id = frame_id
+
+    def get(self, frame_id: int) -> Optional[Dict[str, Any]]:
+        slot = frame_id % self.size
+        if self._frame_ids[slot] == frame_id:
+            return self._data[slot]
+        return None
+
+    def get_window(self, name: str, start: int, end: int) -> List[Any]:
+        """
+        Get the values of {name} from frame {start} to frame {end}
+        (inclusive), from old to new. Missing frames are filled with None.
+        """
+        assert end - start < self.size, "window is longer than the buffer"
+        values = []
+        for frame_id in range(start, end + 1):
+            data = self.get(frame_id)
+            values.append(None if data is None else data.get(name))
+        return values
+
+
+class HistoryBuffer:
+    def __init__(self, max_hist_len: int):
+        """
+        History data of the vobjs of one class, stored per track id.
+        :param max_hist_len: the maximum history length (in frames) that
+            will be read. Tracks without data in the last {max_hist_len}
+            frames, e.g. tracks dropped by the tracker, are evicted.
+        """
+        self.max_hist_len = max_hist_len
+        # ordered by the last frame each track is updated in, from old to new
+        self._tracks: "OrderedDict[int, TrackHistory]" = OrderedDict()
+
+    @property
+    def empty(self) -> bool:
+        return len(self._tracks) == 0
+
+    def __len__(self):
+        return len(self._tracks)
+
+    def __contains__(self, track_id):
+        return track_id in self._tracks
+
+    def append(self, track_id: int, frame_id: int, data: Dict[str, Any]):
+        if track_id not in self._tracks:
+            self._tracks[track_id] = TrackHistory(self.max_hist_len + 1)
+        else:
+            self._tracks.move_to_end(track_id)
+        self._tracks[track_id].append(frame_id, data)
+
+    def evict(self, cur_frame_id: int):
+        """Remove tracks that have no data from {cur_frame_id} - max_hist_len
+        onwards, which can not be read by later frames any more."""
+        oldest_frame_id = cur_frame_id - self.max_hist_len
+        while self._tracks:
+            track_id, track = next(iter(self._tracks.items()))
+            if track.last_frame_id >= oldest_frame_id:
+                break
+            del self._tracks[track_id]
+
+    def get_value(self, track_id: int, frame_id: int, name: str) -> Any:
+        if track_id not in self._tracks:
+            return None
+        data = self._tracks[track_id].get(frame_id)
+        return None if data is None else data.get(name)
+
+    def get_window(self, track_id: int, name: str,
+                   start: int, end: int) -> List[Any]:
+        """
+        Get the values of {name} of the track from frame {start} to frame
+        {end} (inclusive), from old to new. Missing frames are filled with
+        None.
+        """
+        if track_id not in self._tracks:
+            return [None] * (end - start + 1)
+        return self._tracks[track_id].get_window(name, start, end)
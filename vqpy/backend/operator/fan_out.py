@@ -0,0 +1,76 @@
+from vqpy.backend.operator.base import Operator
+from vqpy.backend.frame import Frame
+from typing import List, Optional
+
+
+class BranchSource(Operator):
+    def __init__(self, fan_out: "FanOut", index: int):
+        """
+        The first operator of one branch of a FanOut. It holds at most one
+        frame, so the operators of the branch run out of frames after each
+        frame pulled by the FanOut, until the next one is pulled.
+        """
+        super().__init__(fan_out)
+        self.index = index
+        self.frame: Optional[Frame] = None
+
+    def has_next(self) -> bool:
+        return self.frame is not None
+
+    def next(self) -> Frame:
+        if self.has_next():
+            frame = self.frame
+            self.frame = None
+            return frame
+        else:
+            raise StopIteration
+
+
+class FanOut(Operator):
+    def __init__(self, prev: Operator, n_branches: int):
+        """
+        Share the frames of prev with several branches of operators, e.g.
+        one branch per query on the same video. Each frame is pulled from
+        prev once, and every branch gets its own copy of it (see Frame.copy),
+        so branches filter and project vobjs independently.
+        Frames are pushed by advance, and the branches should be drained
+        before the next call, so only one frame is buffered per branch.
+        The filtered vobjs of the branches are merged back into the shared
+        frame under the keys (branch index, filter index), for the operators
+        before the FanOut that look at them, e.g. the adaptive FrameSampler.
+        :param prev: previous operator.
+        :param n_branches: the number of branches.
+        """
+        super().__init__(prev)
+        self.branches: List[BranchSource] = [
+            BranchSource(self, index) for index in range(n_branches)
+        ]
+        self._frame: Optional[Frame] = None
+        self._copies: List[Frame] = []
+
+    def _merge_filtered_vobjs(self):
+        for index, copy in enumerate(self._copies):
+            for filter_index, filtered in copy.filtered_vobjs.items():
+                self._frame.filtered_vobjs[(index, filter_index)] = filtered
+        # the branches are drained, so the copies have gone through them
+        self._frame.filters_done = True
+
+    def advance(self) -> bool:
+        """
+        Pull the next frame from prev and hand a copy of it to each branch.
+        Returns False if prev has no more frames.
+        """
+        if self._frame is not None:
+            self._merge_filtered_vobjs()
+        self._frame = None
+        self._copies = []
+        if not self.prev.has_next():
+            return False
+        self._frame = self.prev.next()
+        for branch in self.branches:
+            branch.frame = self._frame.copy()
+            self._copies.append(branch.frame)
+        return True
+
+    def next(self) -> Frame:
+        raise NotImplementedError("Frames of FanOut are pulled by branches")
@@ -38,6 +38,9 @@ class VObjFrameFilter(FrameFilter):
                 raise ValueError(f"Vobj filter index {vobj_filter_index} "
                                  f"out of range")
             filtered_vobjs = frame.filtered_vobjs[vobj_filter_index]
+            # the frame filter is after all vobj filters, and frames it
+            # drops do not reach the output formatter
+            frame.filters_done = True
             return any([bool(filtered_vobjs[key]) for key in filtered_vobjs])
         super().__init__(prev, condition_func)
 
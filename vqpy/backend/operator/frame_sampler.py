@@ -0,0 +1,117 @@
+from vqpy.backend.operator.base import Operator
+from vqpy.backend.frame import Frame
+from collections import deque
+from typing import Optional
+
+
+class FrameSampler(Operator):
+    def __init__(self,
+                 prev: Operator,
+                 stride: int = 1,
+                 target_fps: Optional[float] = None,
+                 max_stride: Optional[int] = None,
+                 ):
+        """
+        Only pass part of the frames of prev to the next operators.
+        Frame ids of the sampled frames are kept, so the next operators see
+        gaps between the ids of consecutive frames.
+        :param prev: previous operator
+        :param stride: pass every {stride}th frame.
+        :param target_fps: the target frame rate of the sampled frames. If
+            not None, the stride is derived from the "fps" video metadata of
+            the first frame and {stride} is ignored.
+        :param max_stride: if not None, enable adaptive sampling. The stride
+            is reset to the (derived) stride when a sampled frame has vobjs
+            passing the query (at filter index 0), and doubled up to
+            {max_stride} when it has none. Sampled frames are checked in
+            order once they have gone through the vobj filters (see
+            Frame.filters_done), therefore sampling adapts with a delay of
+            the number of frames buffered between the sampler and the vobj
+            filters, e.g. when pipelined or detected in batches.
+        """
+        if stride < 1:
+            raise ValueError(f"Invalid stride: {stride}, which should be a "
+                             f"positive integer.")
+        if target_fps is not None and target_fps <= 0:
+            raise ValueError(f"Invalid target_fps: {target_fps}, which "
+                             f"should be positive.")
+        if max_stride is not None and max_stride < stride:
+            raise ValueError(f"Invalid max_stride: {max_stride}, which "
+                             f"should be no less than stride {stride}.")
+        self.stride = stride
+        self.target_fps = target_fps
+        self.max_stride = max_stride
+        self._min_stride = None
+        self._cur_stride = None
+        # number of frames to drop before the next sampled frame
+        self._n_skip = 0
+        # sampled frames not checked yet, from the oldest
+        self._sampled = deque()
+        self._emitted = False
+        self.current_frame = None
+        super().__init__(prev)
+
+    def _init_stride(self, frame: Frame):
+        stride = self.stride
+        if self.target_fps is not None:
+            fps = frame.video_metadata["fps"]
+            stride = max(1, round(fps / self.target_fps))
+        if self.max_stride is not None:
+            stride = min(stride, self.max_stride)
+        self._min_stride = stride
+        self._cur_stride = stride
+
+    @staticmethod
+    def _is_output_filter_index(filter_index) -> bool:
+        # the vobjs of the query are at filter index 0, or (branch, 0) after
+        # a FanOut. Other indexes hold other vobjs, e.g. the other classes of
+        # cross vobj properties, which are not narrowed by the query.
+        if isinstance(filter_index, tuple):
+            return filter_index[-1] == 0
+        return filter_index == 0
+
+    @classmethod
+    def _has_filtered_vobjs(cls, frame: Frame) -> bool:
+        return any(any(vobj_indexes.values())
+                   for filter_index, vobj_indexes
+                   in frame.filtered_vobjs.items()
+                   if cls._is_output_filter_index(filter_index))
+
+    def _update_stride(self):
+        # frames go through the next operators in order, so the sampled
+        # frames that have gone through the vobj filters are the oldest ones
+        while self._sampled and self._sampled[0].filters_done:
+            frame = self._sampled.popleft()
+            if self._has_filtered_vobjs(frame):
+                self._cur_stride = self._min_stride
+            else:
+                self._cur_stride = min(self._cur_stride * 2, self.max_stride)
+
+    def has_next(self) -> bool:
+        if self.current_frame:
+            return True
+        if self._emitted:
+            self._update_stride()
+            self._n_skip = self._cur_stride - 1
+            self._emitted = False
+        while self.prev.has_next():
+            frame = self.prev.next()
+            if self._cur_stride is None:
+                self._init_stride(frame)
+            if self._n_skip > 0:
+                self._n_skip -= 1
+                continue
+            self.current_frame = frame
+            return True
+        return False
+
+    def next(self) -> Frame:
+        if self.has_next():
+            frame = self.current_frame
+            self.current_frame = None
+            if self.max_stride is not None:
+                self._sampled.append(frame)
+            self._emitted = True
+            return frame
+        else:
+            raise StopIteration
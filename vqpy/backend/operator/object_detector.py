@@ -1,17 +1,46 @@
 from vqpy.backend.operator.base import Operator
 from vqpy.backend.frame import Frame
-from typing import Set, Union, Optional
-from collections import defaultdict
+from typing import Dict, Set, Tuple, Union, Optional
+from collections import defaultdict, deque
 from vqpy.operator.detector import vqpy_detectors
+from vqpy.backend.detection_cache import DetectionCache, CACHED_FIELDS
+from vqpy.backend.operator.stream_reader import is_stream_url
+from loguru import logger
+import numpy as np
 import os
+import threading
 import torch
 
+# detectors created in this process, keyed by detector name and kwargs.
+# Loading the model weights is expensive, so when enabled, detectors are
+# shared by all ObjectDetector operators with the same setting, e.g. when
+# one worker process runs queries on many videos. It is disabled by default
+# since detectors may keep per-video state.
+_detector_cache = dict()
+_detector_cache_lock = threading.Lock()
+_detector_cache_enabled = False
+
+
+def enable_detector_cache(enabled: bool = True):
+    """Share detectors by ObjectDetectors created later in this process."""
+    global _detector_cache_enabled
+    _detector_cache_enabled = enabled
+    if not enabled:
+        with _detector_cache_lock:
+            _detector_cache.clear()
+
 
 class ObjectDetector(Operator):
     def __init__(self,
                  prev: Operator,
                  class_names: Union[str, Set[str]],
                  detector_name: Optional[str] = None,
+                 batch_size: int = 1,
+                 cache_dir: Optional[str] = None,
+                 video_path: Optional[str] = None,
+                 roi: Optional[Tuple[float, float, float, float]] = None,
+                 decoder: str = "opencv",
+                 decoder_kwargs: Optional[Dict] = None,
                  **detector_kwargs,
                  ):
         """Object detector Operator.
@@ -30,13 +59,81 @@ class ObjectDetector(Operator):
                         supported by the detector with {detector_name}.
             detector_name: Oject detector name. e.g. "yolox".
                            Defaults to None.
+            batch_size: Number of frames pulled from prev and detected in one
+                        batched forward pass. Frames are still emitted one
+                        by one in order. Defaults to 1.
+            cache_dir: Folder of the detection cache. If not None, detection
+                       outputs are cached on disk per video and detector
+                       setting, and frames with cached outputs skip
+                       detection. The detector model is only loaded when a
+                       frame misses the cache. Defaults to None.
+            video_path: Path of the video, which is required by the
+                        detection cache. Defaults to None.
+            roi: Region of interest (x1, y1, x2, y2) in frame coordinates.
+                 If not None, the detector only runs on the crop of the
+                 frames to the roi, and the boxes are mapped back to frame
+                 coordinates. Objects outside of the roi are not detected,
+                 and the boxes of objects across its border are clipped.
+                 Defaults to None.
+            decoder: Name of the video decoder of the video, which is part
+                     of the key of the detection cache. Defaults to
+                     "opencv".
+            decoder_kwargs: Keyword arguments of the video decoder, which
+                            are part of the key of the detection cache.
+                            Defaults to None.
             detector_kwargs: Keyword arguments for the detector.
         """
         self.prev = prev
 
+        if not isinstance(batch_size, int) or batch_size < 1:
+            raise ValueError(f"Invalid batch_size: {batch_size}, which "
+                             f"should be a positive integer.")
+        self.batch_size = batch_size
+        # detected frames waiting to be emitted
+        self._frame_buffer = deque()
+
         self._check_set_class_names(class_names)
-        self.detector = self._setup_detector(detector_name, **detector_kwargs)
+        if roi is not None and (len(roi) != 4 or roi[0] >= roi[2]
+                                or roi[1] >= roi[3]):
+            raise ValueError(f"Invalid roi: {roi}, which should be "
+                             f"(x1, y1, x2, y2) with x1 < x2 and y1 < y2.")
+        self.roi = roi
         self.detector_name = detector_name
+        self.detector_kwargs = detector_kwargs
+        self._detector = None
+        self.cache = None
+        if cache_dir is not None:
+            self.cache = self._setup_cache(cache_dir, video_path, decoder,
+                                           decoder_kwargs)
+        if self.cache is None:
+            self._detector = self._setup_detector(detector_name,
+                                                  **detector_kwargs)
+
+    @property
+    def detector(self):
+        # created on first use when the detection cache is enabled
+        if self._detector is None:
+            self._detector = self._setup_detector(self.detector_name,
+                                                  **self.detector_kwargs)
+        return self._detector
+
+    def _setup_cache(self, cache_dir, video_path, decoder, decoder_kwargs):
+        if self.detector_name not in vqpy_detectors:
+            raise ValueError(f"Detector name of {self.detector_name} hasn't "
+                             f"been registered to VQPy")
+        detector_type = vqpy_detectors[self.detector_name][0]
+        # live streams are not replayed, so they are not cached
+        if video_path is None or is_stream_url(video_path) or \
+                not CACHED_FIELDS.issuperset(detector_type.output_fields):
+            logger.info(f"Detection cache is disabled for detector "
+                        f"{self.detector_name} on video {video_path}.")
+            return None
+        # outputs on crops differ from the ones on full frames
+        cache_kwargs = self.detector_kwargs if self.roi is None \
+            else dict(self.detector_kwargs, roi=tuple(self.roi))
+        return DetectionCache(cache_dir, video_path, self.detector_name,
+                              cache_kwargs, decoder=decoder,
+                              decoder_kwargs=decoder_kwargs)
 
     def _check_set_class_names(self, class_names):
         if isinstance(class_names, str):
@@ -53,14 +150,17 @@ class ObjectDetector(Operator):
             raise ValueError(f"Detector name of {detector_name} hasn't been"
                              f"registered to VQPy")
 
-        # create detector
-        detector_type, weights_path, url = vqpy_detectors[detector_name]
-        if not os.path.exists(weights_path):
-            if url is not None:
-                torch.hub.download_url_to_file(url, weights_path)
-            else:
-                raise ValueError(f"Cannot find weights path {weights_path}")
-        detector = detector_type(model_path=weights_path, **detector_kwargs)
+        if _detector_cache_enabled:
+            cache_key = (detector_name,
+                         repr(sorted(detector_kwargs.items())))
+            with _detector_cache_lock:
+                detector = _detector_cache.get(cache_key)
+                if detector is None:
+                    detector = self._create_detector(detector_name,
+                                                     **detector_kwargs)
+                    _detector_cache[cache_key] = detector
+        else:
+            detector = self._create_detector(detector_name, **detector_kwargs)
 
         # sanity check: selected detector can detect all classes in class_names
         detector_class_names = set(detector.cls_names)
@@ -70,24 +170,106 @@ class ObjectDetector(Operator):
 
         return detector
 
-    def _gen_vobj_data(self, frame_image):
-        detector_outputs = self.detector.inference(frame_image)
+    def _create_detector(self, detector_name, **detector_kwargs):
+        detector_type, weights_path, url = vqpy_detectors[detector_name]
+        if not os.path.exists(weights_path):
+            if url is not None:
+                torch.hub.download_url_to_file(url, weights_path)
+            else:
+                raise ValueError(f"Cannot find weights path {weights_path}")
+        return detector_type(model_path=weights_path, **detector_kwargs)
+
+    def _gen_vobj_data(self, detector_outputs):
+        cls_names = vqpy_detectors[self.detector_name][0].cls_names \
+            if self._detector is None else self._detector.cls_names
         vobj_data = defaultdict(list)
         for d in detector_outputs:
-            class_name = self.detector.cls_names[d["class_id"]]
+            class_name = cls_names[d["class_id"]]
             if class_name in self.class_names:
                 del d["class_id"]
                 vobj_data[class_name].append(d)
         return vobj_data
 
-    def next(self) -> Frame:
-        if self.has_next():
-            frame = self.prev.next()
-            vobj_data = self._gen_vobj_data(frame.image)
+    def _detect_batch(self):
+        frames = []
+        while len(frames) < self.batch_size and self.prev.has_next():
+            frames.append(self.prev.next())
+        batch_outputs = [None] * len(frames)
+        if self.cache is not None:
+            for i, frame in enumerate(frames):
+                batch_outputs[i] = self.cache.get(frame.id)
+        missed = [i for i, outputs in enumerate(batch_outputs)
+                  if outputs is None]
+        offsets = dict()
+        images = dict()
+        for i in missed:
+            images[i], offsets[i] = self._crop(frames[i].image)
+        # crops outside of the frames have nothing to detect
+        for i in missed:
+            if images[i] is None:
+                batch_outputs[i] = []
+        missed_images = [i for i in missed if images[i] is not None]
+        if len(missed_images) == 1:
+            # detectors without batch support only need to implement inference
+            batch_outputs[missed_images[0]] = \
+                self.detector.inference(images[missed_images[0]])
+        elif missed_images:
+            missed_outputs = self.detector.inference_batch(
+                [images[i] for i in missed_images])
+            for i, outputs in zip(missed_images, missed_outputs):
+                batch_outputs[i] = outputs
+        for i in missed_images:
+            if offsets[i] is not None:
+                self._shift_boxes(batch_outputs[i], offsets[i])
+        if self.cache is not None:
+            for i in missed:
+                self.cache.put(frames[i].id, batch_outputs[i])
+        for frame, detector_outputs in zip(frames, batch_outputs):
+            vobj_data = self._gen_vobj_data(detector_outputs)
             # Sanity check: the new detected classes don't exist in vobj_data.
             # Different detectors should not detect the same class.
             assert not self.class_names & frame.vobj_data.keys()
             frame.vobj_data.update(vobj_data)
-            return frame
+            self._frame_buffer.append(frame)
+
+    def _crop(self, image):
+        """
+        Crop the image to the roi, and return the crop (None if empty) and
+        the offset (x, y) of the crop, which is None without a roi.
+        """
+        if self.roi is None:
+            return image, None
+        height, width = image.shape[:2]
+        x1 = min(max(int(self.roi[0]), 0), width)
+        y1 = min(max(int(self.roi[1]), 0), height)
+        x2 = min(max(int(np.ceil(self.roi[2])), 0), width)
+        y2 = min(max(int(np.ceil(self.roi[3])), 0), height)
+        if x1 >= x2 or y1 >= y2:
+            return None, None
+        return image[y1:y2, x1:x2], (x1, y1)
+
+    @staticmethod
+    def _shift_boxes(detector_outputs, offset):
+        # map the boxes on a crop to frame coordinates
+        shift = np.array(offset * 2)
+        for d in detector_outputs:
+            d["tlbr"] = np.asarray(d["tlbr"]) + shift
+
+    def has_next(self) -> bool:
+        if self._frame_buffer or self.prev.has_next():
+            return True
+        self.close()
+        return False
+
+    def next(self) -> Frame:
+        if self.has_next():
+            if not self._frame_buffer:
+                self._detect_batch()
+            return self._frame_buffer.popleft()
         else:
             raise StopIteration
+
+    def close(self):
+        """Save the new detection outputs to the detection cache."""
+        if self.cache is not None:
+            self.cache.flush()
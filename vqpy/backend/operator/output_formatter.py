@@ -69,6 +69,7 @@ class FrameOutputFormatter(Operator):
         output = dict()
         if self.prev.has_next():
             frame = self.prev.next()
+            frame.filters_done = True
             output["frame_id"] = frame.id
             for field in self.other_frame_fields:
                 if field not in frame.kwargs:
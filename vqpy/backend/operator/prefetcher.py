@@ -0,0 +1,101 @@
+from vqpy.backend.operator.base import Operator
+from vqpy.backend.frame import Frame
+import queue
+import threading
+
+
+class _EndOfStream:
+    pass
+
+
+class _StageError:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+class Prefetcher(Operator):
+    def __init__(self, prev: Operator, max_queue_size: int = 8):
+        """
+        Pipeline stage boundary. It drives the operator chain of prev on its
+        own worker thread and hands the frames over through a bounded queue,
+        so that the operators before and after it run concurrently.
+        Frames are emitted in the order they are produced by prev, therefore
+        stateful operators after it still see frames in strict order.
+        :param prev: previous operator
+        :param max_queue_size: the maximum number of frames buffered in the
+            queue. The worker thread blocks when the queue is full
+            (backpressure).
+        """
+        if max_queue_size < 1:
+            raise ValueError(f"Invalid max_queue_size: {max_queue_size}, "
+                             f"which should be a positive integer.")
+        self.max_queue_size = max_queue_size
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._stop_event = threading.Event()
+        self._worker = None
+        self._pending = None
+        self._finished = False
+        super().__init__(prev)
+
+    def _put(self, item):
+        # poll the stop event so that a closed stage does not block forever
+        while not self._stop_event.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _run(self):
+        try:
+            while not self._stop_event.is_set() and self.prev.has_next():
+                if not self._put(self.prev.next()):
+                    return
+            self._put(_EndOfStream())
+        except BaseException as e:
+            self._put(_StageError(e))
+
+    def _start(self):
+        self._worker = threading.Thread(
+            target=self._run,
+            name=f"vqpy-{self.prev.__class__.__name__}",
+            daemon=True,
+        )
+        self._worker.start()
+
+    def has_next(self) -> bool:
+        if self._finished:
+            return False
+        if self._worker is None:
+            self._start()
+        while self._pending is None:
+            if self._stop_event.is_set():
+                self._finished = True
+                return False
+            try:
+                self._pending = self._queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        if isinstance(self._pending, _EndOfStream):
+            self._finished = True
+            return False
+        if isinstance(self._pending, _StageError):
+            self._finished = True
+            raise self._pending.error
+        return True
+
+    def next(self) -> Frame:
+        if self.has_next():
+            frame = self._pending
+            self._pending = None
+            return frame
+        else:
+            raise StopIteration
+
+    def close(self):
+        """Stop the worker thread. Frames still in the queue are dropped."""
+        self._stop_event.set()
+        self._finished = True
+        if self._worker is not None:
+            self._worker.join()
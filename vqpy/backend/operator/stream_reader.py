@@ -0,0 +1,237 @@
+import cv2
+from loguru import logger
+from vqpy.backend.operator.base import Operator
+from vqpy.backend.frame import Frame
+from vqpy.utils.interrupt import InterruptHook, resolve_interrupt_hook
+from collections import deque
+from typing import Dict, Optional, Union
+import threading
+
+STREAM_URL_SCHEMES = ("rtsp://", "rtsps://", "rtmp://", "http://",
+                      "https://", "udp://", "tcp://")
+
+# what to do when the grabber thread is ahead of the consumer
+DROP_POLICIES = ("drop_oldest", "latest", "block")
+
+
+def is_stream_url(video_path: Optional[str]) -> bool:
+    """Whether the video path is the url of a live stream."""
+    return video_path is not None and \
+        video_path.lower().startswith(STREAM_URL_SCHEMES)
+
+
+def get_capture_metadata(cap: cv2.VideoCapture) -> Dict:
+    # the number of frames of a live stream is unknown
+    return dict(
+        frame_width=cap.get(cv2.CAP_PROP_FRAME_WIDTH),
+        frame_height=cap.get(cv2.CAP_PROP_FRAME_HEIGHT),
+        fps=cap.get(cv2.CAP_PROP_FPS),
+        n_frames=None,
+    )
+
+
+def get_stream_metadata(stream_url: str) -> Dict:
+    """Connect to the stream once to get its metadata."""
+    cap = cv2.VideoCapture(stream_url)
+    if not cap.isOpened():
+        raise IOError(f"Failed to connect to stream {stream_url}")
+    metadata = get_capture_metadata(cap)
+    cap.release()
+    return metadata
+
+
+class StreamReader(Operator):
+    def __init__(self,
+                 stream_url: str,
+                 drop_policy: str = "drop_oldest",
+                 max_queue_size: int = 8,
+                 reconnect_interval: float = 1.0,
+                 max_reconnect_interval: float = 30.0,
+                 max_reconnect_attempts: Optional[int] = None,
+                 headless: Optional[bool] = None,
+                 interrupt_hook: Union[InterruptHook, str, None] = None):
+        """
+        Live stream reader operator, e.g. for RTSP or HTTP cameras.
+        A grabber thread keeps reading frames from the stream, so that the
+        stream is drained even when the query is slower than the camera.
+        Frames are buffered in a bounded queue, and when the queue is full
+        the {drop_policy} decides what to do:
+            - "drop_oldest": drop the oldest buffered frame.
+            - "latest": only keep the newest frame, i.e. the queue holds
+              one frame.
+            - "block": stop grabbing until the consumer catches up. Frames
+              are not dropped by the reader, but the stream may drop them.
+        Frame ids count the frames read from the stream since the start,
+        including dropped frames and across reconnects. They are therefore
+        increasing but not contiguous when frames are dropped.
+        When reading fails, the reader reconnects with exponential backoff.
+        The stream ends when {max_reconnect_attempts} reconnects in a row
+        fail, or when the reader is closed.
+        :param stream_url: the url of the stream. Anything accepted by
+            cv2.VideoCapture works, e.g. a video file replayed as a fake
+            stream.
+        :param drop_policy: one of "drop_oldest", "latest" and "block".
+        :param max_queue_size: the maximum number of buffered frames.
+        :param reconnect_interval: the seconds to wait before the first
+            reconnect, which is doubled after every failed reconnect.
+        :param max_reconnect_interval: the maximum seconds to wait before a
+            reconnect.
+        :param max_reconnect_attempts: the maximum number of reconnects in a
+            row. If None, reconnect forever.
+        :param headless: whether to never touch HighGUI. If None, it is
+            headless when there is no display.
+        :param interrupt_hook: a callable polled on every frame, reading is
+            interrupted with KeyboardInterrupt when it returns True. If
+            "highgui", 'q' or ESC key presses are checked with cv2.waitKey
+            unless headless. If None, reading is not interrupted.
+        """
+        if drop_policy not in DROP_POLICIES:
+            raise ValueError(f"Invalid drop_policy: {drop_policy}, which "
+                             f"should be one of {DROP_POLICIES}.")
+        if max_queue_size < 1:
+            raise ValueError(f"Invalid max_queue_size: {max_queue_size}, "
+                             f"which should be a positive integer.")
+        if reconnect_interval < 0 or \
+                max_reconnect_interval < reconnect_interval:
+            raise ValueError(f"Invalid reconnect intervals: "
+                             f"{reconnect_interval}, {max_reconnect_interval}")
+        self.stream_url = stream_url
+        self.drop_policy = drop_policy
+        self.max_queue_size = 1 if drop_policy == "latest" else max_queue_size
+        self.reconnect_interval = reconnect_interval
+        self.max_reconnect_interval = max_reconnect_interval
+        self.max_reconnect_attempts = max_reconnect_attempts
+        self._interrupt_hook = resolve_interrupt_hook(headless,
+                                                      interrupt_hook)
+
+        # the id of the last frame read from the stream
+        self.frame_id = -1
+        self.n_dropped = 0
+        self.n_reconnects = 0
+        self._frames = deque()
+        self._cond = threading.Condition()
+        self._stop_event = threading.Event()
+        self._finished = False
+        self._error = None
+
+        self._cap = None
+        if not self._connect() and self._reconnect() is None:
+            raise IOError(f"Failed to connect to stream {stream_url}")
+        self.metadata = get_capture_metadata(self._cap)
+        logger.info(f"Metadata of stream {stream_url} is {self.metadata}")
+        # started on the first has_next
+        self._grabber = None
+
+    def _start(self):
+        self._grabber = threading.Thread(
+            target=self._run,
+            name=f"vqpy-{self.__class__.__name__}",
+            daemon=True,
+        )
+        self._grabber.start()
+
+    def _connect(self) -> bool:
+        cap = cv2.VideoCapture(self.stream_url)
+        if cap.isOpened():
+            self._cap = cap
+            return True
+        cap.release()
+        return False
+
+    def _reconnect(self) -> Optional[cv2.VideoCapture]:
+        if self._cap is not None:
+            self._cap.release()
+            self._cap = None
+        interval = self.reconnect_interval
+        attempt = 0
+        while self.max_reconnect_attempts is None or \
+                attempt < self.max_reconnect_attempts:
+            if self._stop_event.wait(interval):
+                return None
+            attempt += 1
+            self.n_reconnects += 1
+            logger.info(f"Reconnecting to stream {self.stream_url} "
+                        f"(attempt {attempt})")
+            if self._connect():
+                return self._cap
+            interval = min(interval * 2, self.max_reconnect_interval)
+        return None
+
+    def _put(self, image) -> bool:
+        with self._cond:
+            if self.drop_policy == "block":
+                # poll the stop event so that a closed reader does not
+                # block forever
+                while len(self._frames) >= self.max_queue_size and \
+                        not self._stop_event.is_set():
+                    self._cond.wait(timeout=0.1)
+            if self._stop_event.is_set():
+                return False
+            if len(self._frames) >= self.max_queue_size:
+                self._frames.popleft()
+                self.n_dropped += 1
+            self.frame_id += 1
+            self._frames.append(Frame(video_metadata=self.metadata,
+                                      id=self.frame_id,
+                                      image=image))
+            self._cond.notify_all()
+        return True
+
+    def _run(self):
+        try:
+            while not self._stop_event.is_set():
+                ret_val, image = self._cap.read()
+                if not ret_val:
+                    logger.info(f"Failed to read frame {self.frame_id + 1} "
+                                f"from stream {self.stream_url}")
+                    if self._reconnect() is None:
+                        break
+                    continue
+                if not self._put(image):
+                    break
+        except BaseException as e:
+            self._error = e
+        finally:
+            if self._cap is not None:
+                self._cap.release()
+            with self._cond:
+                self._finished = True
+                self._cond.notify_all()
+
+    def has_next(self) -> bool:
+        if self._grabber is None and not self._stop_event.is_set():
+            self._start()
+        # blocks until a frame is read or the stream ends
+        with self._cond:
+            while not self._frames and not self._finished:
+                self._cond.wait()
+            if self._frames:
+                return True
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+        return False
+
+    def next(self) -> Frame:
+        if self.has_next():
+            if self._interrupt_hook is not None and self._interrupt_hook():
+                raise KeyboardInterrupt
+            with self._cond:
+                frame = self._frames.popleft()
+                self._cond.notify_all()
+            return frame
+        else:
+            raise StopIteration
+
+    def close(self):
+        """Stop the grabber thread and disconnect from the stream. Buffered
+        frames are dropped."""
+        self._stop_event.set()
+        with self._cond:
+            self._frames.clear()
+            self._finished = True
+            self._cond.notify_all()
+        if self._grabber is not None:
+            self._grabber.join()
+        elif self._cap is not None:
+            self._cap.release()
@@ -0,0 +1,253 @@
+import cv2
+import numpy as np
+from abc import ABC, abstractmethod
+from loguru import logger
+from typing import Dict, Optional, Tuple
+
+# pixel formats of decoded images, named as in FFmpeg
+PIXEL_FORMATS = ("bgr24", "rgb24", "gray")
+
+
+class VideoDecoder(ABC):
+    def __init__(self,
+                 video_path: str,
+                 output_size: Optional[Tuple[int, int]] = None,
+                 pixel_format: str = "bgr24"):
+        """
+        Decoder of the frames of a video file, used by VideoReader.
+        :param video_path: the path of the video.
+        :param output_size: if not None, frames are decoded to images of
+            (width, height) instead of the size of the video.
+        :param pixel_format: the pixel format of the decoded images, one of
+            "bgr24" (the default of OpenCV), "rgb24" and "gray".
+        """
+        if output_size is not None and \
+                (len(output_size) != 2 or min(output_size) < 1):
+            raise ValueError(f"Invalid output_size: {output_size}, which "
+                             f"should be a positive (width, height).")
+        if pixel_format not in PIXEL_FORMATS:
+            raise ValueError(f"Invalid pixel_format: {pixel_format}, which "
+                             f"should be one of {PIXEL_FORMATS}.")
+        self.video_path = video_path
+        self.output_size = output_size
+        self.pixel_format = pixel_format
+
+    @abstractmethod
+    def get_metadata(self) -> Dict:
+        """
+        Metadata of the video, where frame_width and frame_height are the
+        size of the decoded images.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def peek_frame_id(self) -> Optional[int]:
+        """The id of the frame that read returns next, or None at the end
+        of the video."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def read(self) -> np.ndarray:
+        """Decode the next frame. Raise IOError if it fails."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def seek(self, frame_id: int):
+        """Seek to the first frame with id no less than frame_id."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def close(self):
+        raise NotImplementedError
+
+
+class OpenCVDecoder(VideoDecoder):
+    def __init__(self,
+                 video_path: str,
+                 output_size: Optional[Tuple[int, int]] = None,
+                 pixel_format: str = "bgr24"):
+        """
+        Decoder with cv2.VideoCapture. Frames are always decoded at the
+        size of the video, and then resized to output_size.
+        """
+        super().__init__(video_path, output_size, pixel_format)
+        self._cap = cv2.VideoCapture(video_path)
+        self._n_frames = int(self._cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        self._frame_id = 0
+
+    def get_metadata(self) -> Dict:
+        frame_width = self._cap.get(cv2.CAP_PROP_FRAME_WIDTH)  # float
+        frame_height = self._cap.get(cv2.CAP_PROP_FRAME_HEIGHT)  # float
+        if self.output_size is not None:
+            frame_width, frame_height = map(float, self.output_size)
+        return dict(
+            frame_width=frame_width,
+            frame_height=frame_height,
+            fps=self._cap.get(cv2.CAP_PROP_FPS),
+            n_frames=self._n_frames,
+        )
+
+    def peek_frame_id(self) -> Optional[int]:
+        if self._frame_id < self._n_frames:
+            return self._frame_id
+        return None
+
+    def read(self) -> np.ndarray:
+        ret_val, image = self._cap.read()
+        if not ret_val:
+            logger.info(f"Failed to load frame stream with id of "
+                        f"{self._frame_id}")
+            raise IOError
+        self._frame_id += 1
+        if self.output_size is not None:
+            image = cv2.resize(image, tuple(self.output_size),
+                               interpolation=cv2.INTER_LINEAR)
+        if self.pixel_format == "rgb24":
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        elif self.pixel_format == "gray":
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        return image
+
+    def seek(self, frame_id: int):
+        self._cap.set(cv2.CAP_PROP_POS_FRAMES, frame_id)
+        if int(self._cap.get(cv2.CAP_PROP_POS_FRAMES)) != frame_id:
+            # the backend can not seek accurately, e.g. for some codecs.
+            # Fall back to grabbing frames from the beginning without
+            # retrieving them.
+            logger.info(f"Failed to seek to frame {frame_id}, "
+                        f"grabbing frames instead.")
+            self._cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            for _ in range(frame_id):
+                if not self._cap.grab():
+                    raise IOError
+        self._frame_id = frame_id
+
+    def close(self):
+        self._cap.release()
+
+
+class PyAVDecoder(VideoDecoder):
+    def __init__(self,
+                 video_path: str,
+                 output_size: Optional[Tuple[int, int]] = None,
+                 pixel_format: str = "bgr24",
+                 thread_type: Optional[str] = "AUTO",
+                 keyframes_only: bool = False):
+        """
+        Decoder with PyAV (FFmpeg), which requires the av package.
+        Frames are converted to output_size and pixel_format by swscale in
+        one pass, without a full size BGR copy of each frame.
+        :param thread_type: the threading of the codec, "AUTO", "FRAME",
+            "SLICE" or None (single threaded).
+        :param keyframes_only: only decode the keyframes. The codec skips
+            the other frames, so frame ids are not contiguous.
+        """
+        try:
+            import av
+        except ImportError:
+            raise ImportError("Please install av (PyAV) to use the pyav "
+                              "video decoder.")
+        super().__init__(video_path, output_size, pixel_format)
+        self.keyframes_only = keyframes_only
+        self._container = av.open(video_path)
+        self._stream = self._container.streams.video[0]
+        if thread_type is not None:
+            self._stream.thread_type = thread_type
+        if keyframes_only:
+            self._stream.codec_context.skip_frame = "NONKEY"
+
+        self._fps = float(self._stream.average_rate or 0)
+        self._time_base = float(self._stream.time_base or 0)
+        self._start_pts = self._stream.start_time or 0
+        self._n_frames = self._stream.frames
+        if not self._n_frames and self._stream.duration is not None:
+            self._n_frames = round(
+                self._stream.duration * self._time_base * self._fps)
+        self._frames = self._container.decode(self._stream)
+        # the decoded frame that read returns next, and its id
+        self._next_frame = None
+        self._next_frame_id = None
+        # the id of the last decoded frame, for frames without pts
+        self._last_frame_id = -1
+        self._decode_next()
+
+    def _frame_id(self, frame) -> int:
+        if frame.pts is None or not self._time_base or not self._fps:
+            return self._last_frame_id + 1
+        return round((frame.pts - self._start_pts)
+                     * self._time_base * self._fps)
+
+    def _decode_next(self):
+        try:
+            self._next_frame = next(self._frames)
+        except StopIteration:
+            self._next_frame = None
+            self._next_frame_id = None
+            return
+        self._next_frame_id = self._frame_id(self._next_frame)
+        self._last_frame_id = self._next_frame_id
+
+    def get_metadata(self) -> Dict:
+        if self.output_size is not None:
+            frame_width, frame_height = self.output_size
+        else:
+            frame_width = self._stream.codec_context.width
+            frame_height = self._stream.codec_context.height
+        return dict(
+            frame_width=float(frame_width),
+            frame_height=float(frame_height),
+            fps=self._fps,
+            n_frames=self._n_frames,
+        )
+
+    def peek_frame_id(self) -> Optional[int]:
+        return self._next_frame_id
+
+    def read(self) -> np.ndarray:
+        if self._next_frame is None:
+            raise IOError
+        width, height = self.output_size or (None, None)
+        image = self._next_frame.to_ndarray(format=self.pixel_format,
+                                            width=width, height=height)
+        self._decode_next()
+        return image
+
+    def seek(self, frame_id: int):
+        if self._time_base and self._fps:
+            pts = self._start_pts + int(frame_id / self._fps
+                                        / self._time_base)
+            # seek to the keyframe before the frame
+            self._container.seek(pts, stream=self._stream, backward=True)
+            self._frames = self._container.decode(self._stream)
+        self._decode_next()
+        while self._next_frame is not None and \
+                self._next_frame_id < frame_id:
+            self._decode_next()
+
+    def close(self):
+        self._container.close()
+
+
+vqpy_decoders = {}
+
+
+def register(decoder_name, decoder_type):
+    """Register a video decoder"""
+    decoder_name_lower = decoder_name.lower()
+    if decoder_name_lower in vqpy_decoders:
+        raise ValueError(f"Decoder name {decoder_name} is already in VQPy."
+                         f"Please change another name to register.")
+    vqpy_decoders[decoder_name_lower] = decoder_type
+
+
+register("opencv", OpenCVDecoder)
+register("pyav", PyAVDecoder)
+
+
+def create_decoder(video_path: str,
+                   decoder_name: str = "opencv",
+                   **decoder_kwargs) -> VideoDecoder:
+    if decoder_name.lower() not in vqpy_decoders:
+        raise ValueError(f"Decoder name of {decoder_name} hasn't been "
+                         f"registered to VQPy")
+    return vqpy_decoders[decoder_name.lower()](video_path, **decoder_kwargs)
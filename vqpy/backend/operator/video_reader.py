@@ -1,33 +1,67 @@
-import cv2
 from loguru import logger
 from vqpy.backend.operator.base import Operator
+from vqpy.backend.operator.video_decoder import create_decoder
 from vqpy.backend.frame import Frame
+from vqpy.utils.interrupt import InterruptHook, resolve_interrupt_hook
+from typing import Optional, Tuple, Union
 
 
 class VideoReader(Operator):
-    def __init__(self, video_path: str):
-        self._cap = cv2.VideoCapture(video_path)
+    def __init__(self,
+                 video_path: str,
+                 frame_id_range: Optional[Tuple[int, int]] = None,
+                 headless: Optional[bool] = None,
+                 interrupt_hook: Union[InterruptHook, str, None] = None,
+                 decoder: str = "opencv",
+                 **decoder_kwargs):
+        """
+        Video reader operator.
+        :param video_path: the path of the video.
+        :param frame_id_range: if not None, only read frames with ids in
+            range(*frame_id_range). The reader seeks to the start frame
+            instead of decoding the frames before it.
+        :param headless: whether to never touch HighGUI. If None, it is
+            headless when there is no display.
+        :param interrupt_hook: a callable polled on every frame, reading is
+            interrupted with KeyboardInterrupt when it returns True. If
+            "highgui", 'q' or ESC key presses are checked with cv2.waitKey
+            unless headless. If None, reading is not interrupted.
+        :param decoder: the name of the registered video decoder, e.g.
+            "opencv" or "pyav".
+        :param decoder_kwargs: keyword arguments of the decoder, e.g.
+            output_size and pixel_format, see VideoDecoder.
+        """
+        self._decoder = create_decoder(video_path, decoder, **decoder_kwargs)
         self.frame_id = -1
+        self._interrupt_hook = resolve_interrupt_hook(headless,
+                                                      interrupt_hook)
         self.metadata = self.get_metadata()
+        self.end_frame_id = self.metadata["n_frames"]
+        if frame_id_range is not None:
+            start, end = frame_id_range
+            if start < 0 or end < start:
+                raise ValueError(f"Invalid frame_id_range: {frame_id_range}")
+            self.end_frame_id = min(end, self.end_frame_id)
+            if start >= self.end_frame_id:
+                # empty range, or a range past the end of the video, where
+                # no frame is read
+                self.end_frame_id = 0
+            elif start > 0:
+                self._decoder.seek(start)
+                self.frame_id = start - 1
 
     def get_metadata(self):
-        frame_width = self._cap.get(cv2.CAP_PROP_FRAME_WIDTH)  # float
-        frame_height = self._cap.get(cv2.CAP_PROP_FRAME_HEIGHT)  # float
-        fps = self._cap.get(cv2.CAP_PROP_FPS)
-        n_frames = int(self._cap.get(cv2.CAP_PROP_FRAME_COUNT))
-
-        logger.info(f"Metadata of video is width={frame_width}, \
-                      height={frame_height}, fps={fps}, n_frames={n_frames}")
-        metadata = dict(
-            frame_width=frame_width,
-            frame_height=frame_height,
-            fps=fps,
-            n_frames=n_frames,
-        )
+        metadata = self._decoder.get_metadata()
+        logger.info(f"Metadata of video is "
+                    f"width={metadata['frame_width']}, "
+                    f"height={metadata['frame_height']}, "
+                    f"fps={metadata['fps']}, "
+                    f"n_frames={metadata['n_frames']}")
         return metadata
 
     def has_next(self) -> bool:
-        if self.frame_id + 1 < self.metadata["n_frames"]:
+        next_frame_id = self._decoder.peek_frame_id()
+        if next_frame_id is not None and next_frame_id < self.end_frame_id:
             return True
         else:
             self.close()
@@ -35,14 +69,9 @@ class VideoReader(Operator):
 
     def next(self) -> Frame:
         if self.has_next():
-            self.frame_id += 1
-            ret_val, frame_image = self._cap.read()
-            if not ret_val:
-                logger.info(f"Failed to load frame stream with id of "
-                            f"{self.frame_id}")
-                raise IOError
-            ch = cv2.waitKey(1)
-            if ch == 27 or ch == ord("q") or ch == ord('Q'):
+            self.frame_id = self._decoder.peek_frame_id()
+            frame_image = self._decoder.read()
+            if self._interrupt_hook is not None and self._interrupt_hook():
                 raise KeyboardInterrupt
 
             frame = Frame(video_metadata=self.metadata,
@@ -53,4 +82,4 @@ class VideoReader(Operator):
             raise StopIteration
 
     def close(self):
-        self._cap.release()
+        self._decoder.close()
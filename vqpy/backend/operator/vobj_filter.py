@@ -1,6 +1,7 @@
 from vqpy.backend.operator.base import Operator
 from vqpy.backend.frame import Frame
 from typing import Callable, Union, List, Dict
+import numpy as np
 
 
 class VObjFilter(Operator):
@@ -8,6 +9,7 @@ class VObjFilter(Operator):
                  prev: Operator,
                  condition_func: Union[Callable[[Dict], bool], str, List[str]],
                  filter_index: int = 0,
+                 vectorized: bool = False,
                  ):
         """
         Filter vobjs based on the condition_func.
@@ -19,9 +21,16 @@ class VObjFilter(Operator):
             The vobjs with the class name(s) will be filtered.
         :param filter_index: the index of the filter.
             If the index is already used, raise ValueError.
+        :param vectorized: whether condition_func is vectorized. A vectorized
+            condition_func is called once per class with the columns of the
+            vobjs to filter (see Frame.get_columns), and returns a boolean
+            array with one value per vobj.
         """
         self.condition_func = condition_func
         self.filter_index = filter_index
+        if vectorized and not callable(condition_func):
+            raise ValueError("vectorized condition_func must be a function")
+        self.vectorized = vectorized
         super().__init__(prev)
 
     def _update_filtered_class(self, class_name, frame: Frame):
@@ -51,6 +60,10 @@ class VObjFilter(Operator):
                     or a function")
             filtered_vobjs = frame.filtered_vobjs[self.filter_index]
             for class_name, vobj_indexes in filtered_vobjs.items():
+                if self.vectorized:
+                    frame.filtered_vobjs[self.filter_index][class_name] = \
+                        self._filter_columns(frame, class_name, vobj_indexes)
+                    continue
                 new_vobj_indexes = []
                 for index in vobj_indexes:
                     vobj_data = frame.vobj_data[class_name][index]
@@ -62,6 +75,16 @@ class VObjFilter(Operator):
 
         return frame
 
+    def _filter_columns(self, frame: Frame, class_name, vobj_indexes):
+        if not vobj_indexes:
+            return []
+        columns = frame.get_columns(class_name, vobj_indexes)
+        mask = np.asarray(self.condition_func(columns), dtype=bool)
+        assert mask.shape == (len(vobj_indexes),), \
+            f"vectorized condition_func returns a mask of shape " \
+            f"{mask.shape} for {len(vobj_indexes)} vobjs"
+        return [index for index, keep in zip(vobj_indexes, mask) if keep]
+
     def next(self) -> Frame:
         if self.has_next():
             frame = self.prev.next()
@@ -1,14 +1,9 @@
 from vqpy.backend.operator.base import Operator
-from vqpy.backend.frame import Frame
-from typing import Callable, Dict, Any
-import pandas as pd
-import numpy as np
-from vqpy.utils.images import crop_image
+from vqpy.backend.frame import Frame, to_column
+from vqpy.backend.history_buffer import HistoryBuffer
+from typing import Callable, Dict, Any, List, Optional
 from vqpy.common import InvalidProperty
-
-import warnings
-
-warnings.simplefilter(action="ignore", category=FutureWarning)
+import numpy as np
 
 
 class VObjProjector(Operator):
@@ -21,6 +16,7 @@ class VObjProjector(Operator):
         is_stateful: bool,
         class_name: str,
         filter_index: int = 0,
+        vectorized: bool = False,
     ):
         """
         Filter vobjs based on the condition_func.
@@ -42,6 +38,12 @@ class VObjProjector(Operator):
              either directly or indirectly.
         :param class_name: the name of the vobj class to compute the property.
         :param filter_index: the index of the filter.
+        :param vectorized: whether property_func is vectorized. A vectorized
+            property_func is called once per frame with the dependency data
+            of all vobjs with valid dependencies, a dict from the dependency
+            name to an array with one row per vobj (see Frame.get_column),
+            and returns the property values of these vobjs in order. It can
+            not depend on history.
         """
         self.property_name = property_name
         self.property_func = property_func
@@ -61,14 +63,51 @@ class VObjProjector(Operator):
         }
         self._self_dep = self.property_name in self._hist_dependencies
         self._dep_on_hist = len(self._hist_dependencies) > 0
+        if vectorized and self._dep_on_hist:
+            raise ValueError(f"Vectorized property {property_name} can not "
+                             f"depend on history.")
+        self.vectorized = vectorized
         self._max_hist_len = max(dependencies.values())
-        columns = ["track_id", "frame_id", "vobj_index"] + list(
-            self._hist_dependencies.keys()
-        )
-        self._hist_buffer = pd.DataFrame(columns=columns)
+        # history data of hist dependencies, stored per track id
+        self._hist_buffer = HistoryBuffer(self._max_hist_len)
+        # index of the current frame among the frames received, which is
+        # the frame id unless frames are sampled before the projector
+        self._frame_index = -1
 
         super().__init__(prev)
 
+    def _get_vobj_dependencies(self, frame, vobj_data):
+        # get the dependency data of one vobj, without copying vobj_data
+        dep_data = dict()
+        for dep_name in self.dependencies.keys():
+            if dep_name == self.property_name:
+                continue
+            if dep_name == "image":
+                # the frame image cropped with the vobj's bbox, shared by all
+                # projectors on the frame
+                assert "tlbr" in vobj_data, "vobj_data does not have tlbr."
+                dep_data[dep_name] = frame.crop(vobj_data["tlbr"])
+            elif dep_name == "frame_id":
+                dep_data[dep_name] = frame.id
+            elif dep_name == "spatial_index":
+                # the indexes of all vobjs on the frame, see
+                # FrameSpatialIndex
+                dep_data[dep_name] = frame.spatial_index
+            elif dep_name in frame.video_metadata:
+                # dependency in video metadata
+                # including "frame_width", "frame_height", "fps", "n_frames"
+                dep_data[dep_name] = frame.video_metadata[dep_name]
+            else:
+                # sanity check: dependencies should be in vobj_data
+                assert dep_name in vobj_data, (
+                    "vobj_data does not have all dependencies for "
+                    f"property {self.property_name}. Key and value of "
+                    f"vobj_data: {vobj_data}. Keys of dependencies: "
+                    f"{self.dependencies.keys()}"
+                )
+                dep_data[dep_name] = vobj_data[dep_name]
+        return dep_data
+
     def _get_cur_frame_dependencies(self, frame):
         # TODO: Add support for video metadata and frame image dependencies
         # 1. get vobj indexes in filter index of class name
@@ -80,39 +119,14 @@ class VObjProjector(Operator):
         hist_deps = []
         non_hist_deps = []
         for vobj_index in vobj_indexes:
-            vobj_data = frame.vobj_data[self.class_name][vobj_index].copy()
+            vobj_data = frame.vobj_data[self.class_name][vobj_index]
             if self.is_stateful and "track_id" not in vobj_data:
                 continue
             else:
-                # dependency of "image", which is the frame image cropped with
-                #  the vobj's bbox
-                if "image" in self.dependencies:
-                    assert "tlbr" in vobj_data, "vobj_data does not have tlbr."
-                    vobj_image = crop_image(frame.image, vobj_data["tlbr"])
-                    vobj_data["image"] = vobj_image
-
-                # dependency in video metadata
-                # including "frame_width", "frame_height", "fps", "n_frames"
-                for key in frame.video_metadata:
-                    if key in self.dependencies:
-                        vobj_data[key] = frame.video_metadata[key]
-
-                # sanity check: dependencies should be in vobj_data
-                assert all(
-                    [
-                        dep_name in vobj_data
-                        for dep_name in self.dependencies.keys()
-                        if not dep_name == self.property_name
-                    ]
-                ), (
-                    "vobj_data does not have all dependencies for "
-                    f"property {self.property_name}. Key and value of "
-                    f"vobj_data: {vobj_data}. Keys of dependencies: "
-                    f"{self.dependencies.keys()}"
-                )
+                dep_data = self._get_vobj_dependencies(frame, vobj_data)
                 # dependency data as current frame dependency
                 cur_dep = {
-                    dep_name: vobj_data[dep_name]
+                    dep_name: dep_data[dep_name]
                     for dep_name in self._non_hist_dependencies.keys()
                 }
                 cur_dep.update({"vobj_index": vobj_index})
@@ -122,7 +136,7 @@ class VObjProjector(Operator):
                 # dependency data to be saved as history
                 if self._dep_on_hist:
                     hist_dep = {
-                        dep_name: vobj_data[dep_name]
+                        dep_name: dep_data[dep_name]
                         for dep_name in self._hist_dependencies.keys()
                         if not dep_name == self.property_name
                     }
@@ -130,7 +144,7 @@ class VObjProjector(Operator):
                         {
                             "vobj_index": vobj_index,
                             "track_id": vobj_data["track_id"],
-                            "frame_id": frame.id,
+                            "frame_index": self._frame_index,
                         }
                     )
 
@@ -141,45 +155,34 @@ class VObjProjector(Operator):
         return non_hist_deps, hist_deps
 
     def _update_hist_buffer(self, hist_deps):
-        # self._hist_buffer = self._hist_buffer.append(hist_deps)
-        self._hist_buffer = pd.concat(
-            [self._hist_buffer, pd.DataFrame.from_dict(hist_deps)]
-        )
+        for hist_dep in hist_deps:
+            data = {
+                dep_name: hist_dep[dep_name]
+                for dep_name in self._hist_dependencies.keys()
+            }
+            self._hist_buffer.append(
+                hist_dep["track_id"], hist_dep["frame_index"], data
+            )
 
-        # remove data that older than max history length
-        cur_frame_id = hist_deps[0]["frame_id"]
-        # frame_id starts from 0
-        oldest_frame_id = cur_frame_id + 1 - (self._max_hist_len + 1)
-        if oldest_frame_id >= 0:
-            self._hist_buffer = self._hist_buffer[
-                self._hist_buffer["frame_id"] >= oldest_frame_id
-            ]
+        # remove tracks without data in the max history length
+        cur_frame_index = hist_deps[0]["frame_index"]
+        self._hist_buffer.evict(cur_frame_index)
 
     def _get_hist_dependency(
-        self, dependency_name, track_id, frame_id, hist_len
+        self, dependency_name, track_id, frame_index, hist_len
     ):
         # todo: allow user to fill missing data with a default value
         # currently fill with None
-        hist_start = frame_id - hist_len
+        hist_start = frame_index - hist_len
         # return None if there isn't enough history
         if hist_start < 0:
             return None, False
 
-        hist_end = frame_id - 1
-        # get dependency data from hist buffer
-        row = (
-            (self._hist_buffer["track_id"] == track_id)
-            & (self._hist_buffer["frame_id"] >= hist_start)
-            & (self._hist_buffer["frame_id"] <= hist_end)
-        )
-        hist_df = (
-            self._hist_buffer.loc[row, ["frame_id", dependency_name]]
-            .set_index("frame_id")
-            .reindex(range(hist_start, hist_end + 1))
+        hist_end = frame_index - 1
+        # get dependency data from hist buffer, missing frames are None
+        hist_data = self._hist_buffer.get_window(
+            track_id, dependency_name, hist_start, hist_end
         )
-        # fill missing frames with None
-        hist_df = hist_df.replace(np.nan, None)
-        hist_data = hist_df[dependency_name].tolist()
 
         # hist_data contains history data
         assert len(hist_data) == hist_len
@@ -204,11 +207,11 @@ class VObjProjector(Operator):
                         dependency_name in hist_dep
                     ), f"dependency {dependency_name} is not in hist_dep"
                 track_id = hist_dep["track_id"]
-                frame_id = hist_dep["frame_id"]
+                frame_index = hist_dep["frame_index"]
                 dep_data, enough = self._get_hist_dependency(
                     dependency_name,
                     track_id=track_id,
-                    frame_id=frame_id,
+                    frame_index=frame_index,
                     hist_len=hist_len,
                 )
                 if enough:
@@ -260,9 +263,63 @@ class VObjProjector(Operator):
 
         return frame, output_hist_data
 
+    def _get_dependency_columns(self, frame, vobj_indexes):
+        vobjs = frame.vobj_data[self.class_name]
+        columns = dict()
+        for dep_name in self.dependencies.keys():
+            if dep_name == "image":
+                columns[dep_name] = to_column(
+                    [frame.crop(vobjs[i]["tlbr"]) for i in vobj_indexes])
+            elif dep_name == "frame_id":
+                columns[dep_name] = to_column([frame.id] * len(vobj_indexes))
+            elif dep_name == "spatial_index":
+                columns[dep_name] = to_column(
+                    [frame.spatial_index] * len(vobj_indexes))
+            elif dep_name in frame.video_metadata:
+                columns[dep_name] = to_column(
+                    [frame.video_metadata[dep_name]] * len(vobj_indexes))
+            else:
+                columns[dep_name] = frame.get_column(
+                    self.class_name, dep_name, vobj_indexes)
+        return columns
+
+    def _compute_property_vectorized(self, frame):
+        if self.filter_index not in frame.filtered_vobjs:
+            raise ValueError("filter_index is not in filtered_vobjs")
+        vobj_indexes = frame.filtered_vobjs[self.filter_index][self.class_name]
+        vobjs = frame.vobj_data[self.class_name]
+        if self.is_stateful:
+            vobj_indexes = [i for i in vobj_indexes
+                            if "track_id" in vobjs[i]]
+        if not vobj_indexes:
+            return frame
+
+        columns = self._get_dependency_columns(frame, vobj_indexes)
+        valid = np.ones(len(vobj_indexes), dtype=bool)
+        for column in columns.values():
+            valid &= column.valid
+        property_values = [InvalidProperty() for _ in vobj_indexes]
+        if valid.any():
+            outputs = self.property_func({
+                dep_name: column.values[valid]
+                for dep_name, column in columns.items()
+            })
+            rows = np.flatnonzero(valid)
+            assert len(outputs) == len(rows), \
+                f"vectorized property {self.property_name} returns " \
+                f"{len(outputs)} values for {len(rows)} vobjs"
+            for row, value in zip(rows, outputs):
+                property_values[row] = value
+        for vobj_index, value in zip(vobj_indexes, property_values):
+            vobjs[vobj_index][self.property_name] = value
+        return frame
+
     def next(self) -> Frame:
         if self.prev.has_next():
             frame = self.prev.next()
+            self._frame_index += 1
+            if self.vectorized:
+                return self._compute_property_vectorized(frame)
             non_hist_data, hist_data = self._get_cur_frame_dependencies(frame)
             frame, output_hist_data = self._compute_property(
                 non_hist_data, hist_data, frame=frame
@@ -272,4 +329,140 @@ class VObjProjector(Operator):
         return frame
 
 
-# TODO: ADD CrossVobjProjector
+class CrossVObjProjector(VObjProjector):
+    def __init__(
+        self,
+        prev: Operator,
+        property_name: str,
+        property_func: Callable[[Dict, List[Dict]], Any],
+        dependencies: Dict[str, int],
+        is_stateful: bool,
+        class_name: str,
+        other_class_name: str,
+        other_dependencies: List[str],
+        filter_index: int = 0,
+        other_filter_index: Optional[int] = None,
+        max_distance: Optional[float] = None,
+        overlap: bool = False,
+    ):
+        """
+        Compute a property of the vobjs of one class from the vobjs of
+        another class on the same frame, e.g. the baggage near a person.
+        Only the vobjs of the other class near each vobj are candidates,
+        which are found with the spatial index of the frame instead of
+        comparing all pairs of vobjs.
+        :param property_func: a callable function that takes in the
+            dependency data of the vobj (see VObjProjector) and the list of
+            the candidates, from the nearest to the farthest. Each candidate
+            is a dict from the names in other_dependencies to the values of
+            the other vobj. Candidates with missing or invalid values are
+            skipped.
+        :param other_class_name: the name of the other vobj class.
+        :param other_dependencies: the names of the properties of the other
+            vobjs passed to property_func, on the current frame.
+        :param other_filter_index: the index of the filter of the other
+            vobjs. Defaults to None, which uses all vobjs of the other class.
+        :param max_distance: if not None, the candidates are the other vobjs
+            whose box centers are within max_distance pixels of the box
+            center of the vobj.
+        :param overlap: if True, the candidates are the other vobjs whose
+            boxes overlap with the box of the vobj.
+            Exactly one of max_distance and overlap should be set.
+        See VObjProjector for the other parameters.
+        """
+        if (max_distance is None) == (not overlap):
+            raise ValueError(f"Exactly one of max_distance and overlap "
+                             f"should be set for cross vobj property "
+                             f"{property_name}.")
+        if max_distance is not None and max_distance < 0:
+            raise ValueError(f"Invalid max_distance: {max_distance}, which "
+                             f"should be non-negative.")
+        self.other_class_name = other_class_name
+        self.other_dependencies = list(other_dependencies)
+        self.other_filter_index = other_filter_index
+        self.max_distance = max_distance
+        self.overlap = overlap
+
+        def cross_property_func(dep_data):
+            others = dep_data.pop(_CANDIDATES)
+            return property_func(dep_data, others)
+
+        super().__init__(
+            prev=prev,
+            property_name=property_name,
+            property_func=cross_property_func,
+            dependencies=dependencies,
+            is_stateful=is_stateful,
+            class_name=class_name,
+            filter_index=filter_index,
+        )
+        # the candidates are passed as a dependency on the current frame
+        self._non_hist_dependencies[_CANDIDATES] = 0
+        # ids of the other vobjs in the filter and their max half diagonal,
+        # computed once per frame
+        self._other_vobj_ids = None
+        self._max_half_diagonal = None
+
+    def _get_candidate_vobjs(self, frame, tlbr):
+        index = frame.spatial_index[self.other_class_name]
+        if self.max_distance is not None:
+            return index.neighbors(tlbr, self.max_distance)
+        # boxes overlap only if their centers are closer than the sum of
+        # their half diagonals
+        tlbr = np.asarray(tlbr, dtype=float)
+        if self._max_half_diagonal is None:
+            other_tlbrs = [vobj["tlbr"] for vobj in
+                           frame.vobj_data[self.other_class_name]
+                           if vobj.get("tlbr") is not None]
+            self._max_half_diagonal = max(
+                (_half_diagonal(other) for other in other_tlbrs), default=0)
+        radius = _half_diagonal(tlbr) + self._max_half_diagonal
+        return [vobj for vobj in index.neighbors(tlbr, radius)
+                if _overlap(tlbr, np.asarray(vobj["tlbr"], dtype=float))]
+
+    def _get_candidates(self, frame, vobj_data):
+        tlbr = vobj_data.get("tlbr")
+        if tlbr is None or isinstance(tlbr, InvalidProperty):
+            return []
+        if self._other_vobj_ids is None:
+            other_vobjs = frame.vobj_data[self.other_class_name]
+            if self.other_filter_index is None:
+                indexes = range(len(other_vobjs))
+            else:
+                indexes = frame.filtered_vobjs[self.other_filter_index].get(
+                    self.other_class_name, [])
+            self._other_vobj_ids = {id(other_vobjs[i]) for i in indexes}
+        candidates = []
+        for vobj in self._get_candidate_vobjs(frame, tlbr):
+            if id(vobj) not in self._other_vobj_ids:
+                continue
+            values = {name: vobj.get(name)
+                      for name in self.other_dependencies}
+            if all(value is not None
+                   and not isinstance(value, InvalidProperty)
+                   for value in values.values()):
+                candidates.append(values)
+        return candidates
+
+    def _get_vobj_dependencies(self, frame, vobj_data):
+        dep_data = super()._get_vobj_dependencies(frame, vobj_data)
+        dep_data[_CANDIDATES] = self._get_candidates(frame, vobj_data)
+        return dep_data
+
+    def next(self) -> Frame:
+        self._other_vobj_ids = None
+        self._max_half_diagonal = None
+        return super().next()
+
+
+# name of the dependency of the candidates of CrossVObjProjector
+_CANDIDATES = "__cross_vobj_candidates__"
+
+
+def _half_diagonal(tlbr) -> float:
+    return float(np.hypot(tlbr[2] - tlbr[0], tlbr[3] - tlbr[1])) / 2
+
+
+def _overlap(tlbr, other_tlbr) -> bool:
+    return tlbr[0] <= other_tlbr[2] and other_tlbr[0] <= tlbr[2] \
+        and tlbr[1] <= other_tlbr[3] and other_tlbr[1] <= tlbr[3]
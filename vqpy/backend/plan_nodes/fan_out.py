@@ -0,0 +1,58 @@
+from vqpy.backend.operator.fan_out import FanOut
+from vqpy.backend.plan_nodes.base import AbstractPlanNode
+
+from typing import List
+
+
+class FanOutNode(AbstractPlanNode):
+
+    def __init__(self):
+        self.branches: List["BranchNode"] = []
+        self._operator = None
+        self._launch_args = None
+        super().__init__()
+
+    def add_branch(self) -> "BranchNode":
+        branch = BranchNode(len(self.branches))
+        self.branches.append(branch)
+        self.set_next(branch)
+        return branch
+
+    def to_operator(self, launch_args: dict):
+        # created once and shared by the branches
+        if self._operator is None or self._launch_args is not launch_args:
+            self._operator = FanOut(prev=self.prev.to_operator(launch_args),
+                                    n_branches=len(self.branches))
+            self._launch_args = launch_args
+        return self._operator
+
+    def __str__(self):
+        return f"FanOutNode(n_branches={len(self.branches)}), \n" \
+            f"\tprev={self.prev.__class__.__name__})"
+
+
+class BranchNode(AbstractPlanNode):
+
+    def __init__(self, index: int):
+        self.index = index
+        super().__init__()
+
+    def to_operator(self, launch_args: dict):
+        return self.prev.to_operator(launch_args).branches[self.index]
+
+    def __str__(self):
+        return f"BranchNode(index={self.index}), \n" \
+            f"\tprev={self.prev.__class__.__name__}), \n" \
+            f"\tnext={self.next.__class__.__name__})"
+
+
+def create_fan_out_node(input_node, n_branches: int) -> List[BranchNode]:
+    fan_out_node = input_node.set_next(FanOutNode())
+    return [fan_out_node.add_branch() for _ in range(n_branches)]
+
+
+def find_branch_node(node):
+    # the BranchNode that the plan ending at node starts from, or None
+    while node is not None and not isinstance(node, BranchNode):
+        node = node.get_prev()
+    return node
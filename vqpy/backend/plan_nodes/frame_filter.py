@@ -1,7 +1,13 @@
-from vqpy.backend.operator.frame_filter import VObjFrameFilter
+from vqpy.backend.operator.frame_filter import (
+    VObjFrameFilter,
+    FrameRangeFilter,
+)
 from vqpy.backend.plan_nodes.base import AbstractPlanNode
+from vqpy.backend.plan_nodes.video_reader import VideoReaderNode
 from vqpy.frontend.query import QueryBase
 
+from typing import Tuple
+
 
 class VObjFrameFilterNode(AbstractPlanNode):
 
@@ -19,6 +25,37 @@ class VObjFrameFilterNode(AbstractPlanNode):
             f"\tnext={self.next.__class__.__name__})"
 
 
+class FrameRangeFilterNode(AbstractPlanNode):
+
+    def __init__(self, frame_id_range: Tuple[int, int]):
+        self.frame_id_range = frame_id_range
+        super().__init__()
+
+    def to_operator(self, lauch_args: dict):
+        return FrameRangeFilter(prev=self.prev.to_operator(lauch_args),
+                                frame_id_range=self.frame_id_range)
+
+    def __str__(self):
+        return f"FrameRangeFilterNode(frame_id_range={self.frame_id_range})" \
+            f", \n\tprev={self.prev.__class__.__name__}), \n" \
+            f"\tnext={self.next.__class__.__name__})"
+
+
 def create_frame_filter_node(query_obj: QueryBase, input_node):
     output_node = input_node.set_next(VObjFrameFilterNode(filter_index=0))
     return output_node
+
+
+def create_frame_range_filter_node(input_node,
+                                   frame_id_range: Tuple[int, int]):
+    if isinstance(input_node, VideoReaderNode):
+        # push the range down into the video reader, which seeks to the
+        # start frame instead of decoding and filtering the frames before it
+        if input_node.frame_id_range is not None:
+            start, end = input_node.frame_id_range
+            start = max(start, frame_id_range[0])
+            end = max(start, min(end, frame_id_range[1]))
+            frame_id_range = (start, end)
+        input_node.frame_id_range = frame_id_range
+        return input_node
+    return input_node.set_next(FrameRangeFilterNode(frame_id_range))
@@ -0,0 +1,42 @@
+from vqpy.backend.operator.frame_sampler import FrameSampler
+from vqpy.backend.plan_nodes.base import AbstractPlanNode
+
+from typing import Optional
+
+
+class FrameSamplerNode(AbstractPlanNode):
+
+    def __init__(self,
+                 stride: int = 1,
+                 target_fps: Optional[float] = None,
+                 max_stride: Optional[int] = None,
+                 ):
+        self.stride = stride
+        self.target_fps = target_fps
+        self.max_stride = max_stride
+        super().__init__()
+
+    def to_operator(self, launch_args: dict):
+        return FrameSampler(prev=self.prev.to_operator(launch_args),
+                            stride=self.stride,
+                            target_fps=self.target_fps,
+                            max_stride=self.max_stride)
+
+    def __str__(self):
+        return f"FrameSamplerNode(stride={self.stride}, \n" \
+            f"\ttarget_fps={self.target_fps}, \n" \
+            f"\tmax_stride={self.max_stride}), \n" \
+            f"\tprev={self.prev.__class__.__name__}), \n" \
+            f"\tnext={self.next.__class__.__name__})"
+
+
+def create_frame_sampler_node(input_node,
+                              stride: int = 1,
+                              target_fps: Optional[float] = None,
+                              max_stride: Optional[int] = None):
+    if stride == 1 and target_fps is None and max_stride is None:
+        # every frame is sampled
+        return input_node
+    return input_node.set_next(FrameSamplerNode(stride=stride,
+                                                target_fps=target_fps,
+                                                max_stride=max_stride))
@@ -1,9 +1,18 @@
 from vqpy.backend.operator.object_detector import ObjectDetector
 from vqpy.backend.plan_nodes.base import AbstractPlanNode
+from vqpy.backend.plan_nodes.vobj_projector import (
+    get_cross_vobjs,
+    split_predicate,
+)
 from vqpy.frontend.query import QueryBase
-from vqpy.frontend.vobj.predicates import Predicate
+from vqpy.frontend.vobj.predicates import Predicate, WithinRegions
 
-from typing import Optional, Set, Union
+from typing import List, Optional, Set, Tuple, Union
+
+# pixels added around the regions of the query to the roi of detection, so
+# that objects with the anchor inside the regions are not cut by the crop.
+# It can be set per vobj with the detector_roi_margin attribute.
+DEFAULT_ROI_MARGIN = 100
 
 
 class ObjectDetectorNode(AbstractPlanNode):
@@ -11,9 +20,13 @@ class ObjectDetectorNode(AbstractPlanNode):
     def __init__(self,
                  class_names: Union[str, Set[str]],
                  detector_name: Optional[str] = None,
-                 detector_kwargs: dict = None):
+                 detector_kwargs: dict = None,
+                 batch_size: int = 1,
+                 roi: Optional[Tuple[float, float, float, float]] = None):
         self.class_names = class_names
         self.detector_name = detector_name
+        self.batch_size = batch_size
+        self.roi = roi
         self.detector_kwargs = detector_kwargs \
             if detector_kwargs is not None else dict()
         super().__init__()
@@ -23,21 +36,124 @@ class ObjectDetectorNode(AbstractPlanNode):
             prev=self.prev.to_operator(launch_args),
             class_names=self.class_names,
             detector_name=self.detector_name,
+            batch_size=self.batch_size,
+            cache_dir=launch_args.get("detection_cache_dir"),
+            video_path=launch_args.get("video_path"),
+            roi=self.roi,
+            decoder=launch_args.get("decoder", "opencv"),
+            decoder_kwargs=launch_args.get("decoder_kwargs"),
             **self.detector_kwargs
         )
 
+    def __str__(self):
+        return f"ObjectDetectorNode(class_names={self.class_names}, \n" \
+            f"\tdetector_name={self.detector_name}, \n" \
+            f"\tbatch_size={self.batch_size}, \n" \
+            f"\troi={self.roi}), \n" \
+            f"\tprev={self.prev.__class__.__name__}), \n"\
+            f"\tnext={self.next.__class__.__name__})"
+
+
+def get_detection_roi(frame_constraints: Predicate, vobj):
+    """
+    The region of interest (x1, y1, x2, y2) of the detection of the query,
+    which is the intersection of the bounding boxes of the WithinRegions
+    predicates in the conjunction of frame_constraints, expanded by the
+    margin. Returns None if there are no such predicates, or if the
+    intersection is empty.
+    """
+    rois = [predicate.get_roi()
+            for predicate in split_predicate(frame_constraints)
+            if isinstance(predicate, WithinRegions)]
+    if not rois:
+        return None
+    margin = getattr(vobj, "detector_roi_margin", DEFAULT_ROI_MARGIN)
+    x1 = max(roi[0] for roi in rois) - margin
+    y1 = max(roi[1] for roi in rois) - margin
+    x2 = min(roi[2] for roi in rois) + margin
+    y2 = min(roi[3] for roi in rois) + margin
+    if x1 >= x2 or y1 >= y2:
+        return None
+    return x1, y1, x2, y2
+
+
+def _union_roi(rois):
+    # the roi covering all rois, or None if any of them is the full frame
+    if not rois or any(roi is None for roi in rois):
+        return None
+    return (min(roi[0] for roi in rois), min(roi[1] for roi in rois),
+            max(roi[2] for roi in rois), max(roi[3] for roi in rois))
 
-def create_object_detector_node(query_obj: QueryBase, input_node):
+
+def create_object_detector_node(query_obj: QueryBase, input_node,
+                                crop_detection_roi: bool = True):
     frame_constraints = query_obj.frame_constraint()
     assert isinstance(frame_constraints, Predicate)
     vobjs = frame_constraints.get_vobjs()
     assert len(vobjs) == 1, "Only support one vobj in the predicate"
     vobj = list(vobjs)[0]
+    if get_cross_vobjs(query_obj):
+        # the other classes of cross vobj properties may share the detector
+        return create_shared_object_detector_nodes(
+            [query_obj], input_node, crop_detection_roi=crop_detection_roi)
     class_names = vobj.class_name
     detector_name = vobj.object_detector
     detector_kwargs = vobj.detector_kwargs
+    batch_size = getattr(vobj, "detector_batch_size", 1)
+    roi = get_detection_roi(frame_constraints, vobj) \
+        if crop_detection_roi else None
     return input_node.set_next(
         ObjectDetectorNode(class_names=class_names,
                            detector_name=detector_name,
-                           detector_kwargs=detector_kwargs)
+                           detector_kwargs=detector_kwargs,
+                           batch_size=batch_size,
+                           roi=roi)
     )
+
+
+def create_shared_object_detector_nodes(query_objs: List[QueryBase],
+                                        input_node,
+                                        crop_detection_roi: bool = True):
+    # one detector per detector setting, which detects the classes of all
+    # queries using the setting, in the union of their rois. The other
+    # classes of cross vobj properties are detected on the full frames.
+    settings = dict()
+    for query_obj in query_objs:
+        frame_constraints = query_obj.frame_constraint()
+        assert isinstance(frame_constraints, Predicate)
+        vobjs = frame_constraints.get_vobjs()
+        assert len(vobjs) == 1, "Only support one vobj in the predicate"
+        vobj = list(vobjs)[0]
+        roi = get_detection_roi(frame_constraints, vobj) \
+            if crop_detection_roi else None
+        detected = [(vobj, roi)] + [
+            (cross_vobj, None)
+            for cross_vobj in get_cross_vobjs(query_obj).values()]
+        for vobj, roi in detected:
+            detector_kwargs = vobj.detector_kwargs or dict()
+            batch_size = getattr(vobj, "detector_batch_size", 1)
+            key = (vobj.object_detector,
+                   repr(sorted(detector_kwargs.items())), batch_size)
+            if key not in settings:
+                settings[key] = (vobj.object_detector, detector_kwargs,
+                                 batch_size, set(), [])
+            settings[key][3].add(vobj.class_name)
+            settings[key][4].append(roi)
+
+    detector_names = dict()
+    for detector_name, detector_kwargs, batch_size, class_names, rois in \
+            settings.values():
+        for class_name in class_names:
+            if class_name in detector_names:
+                raise ValueError(
+                    f"Class {class_name} is detected with different detector "
+                    f"settings by the queries, which can not be shared.")
+            detector_names[class_name] = detector_name
+        input_node = input_node.set_next(
+            ObjectDetectorNode(class_names=class_names,
+                               detector_name=detector_name,
+                               detector_kwargs=detector_kwargs,
+                               batch_size=batch_size,
+                               roi=_union_roi(rois))
+        )
+    return input_node
@@ -0,0 +1,22 @@
+from vqpy.backend.operator.prefetcher import Prefetcher
+from vqpy.backend.plan_nodes.base import AbstractPlanNode
+
+
+class PrefetcherNode(AbstractPlanNode):
+
+    def __init__(self, max_queue_size: int = 8):
+        self.max_queue_size = max_queue_size
+        super().__init__()
+
+    def to_operator(self, launch_args: dict):
+        return Prefetcher(prev=self.prev.to_operator(launch_args),
+                          max_queue_size=self.max_queue_size)
+
+    def __str__(self):
+        return f"PrefetcherNode(max_queue_size={self.max_queue_size}), \n" \
+            f"\tprev={self.prev.__class__.__name__}), \n" \
+            f"\tnext={self.next.__class__.__name__})"
+
+
+def create_prefetcher_node(input_node, max_queue_size: int = 8):
+    return input_node.set_next(PrefetcherNode(max_queue_size=max_queue_size))
@@ -1,10 +1,11 @@
 from vqpy.backend.operator.tracker import Tracker
 from vqpy.backend.plan_nodes.base import AbstractPlanNode
+from vqpy.backend.plan_nodes.vobj_projector import get_cross_vobjs
 
 from vqpy.frontend.query import QueryBase
 from vqpy.frontend.vobj.predicates import Predicate
 
-from typing import Optional
+from typing import List, Optional
 
 
 class TrackerNode(AbstractPlanNode):
@@ -44,6 +45,36 @@ def create_tracker_node(query_obj: QueryBase, input_node):
     assert len(vobjs) == 1, "Only support one vobj in the predicate"
     vobj = list(vobjs)[0]
     class_name = vobj.class_name
-    return input_node.set_next(
-        TrackerNode(class_name=class_name)
+    tracker_name = getattr(vobj, "tracker_name", "byte")
+    output_node = input_node.set_next(
+        TrackerNode(class_name=class_name, tracker_name=tracker_name)
     )
+    # the other vobjs of cross vobj properties are tracked as well
+    for class_name, cross_vobj in get_cross_vobjs(query_obj).items():
+        output_node = output_node.set_next(TrackerNode(
+            class_name=class_name,
+            tracker_name=getattr(cross_vobj, "tracker_name", "byte")))
+    return output_node
+
+
+def create_shared_tracker_nodes(query_objs: List[QueryBase], input_node):
+    # one tracker per class, shared by the queries on the class
+    tracker_names = dict()
+    for query_obj in query_objs:
+        frame_constraints = query_obj.frame_constraint()
+        assert isinstance(frame_constraints, Predicate)
+        vobjs = frame_constraints.get_vobjs()
+        assert len(vobjs) == 1, "Only support one vobj in the predicate"
+        vobj = list(vobjs)[0]
+        for vobj in [vobj] + list(get_cross_vobjs(query_obj).values()):
+            tracker_name = getattr(vobj, "tracker_name", "byte")
+            if tracker_names.setdefault(vobj.class_name, tracker_name) != \
+                    tracker_name:
+                raise ValueError(
+                    f"Class {vobj.class_name} is tracked with different "
+                    f"trackers by the queries, which can not be shared.")
+    for class_name, tracker_name in tracker_names.items():
+        input_node = input_node.set_next(
+            TrackerNode(class_name=class_name, tracker_name=tracker_name)
+        )
+    return input_node
@@ -1,11 +1,38 @@
 from vqpy.backend.operator.video_reader import VideoReader
+from vqpy.backend.operator.stream_reader import StreamReader, is_stream_url
 from vqpy.backend.plan_nodes.base import AbstractPlanNode
 
+from typing import Optional, Tuple
+
 
 class VideoReaderNode(AbstractPlanNode):
 
-    def __init__(self):
+    def __init__(self, frame_id_range: Optional[Tuple[int, int]] = None):
+        self.frame_id_range = frame_id_range
         super().__init__()
 
     def to_operator(self, lauch_args: dict):
-        return VideoReader(lauch_args["video_path"])
+        if is_stream_url(lauch_args["video_path"]):
+            if self.frame_id_range is not None:
+                raise ValueError("frame_id_range is not supported for live "
+                                 "streams.")
+            return StreamReader(
+                lauch_args["video_path"],
+                drop_policy=lauch_args.get("stream_drop_policy",
+                                           "drop_oldest"),
+                max_reconnect_attempts=lauch_args.get(
+                    "stream_max_reconnect_attempts"),
+                headless=lauch_args.get("headless"),
+                interrupt_hook=lauch_args.get("interrupt_hook"),
+            )
+        return VideoReader(lauch_args["video_path"],
+                           frame_id_range=self.frame_id_range,
+                           headless=lauch_args.get("headless"),
+                           interrupt_hook=lauch_args.get("interrupt_hook"),
+                           decoder=lauch_args.get("decoder", "opencv"),
+                           **(lauch_args.get("decoder_kwargs") or dict()))
+
+    def __str__(self):
+        return f"VideoReaderNode(frame_id_range={self.frame_id_range}), \n" \
+            f"\tprev={self.prev.__class__.__name__}), \n" \
+            f"\tnext={self.next.__class__.__name__})"
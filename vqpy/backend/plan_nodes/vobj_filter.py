@@ -1,5 +1,6 @@
 from vqpy.backend.operator.vobj_filter import VObjFilter
 from vqpy.backend.plan_nodes.base import AbstractPlanNode
+from vqpy.backend.predicate_compiler import compile_predicate
 from vqpy.frontend.vobj.predicates import Predicate, IsInstance
 from vqpy.frontend.query import QueryBase
 
@@ -14,6 +15,16 @@ class VObjFilterNode(AbstractPlanNode):
         super().__init__()
 
     def to_operator(self, lauch_args: dict):
+        # evaluate the predicate on the columns of all vobjs at once if
+        # possible
+        vectorized_func = compile_predicate(self.predicate)
+        if vectorized_func is not None:
+            return VObjFilter(
+                prev=self.prev.to_operator(lauch_args),
+                condition_func=vectorized_func,
+                filter_index=self.filter_index,
+                vectorized=True,
+            )
         return VObjFilter(
             prev=self.prev.to_operator(lauch_args),
             condition_func=self.predicate.generate_condition_function(),
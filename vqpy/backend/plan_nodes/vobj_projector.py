@@ -1,10 +1,20 @@
-from typing import Any, Callable, Dict
-from vqpy.backend.operator.vobj_projector import VObjProjector
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional
+from vqpy.backend.operator.vobj_projector import (
+    CrossVObjProjector, VObjProjector
+)
 from vqpy.backend.plan_nodes.base import AbstractPlanNode
 from vqpy.frontend.query import QueryBase
-from vqpy.frontend.vobj.predicates import Predicate
-from vqpy.frontend.vobj.property import Property, BuiltInProperty
-from vqpy.backend.plan_nodes.vobj_filter import create_vobj_filter_node_pred
+from vqpy.frontend.vobj.predicates import (
+    Predicate, And, Or, Not, Equal, GreaterThan, Compare, IsInstance
+)
+from vqpy.frontend.vobj.property import (
+    Property, BuiltInProperty, CrossVObjProperty, VobjProperty
+)
+from vqpy.frontend.vobj.common import get_dep_properties
+from vqpy.backend.plan_nodes.vobj_filter import (
+    VObjFilterNode, create_vobj_filter_node_pred
+)
 
 
 class ProjectionField:
@@ -14,11 +24,13 @@ class ProjectionField:
         field_func: Callable[[Dict], Any],
         dependent_fields: Dict[str, int],
         is_stateful: bool,
+        is_vectorized: bool = False,
     ):
         self.field_name = field_name
         self.field_func = field_func
         self.dependent_fields = dependent_fields
         self.is_stateful = is_stateful
+        self.is_vectorized = is_vectorized
 
 
 class ProjectorNode(AbstractPlanNode):
@@ -42,6 +54,7 @@ class ProjectorNode(AbstractPlanNode):
             is_stateful=self.projection_field.is_stateful,
             class_name=self.class_name,
             filter_index=self.filter_index,
+            vectorized=self.projection_field.is_vectorized,
         )
 
     def __str__(self):
@@ -56,6 +69,128 @@ class ProjectorNode(AbstractPlanNode):
         )
 
 
+class CrossProjectorNode(ProjectorNode):
+    def __init__(
+        self,
+        class_name: str,
+        projection_field: ProjectionField,
+        filter_index: int,
+        other_class_name: str,
+        other_fields: List[str],
+        other_filter_index: Optional[int],
+        max_distance: Optional[float] = None,
+        overlap: bool = False,
+    ):
+        self.other_class_name = other_class_name
+        self.other_fields = other_fields
+        self.other_filter_index = other_filter_index
+        self.max_distance = max_distance
+        self.overlap = overlap
+        super().__init__(class_name, projection_field, filter_index)
+
+    def to_operator(self, launch_args: dict):
+        return CrossVObjProjector(
+            prev=self.prev.to_operator(launch_args),
+            property_name=self.projection_field.field_name,
+            property_func=self.projection_field.field_func,
+            dependencies=self.projection_field.dependent_fields,
+            is_stateful=self.projection_field.is_stateful,
+            class_name=self.class_name,
+            other_class_name=self.other_class_name,
+            other_dependencies=self.other_fields,
+            filter_index=self.filter_index,
+            other_filter_index=self.other_filter_index,
+            max_distance=self.max_distance,
+            overlap=self.overlap,
+        )
+
+    def __str__(self):
+        return (
+            f"CrossProjectorNode(class_name={self.class_name}, \n"
+            f"\tproperty_name={self.projection_field.field_name}, \n"
+            f"\tfilter_index={self.filter_index}), \n"
+            f"\tdependencies={self.projection_field.dependent_fields}),\n"
+            f"\tother_class_name={self.other_class_name}, \n"
+            f"\tother_fields={self.other_fields}, \n"
+            f"\tother_filter_index={self.other_filter_index}, \n"
+            f"\tmax_distance={self.max_distance}, \n"
+            f"\toverlap={self.overlap}), \n"
+            f"\tprev={self.prev.__class__.__name__}), \n"
+            f"\text={self.next.__class__.__name__})"
+        )
+
+
+def get_cross_vobjs(query_obj: QueryBase) -> Dict[str, Any]:
+    """
+    The other vobjs of the cross vobj properties used by the query, keyed
+    by class name in sorted order, except the class of the query vobj.
+    """
+    props = []
+    frame_constraints = query_obj.frame_constraint()
+    if isinstance(frame_constraints, Predicate):
+        props.extend(frame_constraints.get_vobj_properties())
+    frame_output = query_obj.frame_output()
+    if isinstance(frame_output, Property):
+        frame_output = [frame_output]
+    props.extend(frame_output)
+    cross_vobjs = dict()
+    for prop in props:
+        for dep in get_dep_properties(prop):
+            if isinstance(dep, CrossVObjProperty):
+                cross_vobjs.setdefault(dep.other_vobj.class_name,
+                                       dep.other_vobj)
+    for vobj in frame_constraints.get_vobjs():
+        cross_vobjs.pop(vobj.class_name, None)
+    return dict(sorted(cross_vobjs.items()))
+
+
+def get_cross_filter_indexes(query_obj: QueryBase) -> Dict[str, int]:
+    """
+    The filter index of the vobjs of each class used by the cross vobj
+    properties of the query. The query vobj uses filter index 0, and the
+    other classes use the next indexes.
+    """
+    indexes = {vobj.class_name: 0
+               for vobj in query_obj.frame_constraint().get_vobjs()}
+    for i, class_name in enumerate(get_cross_vobjs(query_obj)):
+        indexes[class_name] = i + 1
+    return indexes
+
+
+def create_cross_vobj_nodes(query_obj: QueryBase, input_node):
+    """
+    Filter the vobjs of the other classes of the cross vobj properties of
+    the query into their filter indexes, and project the properties of the
+    other vobjs used by the cross vobj properties.
+    """
+    node = input_node
+    filter_indexes = get_cross_filter_indexes(query_obj)
+    for class_name, vobj in get_cross_vobjs(query_obj).items():
+        node = node.set_next(VObjFilterNode(
+            predicate=IsInstance(vobj),
+            filter_index=filter_indexes[class_name]))
+    # properties of the other vobjs, once per class and name
+    projected = set()
+    frame_constraints = query_obj.frame_constraint()
+    frame_output = query_obj.frame_output()
+    if isinstance(frame_output, Property):
+        frame_output = [frame_output]
+    for prop in frame_constraints.get_vobj_properties() + list(frame_output):
+        for dep in get_dep_properties(prop):
+            if not isinstance(dep, CrossVObjProperty):
+                continue
+            class_name = dep.other_vobj.class_name
+            for other_prop in dep.get_other_dep_properties():
+                for p in get_dep_properties(other_prop):
+                    if (class_name, p.name) in projected:
+                        continue
+                    projected.add((class_name, p.name))
+                    node = node.set_next(_create_projector_node(
+                        class_name, p, filter_indexes[class_name],
+                        filter_indexes))
+    return node
+
+
 def create_pre_filter_projector(query_obj: QueryBase, input_node):
     frame_constraints = query_obj.frame_constraint()
 
@@ -68,17 +203,10 @@ def create_pre_filter_projector(query_obj: QueryBase, input_node):
         assert len(vobjs) == 1, "Only support one vobj in the predicate"
         vobj = list(vobjs)[0]
         vobj_properties = frame_constraints.get_vobj_properties()
+        filter_indexes = get_cross_filter_indexes(query_obj)
         for p in vobj_properties:
-            projector_node = ProjectorNode(
-                class_name=vobj.class_name,
-                projection_field=ProjectionField(
-                    field_name=p.name,
-                    field_func=p,
-                    dependent_fields=p.inputs,
-                    is_stateful=p.stateful,
-                ),
-                filter_index=0,
-            )
+            projector_node = _create_projector_node(
+                vobj.class_name, p, cross_filter_indexes=filter_indexes)
             node = node.set_next(projector_node)
         vobj_properties_map[vobj] = vobj_properties
 
@@ -116,50 +244,144 @@ def get_prop_pred_map(predicates):
     return prop_pred_map, rest_predicates
 
 
-def create_projector_adjacent_to_filter(query_obj: QueryBase, input_node):
+# relative per-vobj costs of computing properties, used when the cost is
+# not declared with vobj_property
+_PROPERTY_COST = 1.0
+# properties on the vobj images usually run a model on each crop
+_IMAGE_PROPERTY_COST = 100.0
+_VECTORIZED_PROPERTY_COST_RATIO = 0.1
+
+# estimated fractions of vobjs that satisfy comparisons
+_EQUAL_SELECTIVITY = 0.1
+_GREATER_THAN_SELECTIVITY = 1 / 3
+_COMPARE_SELECTIVITY = 0.5
+
+
+def estimate_property_cost(prop) -> float:
+    """Relative cost of computing the vobj property for one vobj."""
+    if prop.cost is not None:
+        return prop.cost
+    cost = _IMAGE_PROPERTY_COST if "image" in prop.inputs else _PROPERTY_COST
+    if prop.vectorized:
+        cost *= _VECTORIZED_PROPERTY_COST_RATIO
+    return cost
+
+
+def estimate_selectivity(predicate: Predicate) -> float:
+    """Estimated fraction of vobjs that satisfy the predicate."""
+    if isinstance(predicate, And):
+        return estimate_selectivity(predicate.left_pred) \
+            * estimate_selectivity(predicate.right_pred)
+    if isinstance(predicate, Or):
+        left = estimate_selectivity(predicate.left_pred)
+        right = estimate_selectivity(predicate.right_pred)
+        return left + right - left * right
+    if isinstance(predicate, Not):
+        return 1 - estimate_selectivity(predicate.pred)
+    if isinstance(predicate, Equal):
+        return _EQUAL_SELECTIVITY
+    if isinstance(predicate, GreaterThan):
+        return _GREATER_THAN_SELECTIVITY
+    if isinstance(predicate, Compare):
+        return _COMPARE_SELECTIVITY
+    return 1.0
+
+
+def get_adjacent_steps(predicate: Predicate, vobj_properties):
+    # projectors and filters in the order of the properties, where each
+    # filter on a single property is right after its projector and the
+    # other filters are at the end
+    predicates = split_predicate(predicate)
+    prop_pred_map, rest_predicates = get_prop_pred_map(predicates)
+    steps = []
+    for p in vobj_properties:
+        steps.append(p)
+        steps.extend(prop_pred_map.get(p.name, []))
+    steps.extend(rest_predicates)
+    return steps
+
+
+def order_steps_by_cost(steps):
+    """
+    Reorder the filters of conjunctive predicates by cost, so that cheap
+    and selective filters run first and the projectors of expensive
+    properties only see the vobjs that pass them. Filters are ordered by
+    rank, the cost of the properties they still need divided by the
+    fraction of vobjs they remove, and each projector is moved right before
+    the first filter that needs it.
+    Stateful projectors and the filters around them are not reordered, so
+    that stateful properties see the same vobjs and history as in steps.
+    """
+    # split steps before each stateful projector
+    segments = [[]]
+    for step in steps:
+        if not isinstance(step, Predicate) and step.stateful:
+            segments.append([])
+        segments[-1].append(step)
+
+    ordered = []
+    computed = set()
+
+    def add_projector(prop):
+        if prop.name not in computed:
+            ordered.append(prop)
+            computed.add(prop.name)
+
+    def rank(predicate):
+        cost = sum(estimate_property_cost(p)
+                   for p in predicate.get_vobj_properties()
+                   if p.name not in computed)
+        return cost / max(1 - estimate_selectivity(predicate), 1e-6)
+
+    for segment in segments:
+        if segment and not isinstance(segment[0], Predicate) \
+                and segment[0].stateful:
+            add_projector(segment[0])
+        predicates = [step for step in segment
+                      if isinstance(step, Predicate)]
+        while predicates:
+            # ties are broken by selectivity, then by the order in steps
+            best = min(predicates,
+                       key=lambda pred: (rank(pred),
+                                         estimate_selectivity(pred)))
+            predicates.remove(best)
+            for p in best.get_vobj_properties():
+                add_projector(p)
+            ordered.append(best)
+        # projectors that no filter in the segment needs, e.g. the
+        # dependencies of the next stateful projector
+        for step in segment:
+            if not isinstance(step, Predicate):
+                add_projector(step)
+    return ordered
+
+
+def create_projector_adjacent_to_filter(
+    query_obj: QueryBase, input_node, reorder_predicates: bool = True
+):
     frame_constraints = query_obj.frame_constraint()
 
     node = input_node
 
     vobj_properties_map = dict()
 
-    predicates = split_predicate(frame_constraints)
-    prop_pred_map, rest_predicates = get_prop_pred_map(predicates)
-
     if isinstance(frame_constraints, Predicate):
         vobjs = frame_constraints.get_vobjs()
         assert len(vobjs) == 1, "Only support one vobj in the predicate"
         vobj = list(vobjs)[0]
         vobj_properties = frame_constraints.get_vobj_properties()
-        for p in vobj_properties:
-            projector_node = ProjectorNode(
-                class_name=vobj.class_name,
-                projection_field=ProjectionField(
-                    field_name=p.name,
-                    field_func=p,
-                    dependent_fields=p.inputs,
-                    is_stateful=p.stateful,
-                ),
-                filter_index=0,
-            )
+        steps = get_adjacent_steps(frame_constraints, vobj_properties)
+        if reorder_predicates:
+            steps = order_steps_by_cost(steps)
+        filter_indexes = get_cross_filter_indexes(query_obj)
+        for step in steps:
+            if isinstance(step, Predicate):
+                node = create_vobj_filter_node_pred(step, node)
+                continue
+            projector_node = _create_projector_node(
+                vobj.class_name, step, cross_filter_indexes=filter_indexes)
             node = node.set_next(projector_node)
 
-            # add filter node adjacent to the projector node
-            # if the property is used in a comparison predicate
-            if p.name in prop_pred_map:
-                for predicate in prop_pred_map[p.name]:
-                    filter_node = create_vobj_filter_node_pred(
-                        predicate, node
-                    )
-                    node = projector_node.set_next(filter_node)
-
-            # add filter node for the rest predicates
-        for predicate in rest_predicates:
-            filter_node = create_vobj_filter_node_pred(
-                predicate, node
-            )
-            node = node.set_next(filter_node)
-
         vobj_properties_map[vobj] = vobj_properties
 
     return node, vobj_properties_map
@@ -169,6 +391,7 @@ def create_frame_output_projector(
     query_vobj: QueryBase, input_node, vobj_properties_map: dict
 ):
     existing_vobj_properties = vobj_properties_map.copy()
+    filter_indexes = get_cross_filter_indexes(query_vobj)
     frame_output = query_vobj.frame_output()
     if isinstance(frame_output, Property):
         frame_output = [frame_output]
@@ -179,16 +402,136 @@ def create_frame_output_projector(
         existing_properties = existing_vobj_properties[vobj]
         if not isinstance(prop, BuiltInProperty):
             if all([prop.func != ep.func for ep in existing_properties]):
-                projector_node = ProjectorNode(
-                    class_name=vobj.class_name,
-                    projection_field=ProjectionField(
-                        field_name=prop.name,
-                        field_func=prop,
-                        dependent_fields=prop.inputs,
-                        is_stateful=prop.stateful,
-                    ),
-                    filter_index=0,
-                )
+                projector_node = _create_projector_node(
+                    vobj.class_name, prop,
+                    cross_filter_indexes=filter_indexes)
                 input_node = input_node.set_next(projector_node)
                 existing_properties.append(prop)
     return input_node
+
+
+def _create_projector_node(class_name: str, prop: VobjProperty,
+                           filter_index: int = 0,
+                           cross_filter_indexes: Dict[str, int] = None):
+    # cross_filter_indexes is the filter index of each class, see
+    # get_cross_filter_indexes. Cross vobj properties use all vobjs of the
+    # other class if it is missing.
+    projection_field = ProjectionField(
+        field_name=prop.name,
+        field_func=prop,
+        dependent_fields=prop.inputs,
+        is_stateful=prop.stateful,
+        is_vectorized=prop.vectorized,
+    )
+    if isinstance(prop, CrossVObjProperty):
+        other_class_name = prop.other_vobj.class_name
+        return CrossProjectorNode(
+            class_name=class_name,
+            projection_field=projection_field,
+            filter_index=filter_index,
+            other_class_name=other_class_name,
+            other_fields=prop.other_inputs,
+            other_filter_index=(cross_filter_indexes or dict()).get(
+                other_class_name),
+            max_distance=prop.max_distance,
+            overlap=prop.overlap,
+        )
+    return ProjectorNode(
+        class_name=class_name,
+        projection_field=projection_field,
+        filter_index=filter_index,
+    )
+
+
+def _remove_node(node):
+    prev_node, next_node = node.get_prev(), node.get_next()
+    if prev_node is not None:
+        prev_node.next = next_node
+    if next_node is not None:
+        next_node.prev = prev_node
+    node.prev = node.next = None
+
+
+def _insert_before(node, new_node):
+    prev = node.get_prev()
+    if prev is not None:
+        prev.set_next(new_node)
+    new_node.set_next(node)
+
+
+def optimize_projectors(query_obj: QueryBase, output_node):
+    """
+    Dataflow pass over the projectors of the plan ending at output_node.
+    Following the dependency DAG of the vobj properties of each class, it
+    projects each property exactly once, after all properties it depends on,
+    and removes the projectors whose values are not used by any filter, by
+    frame_output, or by the properties depending on them.
+    A duplicate projector is dropped in favor of the first one, which runs on
+    a superset of its vobjs since filters only remove vobjs.
+    Projectors are grouped by class and filter index, since the vobjs of the
+    other classes of cross vobj properties use their own filter indexes.
+    Returns the output node of the optimized plan.
+    """
+    filter_indexes = get_cross_filter_indexes(query_obj)
+    nodes = []
+    node = output_node
+    while node is not None:
+        nodes.append(node)
+        node = node.get_prev()
+    nodes.reverse()
+
+    # forward pass: remove duplicates and add missing dependencies
+    computed = defaultdict(set)
+    live_nodes = []
+    removed = set()
+    for node in nodes:
+        if not isinstance(node, ProjectorNode):
+            live_nodes.append(node)
+            continue
+        names = computed[(node.class_name, node.filter_index)]
+        field = node.projection_field
+        if field.field_name in names:
+            _remove_node(node)
+            removed.add(node)
+            continue
+        if isinstance(field.field_func, VobjProperty):
+            # dependencies in topological order, ending with the property
+            for dep in get_dep_properties(field.field_func)[:-1]:
+                if dep.name not in names:
+                    dep_node = _create_projector_node(
+                        node.class_name, dep, node.filter_index,
+                        filter_indexes)
+                    _insert_before(node, dep_node)
+                    live_nodes.append(dep_node)
+                    names.add(dep.name)
+        names.add(field.field_name)
+        live_nodes.append(node)
+
+    # backward pass: remove projectors whose values are never used
+    used = defaultdict(set)
+    frame_output = query_obj.frame_output()
+    if isinstance(frame_output, Property):
+        frame_output = [frame_output]
+    for prop in frame_output:
+        for vobj in prop.get_vobjs():
+            used[(vobj.class_name, 0)].add(prop.name)
+    for node in reversed(live_nodes):
+        if isinstance(node, VObjFilterNode):
+            predicate = node.predicate
+            names = predicate.get_self_vobj_property_names() | {
+                p.name for p in predicate.get_vobj_properties()}
+            for vobj in predicate.get_vobjs():
+                used[(vobj.class_name, node.filter_index)] |= names
+        elif isinstance(node, ProjectorNode):
+            field = node.projection_field
+            key = (node.class_name, node.filter_index)
+            if field.field_name not in used[key]:
+                _remove_node(node)
+                removed.add(node)
+                continue
+            used[key] |= set(field.dependent_fields)
+            if isinstance(node, CrossProjectorNode):
+                used[(node.other_class_name, node.other_filter_index)] |= \
+                    set(node.other_fields)
+    # projectors are only inserted before other nodes
+    return next(node for node in reversed(nodes) if node not in removed)
@@ -1,51 +1,98 @@
 from vqpy.backend.operator import CustomizedVideoReader
-from vqpy.backend.plan_nodes.frame_filter import create_frame_filter_node
+from vqpy.backend.plan_nodes.frame_filter import (
+    create_frame_filter_node,
+    create_frame_range_filter_node,
+)
 from vqpy.backend.plan_nodes.output_formatter import (
     create_frame_output_formatter,
 )
-from vqpy.backend.plan_nodes.tracker import create_tracker_node
+from vqpy.backend.plan_nodes.tracker import (
+    create_tracker_node,
+    create_shared_tracker_nodes,
+)
 from vqpy.backend.plan_nodes.vobj_filter import (
     create_vobj_class_filter_node,
     # create_vobj_filter_node_query,
 )
 from vqpy.backend.plan_nodes.vobj_projector import (
+    create_cross_vobj_nodes,
     create_frame_output_projector,
     # create_pre_filter_projector,
-    create_projector_adjacent_to_filter
+    create_projector_adjacent_to_filter,
+    optimize_projectors,
 )
 from vqpy.backend.plan_nodes.base import AbstractPlanNode
-from vqpy.backend.plan_nodes.object_detector import create_object_detector_node
+from vqpy.backend.profiler import Profiler
+from vqpy.backend.plan_nodes.object_detector import (
+    create_object_detector_node,
+    create_shared_object_detector_nodes,
+)
+from vqpy.backend.plan_nodes.fan_out import create_fan_out_node
+from vqpy.backend.plan_nodes.prefetcher import create_prefetcher_node
+from vqpy.backend.plan_nodes.frame_sampler import create_frame_sampler_node
 from vqpy.backend.plan_nodes.video_reader import VideoReaderNode
 from vqpy.frontend.query import QueryBase
 from vqpy.backend.plan_nodes import create_cust_video_reader_node
+from typing import List, Tuple
 
 
 class Planner:
-    def print_plan(self, node: AbstractPlanNode = None):
+    def print_plan(self, node: AbstractPlanNode = None,
+                   until: AbstractPlanNode = None,
+                   profiler: Profiler = None):
+        # print the plan from node back to the input node, or to until.
+        # With a profiler, the stats of the operator of each node are
+        # printed below it.
         print(node)
-        if node.get_prev() is not None:
-            self.print_plan(node.get_prev())
+        if profiler is not None and profiler.get_stats(node) is not None:
+            print(f"\t{profiler.get_stats(node)}")
+        if node.get_prev() is not None and node is not until:
+            self.print_plan(node.get_prev(), until, profiler)
 
-    def parse(
+    def _create_input_node(
         self,
-        query_obj: QueryBase,
-        custom_video_reader: CustomizedVideoReader = None,
-        additional_frame_fields: list = None,
-        output_per_frame_results: bool = False,
+        custom_video_reader: CustomizedVideoReader,
+        sample_stride: int,
+        sample_fps: float,
+        max_sample_stride: int,
+        frame_id_range: Tuple[int, int],
     ):
         if custom_video_reader is not None:
             input_node = create_cust_video_reader_node(custom_video_reader)
         else:
             input_node = VideoReaderNode()
-        output_node = create_object_detector_node(query_obj, input_node)
-        output_node = create_tracker_node(query_obj, output_node)
-        output_node = create_vobj_class_filter_node(query_obj, output_node)
+        output_node = input_node
+        if frame_id_range is not None:
+            # pushed down into VideoReaderNode as a seek when possible
+            output_node = create_frame_range_filter_node(
+                output_node, frame_id_range
+            )
+        output_node = create_frame_sampler_node(
+            output_node,
+            stride=sample_stride,
+            target_fps=sample_fps,
+            max_stride=max_sample_stride,
+        )
+        return output_node
+
+    def _create_query_branch(
+        self,
+        query_obj: QueryBase,
+        input_node,
+        additional_frame_fields: list,
+        output_per_frame_results: bool,
+        reorder_predicates: bool,
+    ):
+        # the operators of the query after object detection and tracking
+        output_node = create_vobj_class_filter_node(query_obj, input_node)
+        # the vobjs of the other classes of cross vobj properties
+        output_node = create_cross_vobj_nodes(query_obj, output_node)
         # code for first all projectors then all filters
         # output_node, map = create_pre_filter_projector(query_obj,
         #    output_node)
         # output_node = create_vobj_filter_node_query(query_obj, output_node)
         output_node, map = create_projector_adjacent_to_filter(
-            query_obj, output_node
+            query_obj, output_node, reorder_predicates=reorder_predicates
         )
         if not output_per_frame_results:
             # Todo: add bypass to output formatter when
@@ -54,9 +101,105 @@ class Planner:
         output_node = create_frame_output_projector(
             query_obj, output_node, map
         )
+        output_node = optimize_projectors(query_obj, output_node)
         output_node = create_frame_output_formatter(
             query_obj,
             output_node,
             additional_frame_fields=additional_frame_fields,
         )
         return output_node
+
+    def parse(
+        self,
+        query_obj: QueryBase,
+        custom_video_reader: CustomizedVideoReader = None,
+        additional_frame_fields: list = None,
+        output_per_frame_results: bool = False,
+        pipelined: bool = False,
+        pipeline_queue_size: int = 8,
+        sample_stride: int = 1,
+        sample_fps: float = None,
+        max_sample_stride: int = None,
+        frame_id_range: Tuple[int, int] = None,
+        reorder_predicates: bool = True,
+        crop_detection_roi: bool = True,
+    ):
+        def add_stage_boundary(node):
+            # run the operators before node on a separate thread
+            if pipelined:
+                return create_prefetcher_node(node, pipeline_queue_size)
+            return node
+
+        output_node = self._create_input_node(
+            custom_video_reader,
+            sample_stride=sample_stride,
+            sample_fps=sample_fps,
+            max_sample_stride=max_sample_stride,
+            frame_id_range=frame_id_range,
+        )
+        output_node = add_stage_boundary(output_node)
+        output_node = create_object_detector_node(
+            query_obj, output_node, crop_detection_roi=crop_detection_roi)
+        output_node = add_stage_boundary(output_node)
+        output_node = create_tracker_node(query_obj, output_node)
+        output_node = add_stage_boundary(output_node)
+        return self._create_query_branch(
+            query_obj,
+            output_node,
+            additional_frame_fields=additional_frame_fields,
+            output_per_frame_results=output_per_frame_results,
+            reorder_predicates=reorder_predicates,
+        )
+
+    def parse_queries(
+        self,
+        query_objs: List[QueryBase],
+        custom_video_reader: CustomizedVideoReader = None,
+        additional_frame_fields: list = None,
+        output_per_frame_results: bool = False,
+        pipelined: bool = False,
+        pipeline_queue_size: int = 8,
+        sample_stride: int = 1,
+        sample_fps: float = None,
+        max_sample_stride: int = None,
+        frame_id_range: Tuple[int, int] = None,
+        reorder_predicates: bool = True,
+        crop_detection_roi: bool = True,
+    ) -> List[AbstractPlanNode]:
+        """
+        Merge the plans of several queries on the same video. Video reading,
+        object detection (for the union of the classes of the queries) and
+        tracking are shared, and the rest of the plan of each query is a
+        branch of a FanOutNode after them.
+        Returns the output node of each query, in the order of query_objs.
+        """
+        def add_stage_boundary(node):
+            # run the operators before node on a separate thread
+            if pipelined:
+                return create_prefetcher_node(node, pipeline_queue_size)
+            return node
+
+        output_node = self._create_input_node(
+            custom_video_reader,
+            sample_stride=sample_stride,
+            sample_fps=sample_fps,
+            max_sample_stride=max_sample_stride,
+            frame_id_range=frame_id_range,
+        )
+        output_node = add_stage_boundary(output_node)
+        output_node = create_shared_object_detector_nodes(
+            query_objs, output_node, crop_detection_roi=crop_detection_roi)
+        output_node = add_stage_boundary(output_node)
+        output_node = create_shared_tracker_nodes(query_objs, output_node)
+        output_node = add_stage_boundary(output_node)
+        branch_nodes = create_fan_out_node(output_node, len(query_objs))
+        return [
+            self._create_query_branch(
+                query_obj,
+                branch_node,
+                additional_frame_fields=additional_frame_fields,
+                output_per_frame_results=output_per_frame_results,
+                reorder_predicates=reorder_predicates,
+            )
+            for query_obj, branch_node in zip(query_objs, branch_nodes)
+        ]
@@ -0,0 +1,172 @@
+import itertools
+import operator
+from typing import Callable, Optional
+
+import numpy as np
+
+from vqpy.backend.frame import VObjColumns
+from vqpy.frontend.vobj.predicates import (
+    And, Or, Not, Equal, GreaterThan, Compare, Predicate
+)
+
+# A kernel evaluates a predicate on some rows of the columns of a class and
+# returns a boolean mask of these rows.
+Kernel = Callable[[VObjColumns, np.ndarray], np.ndarray]
+
+_COMPARISON_OPS = {
+    Equal: operator.eq,
+    GreaterThan: operator.gt,
+}
+
+
+def compile_predicate(
+    predicate: Predicate,
+) -> Optional[Callable[[VObjColumns], np.ndarray]]:
+    """
+    Compile a predicate tree over built-in properties, vobj properties and
+    literals into one condition function on the columns of all vobjs of a
+    class (see VObjFilter), which returns a boolean mask of the vobjs.
+    Comparisons run as array operations on whole columns, where invalid and
+    uncomputed values are masked out. None values are compared as they are,
+    like in the condition functions of the predicates, e.g. prop == None,
+    except that vectorized cmp functions only get the valid values. And and
+    Or only evaluate their right predicate on the vobjs not decided by the
+    left one.
+    Returns None if the predicate can not be compiled, e.g. IsInstance.
+    """
+    kernel = _compile(predicate)
+    if kernel is None:
+        return None
+
+    def condition_function(columns: VObjColumns):
+        return kernel(columns, np.arange(len(columns)))
+
+    return condition_function
+
+
+def _compile(predicate: Predicate) -> Optional[Kernel]:
+    if isinstance(predicate, (And, Or)):
+        return _compile_logical(predicate)
+    if isinstance(predicate, Not):
+        kernel = _compile(predicate.pred)
+        if kernel is None:
+            return None
+        return lambda columns, rows: ~kernel(columns, rows)
+    for predicate_type, op in _COMPARISON_OPS.items():
+        if isinstance(predicate, predicate_type):
+            return _compile_comparison(predicate.left_prop,
+                                       predicate.right_prop, op)
+    if isinstance(predicate, Compare):
+        return _compile_compare(predicate)
+    return None
+
+
+def _compile_logical(predicate) -> Optional[Kernel]:
+    l_kernel = _compile(predicate.left_pred)
+    r_kernel = _compile(predicate.right_pred)
+    if l_kernel is None or r_kernel is None:
+        return None
+    is_and = isinstance(predicate, And)
+
+    def kernel(columns, rows):
+        mask = l_kernel(columns, rows)
+        # rows whose result depends on the right predicate
+        undecided = mask.copy() if is_and else ~mask
+        if undecided.any():
+            mask[undecided] = r_kernel(columns, rows[undecided])
+        return mask
+
+    return kernel
+
+
+def _column_values(prop, columns, rows):
+    if prop.is_literal():
+        return prop.value, True
+    column = columns[prop.name]
+    return column.values[rows], column.valid[rows]
+
+
+def _none_mask(prop, columns, rows):
+    # rows whose value is None, which are not valid in the columns but are
+    # still compared
+    if prop.is_literal():
+        return np.full(len(rows), prop.value is None)
+    raw = columns.raw(prop.name)
+    return np.array([raw[i] is None for i in rows], dtype=bool)
+
+
+def _raw_values(prop, columns, rows):
+    if prop.is_literal():
+        return itertools.repeat(prop.value)
+    raw = columns.raw(prop.name)
+    return [raw[i] for i in rows]
+
+
+def _compile_comparison(left_prop, right_prop, op) -> Optional[Kernel]:
+    if left_prop.is_literal() and right_prop.is_literal():
+        return None
+
+    def kernel(columns, rows):
+        l_values, l_valid = _column_values(left_prop, columns, rows)
+        r_values, r_valid = _column_values(right_prop, columns, rows)
+        valid = np.logical_and(l_valid, r_valid)
+        try:
+            # invalid rows of numeric columns are NaN
+            mask = op(l_values, r_values)
+        except (TypeError, ValueError):
+            mask = None
+        # rows with None values, compared vobj by vobj
+        with_none = ~valid \
+            & (l_valid | _none_mask(left_prop, columns, rows)) \
+            & (r_valid | _none_mask(right_prop, columns, rows))
+        if isinstance(mask, np.ndarray) and mask.dtype == bool \
+                and mask.shape == valid.shape:
+            mask = mask & valid
+            compared = with_none
+        else:
+            # values that can not be compared as arrays, e.g. a tlbr equal
+            # to a literal list, are compared vobj by vobj
+            mask = np.zeros(len(rows), dtype=bool)
+            compared = valid | with_none
+        if compared.any():
+            l_raw = _raw_values(left_prop, columns, rows[compared])
+            r_raw = _raw_values(right_prop, columns, rows[compared])
+            mask[compared] = [_compare_values(op, l_value, r_value)
+                              for l_value, r_value in zip(l_raw, r_raw)]
+        return mask
+
+    return kernel
+
+
+def _compare_values(op, l_value, r_value) -> bool:
+    try:
+        return bool(op(l_value, r_value))
+    except TypeError:
+        # e.g. None > 1, which no vobj satisfies
+        if l_value is None or r_value is None:
+            return False
+        raise
+
+
+def _compile_compare(predicate: Compare) -> Optional[Kernel]:
+    prop = predicate.prop
+    if prop.is_literal():
+        return None
+
+    def kernel(columns, rows):
+        column = columns[prop.name]
+        valid = column.valid[rows]
+        mask = np.zeros(len(rows), dtype=bool)
+        if predicate.vectorized:
+            if valid.any():
+                mask[valid] = predicate.compare_func(
+                    column.values[rows[valid]])
+            return mask
+        # None values are passed to compare_func as well
+        compared = valid | _none_mask(prop, columns, rows)
+        raw = columns.raw(prop.name)
+        mask[compared] = [bool(predicate.compare_func(raw[i]))
+                          for i in rows[compared]]
+        return mask
+
+    return kernel
@@ -0,0 +1,278 @@
+import json
+import threading
+import time
+import tracemalloc
+from typing import Dict, List, Optional
+
+from vqpy.backend.frame import Frame
+
+# methods of operators that are timed, "advance" is the push method of FanOut
+_PROFILED_METHODS = ("has_next", "next", "advance")
+
+
+class OperatorStats:
+    def __init__(self, index: int, operator):
+        """
+        Counters of one operator, updated by the Profiler.
+        :param index: the index of the operator in the order of instrumenting.
+        :param operator: the operator.
+        """
+        self.index = index
+        self.name = operator.__class__.__name__
+        self.prev: Optional["OperatorStats"] = None
+        self.calls = 0
+        self.has_next_calls = 0
+        # time in the methods of the operator, excluding the time of the
+        # previous operators they call
+        self.self_time = 0.0
+        # time in the methods of the operator, including the previous
+        # operators they call
+        self.cumulative_time = 0.0
+        self.frames_out = 0
+        self.vobjs_out = 0
+        # peak bytes allocated during a call, if memory is traced
+        self.peak_memory: Optional[int] = None
+        # nesting depth of calls, e.g. next calling has_next of itself
+        self._depth = 0
+
+    @property
+    def frames_in(self) -> int:
+        return self.prev.frames_out if self.prev is not None else 0
+
+    @property
+    def vobjs_in(self) -> int:
+        return self.prev.vobjs_out if self.prev is not None else 0
+
+    def to_dict(self) -> Dict:
+        return dict(
+            index=self.index,
+            operator=self.name,
+            calls=self.calls,
+            has_next_calls=self.has_next_calls,
+            self_time=self.self_time,
+            cumulative_time=self.cumulative_time,
+            frames_in=self.frames_in,
+            frames_out=self.frames_out,
+            frame_selectivity=_ratio(self.frames_out, self.frames_in),
+            vobjs_in=self.vobjs_in,
+            vobjs_out=self.vobjs_out,
+            vobj_selectivity=_ratio(self.vobjs_out, self.vobjs_in),
+            peak_memory=self.peak_memory,
+        )
+
+    def __str__(self):
+        text = f"Stats(self_time={self.self_time:.3f}s, " \
+            f"calls={self.calls}, " \
+            f"frames={self.frames_in}->{self.frames_out}, " \
+            f"vobjs={self.vobjs_in}->{self.vobjs_out}"
+        if self.peak_memory is not None:
+            text += f", peak_memory={self.peak_memory / 2 ** 20:.1f}MiB"
+        return text + ")"
+
+
+def _ratio(numerator: int, denominator: int) -> Optional[float]:
+    return numerator / denominator if denominator else None
+
+
+def _count_vobjs(operator, frame: Frame) -> int:
+    # vobjs passing the filter of the operator, or all vobjs on the frame
+    filter_index = getattr(operator, "filter_index", None)
+    if filter_index is not None and filter_index in frame.filtered_vobjs:
+        vobjs = frame.filtered_vobjs[filter_index]
+    else:
+        vobjs = frame.vobj_data
+    return sum(len(indexes) for indexes in vobjs.values())
+
+
+class _Call:
+    # an ongoing call of a profiled method
+    def __init__(self, start_memory: int):
+        self.child_time = 0.0
+        self.start_memory = start_memory
+        self.peak_memory = 0
+
+
+class Profiler:
+    def __init__(self, trace_memory: bool = False):
+        """
+        Per-operator instrumentation of an operator chain. The has_next,
+        next (and FanOut.advance) methods of every operator are wrapped to
+        record the number of calls, the time spent, and the frames and
+        vobjs emitted. Frames and vobjs received by an operator are the ones
+        emitted by its previous operator, so their ratios are the
+        selectivity of filters. Time is recorded per thread, so pipelined
+        operators are timed on their own worker threads.
+        :param trace_memory: whether to record the peak memory allocated
+            during the calls of each operator with tracemalloc, which slows
+            down the query considerably. The memory is process wide, so it
+            is only accurate when the operators run on one thread.
+        """
+        if trace_memory and not hasattr(tracemalloc, "reset_peak"):
+            raise ValueError("trace_memory requires Python 3.9 or later.")
+        self.trace_memory = trace_memory
+        # stats keyed by the id of operators and plan nodes
+        self._operator_stats: Dict[int, OperatorStats] = dict()
+        self._node_stats: Dict[int, OperatorStats] = dict()
+        # stats from the input operators to the output operators
+        self._stats: List[OperatorStats] = []
+        self._local = threading.local()
+        self.start_time = None
+        self.end_time = None
+
+    def instrument(self, root_operator, root_plan_node=None):
+        """
+        Instrument the operators from root_operator back to the input
+        operator. Operators already instrumented, e.g. the ones shared by
+        several queries, are skipped.
+        :param root_operator: the output operator.
+        :param root_plan_node: the plan node of root_operator. If not None,
+            the stats can be looked up by the plan nodes, see get_stats.
+        """
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        new_stats = []
+        operator, node = root_operator, root_plan_node
+        while operator is not None:
+            stats = self._operator_stats.get(id(operator))
+            if stats is None:
+                stats = OperatorStats(len(self._operator_stats), operator)
+                self._operator_stats[id(operator)] = stats
+                self._wrap(operator, stats)
+                if new_stats and new_stats[-1].prev is None:
+                    new_stats[-1].prev = stats
+                new_stats.append(stats)
+            elif new_stats and new_stats[-1].prev is None:
+                new_stats[-1].prev = stats
+            if node is not None:
+                self._node_stats[id(node)] = stats
+                node = node.get_prev()
+            operator = getattr(operator, "prev", None)
+        self._stats.extend(reversed(new_stats))
+
+    def _call_stack(self) -> List[_Call]:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def _wrap(self, operator, stats: OperatorStats):
+        for method_name in _PROFILED_METHODS:
+            method = getattr(operator, method_name, None)
+            if method is not None:
+                setattr(operator, method_name,
+                        self._profiled(operator, stats, method_name, method))
+
+    def _profiled(self, operator, stats, method_name, method):
+        def profiled_method(*args, **kwargs):
+            stack = self._call_stack()
+            start_memory = 0
+            if self.trace_memory:
+                current, peak = tracemalloc.get_traced_memory()
+                if stack:
+                    # the peak is reset below, keep it for the caller
+                    stack[-1].peak_memory = max(stack[-1].peak_memory, peak)
+                tracemalloc.reset_peak()
+                start_memory = current
+            call = _Call(start_memory)
+            stack.append(call)
+            stats._depth += 1
+            start_time = time.perf_counter()
+            if self.start_time is None:
+                self.start_time = start_time
+            try:
+                result = method(*args, **kwargs)
+            finally:
+                end_time = time.perf_counter()
+                self.end_time = end_time
+                elapsed = end_time - start_time
+                stack.pop()
+                stats._depth -= 1
+                stats.self_time += elapsed - call.child_time
+                if stats._depth == 0:
+                    stats.cumulative_time += elapsed
+                if stack:
+                    stack[-1].child_time += elapsed
+                if self.trace_memory:
+                    peak = max(call.peak_memory,
+                               tracemalloc.get_traced_memory()[1])
+                    stats.peak_memory = max(stats.peak_memory or 0,
+                                            peak - call.start_memory)
+                    if stack:
+                        stack[-1].peak_memory = max(stack[-1].peak_memory,
+                                                    peak)
+            if method_name == "has_next":
+                stats.has_next_calls += 1
+            else:
+                stats.calls += 1
+                if isinstance(result, Frame):
+                    stats.frames_out += 1
+                    stats.vobjs_out += _count_vobjs(operator, result)
+                elif method_name == "next" or result is True:
+                    # e.g. the results of output formatters
+                    stats.frames_out += 1
+            return result
+
+        return profiled_method
+
+    @property
+    def elapsed_time(self) -> float:
+        if self.start_time is None:
+            return 0.0
+        return self.end_time - self.start_time
+
+    def get_stats(self, plan_node=None) -> Optional[OperatorStats]:
+        """Get the stats of the operator of the plan node, or None."""
+        return self._node_stats.get(id(plan_node))
+
+    def stats(self) -> List[OperatorStats]:
+        """Stats of all operators, from the input to the output."""
+        return list(self._stats)
+
+    def to_dict(self) -> Dict:
+        return dict(
+            elapsed_time=self.elapsed_time,
+            operators=[stats.to_dict() for stats in self._stats],
+        )
+
+    def to_json(self, path: Optional[str] = None) -> str:
+        """Export the stats as JSON, and save them to path if not None."""
+        text = json.dumps(self.to_dict(), indent=2)
+        if path is not None:
+            with open(path, "w") as f:
+                f.write(text)
+        return text
+
+    def to_prometheus(self, prefix: str = "vqpy") -> str:
+        """Export the stats in the Prometheus text exposition format."""
+        metrics = [
+            ("operator_calls_total", "counter", "calls of next",
+             "calls"),
+            ("operator_self_seconds_total", "counter",
+             "seconds spent in the operator", "self_time"),
+            ("operator_cumulative_seconds_total", "counter",
+             "seconds spent in the operator and its previous operators",
+             "cumulative_time"),
+            ("operator_frames_in_total", "counter", "frames received",
+             "frames_in"),
+            ("operator_frames_out_total", "counter", "frames emitted",
+             "frames_out"),
+            ("operator_vobjs_in_total", "counter", "vobjs received",
+             "vobjs_in"),
+            ("operator_vobjs_out_total", "counter", "vobjs emitted",
+             "vobjs_out"),
+            ("operator_peak_memory_bytes", "gauge",
+             "peak bytes allocated during a call", "peak_memory"),
+        ]
+        lines = []
+        all_stats = [stats.to_dict() for stats in self._stats]
+        for name, metric_type, help_text, key in metrics:
+            name = f"{prefix}_{name}"
+            samples = [
+                f'{name}{{operator="{stats["operator"]}",'
+                f'index="{stats["index"]}"}} {stats[key]}'
+                for stats in all_stats if stats[key] is not None
+            ]
+            if samples:
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {metric_type}")
+                lines.extend(samples)
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,306 @@
+import json
+import os
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from vqpy.utils import NumpyEncoder
+
+# columns of the rows written by columnar sinks, besides the properties
+FRAME_ID_COLUMN = "frame_id"
+VOBJ_NAME_COLUMN = "vobj_name"
+
+
+class ResultSink(ABC):
+    # file extension of the outputs, including the dot
+    extension = ""
+
+    def __init__(self, path: str):
+        """
+        Writer of the results of a query, which are the dicts emitted by
+        FrameOutputFormatter, to a file. Sinks are context managers, and
+        close the file on exit.
+        :param path: the path of the output file.
+        """
+        self.path = path
+
+    @abstractmethod
+    def write(self, result: Dict):
+        """Write the result of one frame."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def close(self):
+        raise NotImplementedError
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class JsonSink(ResultSink):
+    extension = ".json"
+
+    def __init__(self, path: str):
+        """Write results as json lines, one line per frame."""
+        super().__init__(path)
+        self._file = open(path, "w")
+
+    def write(self, result: Dict):
+        json.dump(result, self._file, cls=NumpyEncoder)
+        self._file.write("\n")
+
+    def close(self):
+        self._file.close()
+
+
+def flatten_result(result: Dict) -> List[Dict[str, Any]]:
+    """
+    Flatten the result of one frame to rows, one per output vobj, e.g.
+        {"frame_id": 3, "person": [{"tlbr": ...}, {"tlbr": ...}]}
+    to
+        [{"frame_id": 3, "vobj_name": "person", "tlbr": ...},
+         {"frame_id": 3, "vobj_name": "person", "tlbr": ...}]
+    Frame fields are repeated in the rows of the frame. A frame without
+    output vobjs is one row with vobj_name of None, so that no frame is
+    lost.
+    """
+    frame_fields = dict()
+    vobjs = []
+    for key, value in result.items():
+        if isinstance(value, list) and \
+                all(isinstance(vobj, dict) for vobj in value):
+            vobjs.extend((key, vobj) for vobj in value)
+        else:
+            frame_fields[key] = value
+    if not vobjs:
+        return [dict(frame_fields, **{VOBJ_NAME_COLUMN: None})]
+    return [dict(frame_fields, **{VOBJ_NAME_COLUMN: vobj_name}, **vobj)
+            for vobj_name, vobj in vobjs]
+
+
+class ArrowSink(ResultSink):
+    extension = ".arrow"
+
+    def __init__(self, path: str, row_group_size: int = 4096):
+        """
+        Write results as an Arrow IPC file, which requires pyarrow. The
+        results are flattened to one row per output vobj (see
+        flatten_result), with a column per property. Arrays such as tlbr
+        are stored as lists of numbers without converting every element to
+        a Python object. Rows are buffered and written in batches of
+        row_group_size rows.
+        The schema is inferred from the first batch, and every property
+        should have a value of the same type in all rows. Properties missing
+        in some rows are null. A property that first appears (or first has
+        a value) in a later batch extends the schema, and the written rows
+        are rewritten with the extended schema, which happens at most twice
+        per property.
+        :param path: the path of the output file.
+        :param row_group_size: the number of rows of each written batch.
+        """
+        try:
+            import pyarrow
+        except ImportError:
+            raise ImportError("Please install pyarrow to save results in "
+                              "the arrow or parquet format.")
+        if row_group_size < 1:
+            raise ValueError(f"Invalid row_group_size: {row_group_size}, "
+                             f"which should be positive.")
+        super().__init__(path)
+        self._pa = pyarrow
+        self.row_group_size = row_group_size
+        self.schema: Optional["pyarrow.Schema"] = None
+        self._rows: List[Dict[str, Any]] = []
+        self._writer = None
+
+    def write(self, result: Dict):
+        self._rows.extend(flatten_result(result))
+        if len(self._rows) >= self.row_group_size:
+            self.flush()
+
+    def _to_column(self, name: str, values: List[Any]):
+        if name == VOBJ_NAME_COLUMN:
+            return self._pa.array(values, type=self._pa.string())
+        if any(isinstance(value, np.ndarray) for value in values):
+            # ndarrays of the same shape are stacked to one buffer
+            mask = np.array([value is None for value in values])
+            arrays = [value for value in values if value is not None]
+            if len({array.shape for array in arrays}) == 1:
+                return self._stacked_to_column(
+                    np.stack(arrays).reshape(len(arrays), -1), mask)
+            values = [value.ravel() if value is not None else None
+                      for value in values]
+        return self._pa.array(values)
+
+    def _stacked_to_column(self, stacked: np.ndarray, mask: np.ndarray):
+        # stacked are the flattened arrays of the rows that are not null
+        filled = np.zeros((len(mask), stacked.shape[1]), dtype=stacked.dtype)
+        filled[~mask] = stacked
+        return self._pa.FixedSizeListArray.from_arrays(
+            self._pa.array(filled.ravel()), stacked.shape[1],
+            mask=self._pa.array(mask) if mask.any() else None)
+
+    def _cast(self, column, type, n_rows: int):
+        # the column of a field of the schema, which is null if missing
+        if column is None:
+            return self._pa.nulls(n_rows, type)
+        return column.cast(type) if column.type != type else column
+
+    def _to_table(self, rows: List[Dict[str, Any]]):
+        names = list(dict.fromkeys(name for row in rows for name in row))
+        columns = {name: self._to_column(name, [row.get(name) for row in rows])
+                   for name in names}
+        if self.schema is None:
+            return self._pa.table(columns)
+        # extend the schema with the new properties, and with the types of
+        # the properties that had only null values so far
+        fields = []
+        for field in self.schema:
+            column = columns.get(field.name)
+            if column is not None and self._pa.types.is_null(field.type):
+                field = field.with_type(column.type)
+            fields.append(field)
+        fields.extend(self._pa.field(name, columns[name].type)
+                      for name in names if name not in self.schema.names)
+        schema = self._pa.schema(fields)
+        return self._pa.Table.from_arrays(
+            [self._cast(columns.get(field.name), field.type, len(rows))
+             for field in schema],
+            schema=schema)
+
+    def _open_writer(self, schema):
+        return self._pa.ipc.new_file(self.path, schema)
+
+    def _read_tables(self, path: str):
+        with self._pa.memory_map(path) as source:
+            reader = self._pa.ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                yield self._pa.Table.from_batches([reader.get_batch(i)])
+
+    def _evolve_schema(self, schema):
+        # the schema of an open file can not change, so the written rows
+        # are moved aside and written again with the new schema
+        self._writer.close()
+        old_path = self.path + ".old"
+        os.replace(self.path, old_path)
+        self._writer = self._open_writer(schema)
+        for table in self._read_tables(old_path):
+            self._write_table(self._pa.Table.from_arrays(
+                [self._cast(table.column(field.name)
+                            if field.name in table.column_names else None,
+                            field.type, table.num_rows)
+                 for field in schema],
+                schema=schema))
+        os.remove(old_path)
+        self.schema = schema
+
+    def _write_table(self, table):
+        self._writer.write_table(table, max_chunksize=self.row_group_size)
+
+    def flush(self, infer_schema: bool = False):
+        """
+        Write the buffered rows. Until the first vobj, rows are kept
+        unless infer_schema is True, since the schema of the properties is
+        inferred from the first written batch.
+        """
+        if not self._rows:
+            return
+        if self._writer is None and not infer_schema and \
+                all(row[VOBJ_NAME_COLUMN] is None for row in self._rows):
+            return
+        table = self._to_table(self._rows)
+        if self._writer is None:
+            self.schema = table.schema
+            self._writer = self._open_writer(self.schema)
+        elif not table.schema.equals(self.schema):
+            self._evolve_schema(table.schema)
+        self._write_table(table)
+        self._rows = []
+
+    def close(self):
+        self.flush(infer_schema=True)
+        if self._writer is None:
+            # no results, write an empty file with the frame_id column
+            self.schema = self._pa.schema(
+                [(FRAME_ID_COLUMN, self._pa.int64())])
+            self._writer = self._open_writer(self.schema)
+        self._writer.close()
+
+
+class ParquetSink(ArrowSink):
+    extension = ".parquet"
+
+    def __init__(self, path: str, row_group_size: int = 4096,
+                 compression: str = "snappy"):
+        """
+        Write results as a Parquet file, with a row group per batch of
+        row_group_size rows. See ArrowSink for the layout of the rows.
+        Parquet has no fixed size lists, so arrays such as tlbr are stored
+        as lists.
+        :param compression: the compression codec of Parquet.
+        """
+        super().__init__(path, row_group_size)
+        import pyarrow.parquet
+
+        self._pq = pyarrow.parquet
+        self.compression = compression
+
+    def _open_writer(self, schema):
+        return self._pq.ParquetWriter(self.path, schema,
+                                      compression=self.compression)
+
+    def _write_table(self, table):
+        self._writer.write_table(table, row_group_size=self.row_group_size)
+
+    def _read_tables(self, path: str):
+        with self._pq.ParquetFile(path) as parquet_file:
+            for i in range(parquet_file.num_row_groups):
+                yield parquet_file.read_row_group(i)
+
+    def _stacked_to_column(self, stacked: np.ndarray, mask: np.ndarray):
+        # null rows are empty lists, since writing null lists with values
+        # fails with pyarrow 15
+        offsets = np.concatenate(
+            ([0], np.cumsum(np.where(mask, 0, stacked.shape[1]))))
+        return self._pa.ListArray.from_arrays(
+            self._pa.array(offsets, type=self._pa.int32()),
+            self._pa.array(stacked.ravel()),
+            mask=self._pa.array(mask) if mask.any() else None)
+
+
+vqpy_result_sinks = {}
+
+
+def register(format_name, sink_type):
+    """Register a result sink"""
+    format_name_lower = format_name.lower()
+    if format_name_lower in vqpy_result_sinks:
+        raise ValueError(f"Result format {format_name} is already in VQPy."
+                         f"Please change another name to register.")
+    vqpy_result_sinks[format_name_lower] = sink_type
+
+
+register("json", JsonSink)
+register("arrow", ArrowSink)
+register("parquet", ParquetSink)
+
+
+def get_sink_type(format_name: str):
+    if format_name.lower() not in vqpy_result_sinks:
+        raise ValueError(f"Result format of {format_name} hasn't been "
+                         f"registered to VQPy")
+    return vqpy_result_sinks[format_name.lower()]
+
+
+def create_result_sink(path_without_extension: str,
+                       format_name: str = "json",
+                       **sink_kwargs) -> ResultSink:
+    """Create the sink of the format, which writes to the path with the
+    extension of the format."""
+    sink_type = get_sink_type(format_name)
+    return sink_type(path_without_extension + sink_type.extension,
+                     **sink_kwargs)
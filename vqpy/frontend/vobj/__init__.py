@@ -1,3 +1,3 @@
-from .vobj import VObjBase, vobj_property
+from .vobj import VObjBase, vobj_property, cross_vobj_property
 
-__all__ = ["VObjBase", "vobj_property"]
+__all__ = ["VObjBase", "vobj_property", "cross_vobj_property"]
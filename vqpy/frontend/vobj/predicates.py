@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+import numpy as np
 from vqpy.common.property_type import InvalidProperty, UnComputedProperty
 from vqpy.frontend.vobj.common import get_dep_properties
 
@@ -224,9 +225,18 @@ class GreaterThan(LiteralPredicate):
 
 
 class Compare(Predicate):
-    def __init__(self, prop, compare_func):
+    def __init__(self, prop, compare_func, vectorized: bool = False):
+        """
+        :param prop: the property to compare.
+        :param compare_func: a function that takes in the property value and
+            returns a bool value. If vectorized, it takes in an array of the
+            valid values of all vobjs (e.g. an (N, 4) array for tlbr) and
+            returns a boolean array.
+        :param vectorized: whether compare_func is vectorized.
+        """
         self.prop = prop
         self.compare_func = compare_func
+        self.vectorized = vectorized
 
     def __str__(self):
         return (
@@ -271,3 +281,61 @@ class Compare(Predicate):
 
     def is_comparison(self):
         return True
+
+
+# points of the boxes that WithinRegions tests against the regions
+REGION_ANCHORS = ("center", "bottom_center")
+
+
+class WithinRegions(Compare):
+    def __init__(self, prop, regions, anchor: str = "bottom_center"):
+        """
+        Whether the anchor point of the box of a vobj is inside any of the
+        regions. The planner crops the frames to the bounding box of the
+        regions before object detection, see ObjectDetectorNode.
+        :param prop: the tlbr property of a vobj.
+        :param regions: a list of polygons in frame coordinates, each a
+            list of (x, y) vertices.
+        :param anchor: the point of the box, "bottom_center" (e.g. the
+            feet of a person) or "center".
+        """
+        if prop.is_literal() or prop.is_vobj_property() or \
+                prop.name != "tlbr":
+            raise ValueError(f"within_regions is only supported on the "
+                             f"built-in tlbr property, got {prop}.")
+        if anchor not in REGION_ANCHORS:
+            raise ValueError(f"Invalid anchor: {anchor}, which should be "
+                             f"one of {REGION_ANCHORS}.")
+        self.regions = [np.asarray(region, dtype=float)
+                        for region in regions]
+        if not self.regions or any(
+                region.ndim != 2 or region.shape[0] < 3
+                or region.shape[1] != 2 for region in self.regions):
+            raise ValueError("regions should be a non-empty list of "
+                             "polygons with at least 3 (x, y) vertices.")
+        self.anchor = anchor
+        from vqpy.utils.spatial_index import RegionIndex
+        self._region_index = RegionIndex(self.regions)
+        super().__init__(prop, self._within_regions, vectorized=True)
+
+    def __str__(self):
+        return (
+            f"WithinRegions(prop={self.prop}\n "
+            f"\tanchor={self.anchor}, n_regions={len(self.regions)})"
+        )
+
+    def _within_regions(self, tlbr):
+        # tlbr is an (N, 4) array of boxes, or one box
+        tlbrs = np.asarray(tlbr, dtype=float)
+        boxes = tlbrs.reshape(-1, 4)
+        x = (boxes[:, 0] + boxes[:, 2]) / 2
+        if self.anchor == "center":
+            y = (boxes[:, 1] + boxes[:, 3]) / 2
+        else:
+            y = boxes[:, 3]
+        mask = self._region_index.contains_points(np.stack([x, y], axis=1))
+        return mask if tlbrs.ndim == 2 else bool(mask[0])
+
+    def get_roi(self):
+        """The bounding box (x1, y1, x2, y2) of the regions."""
+        return tuple(float(v) for v in self._region_index.bounds)
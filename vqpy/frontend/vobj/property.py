@@ -1,5 +1,7 @@
-from vqpy.frontend.vobj.predicates import Equal, GreaterThan, Compare
-from typing import Dict, Callable
+from vqpy.frontend.vobj.predicates import (
+    Equal, GreaterThan, Compare, WithinRegions
+)
+from typing import Dict, Callable, List, Optional
 from abc import ABC
 
 
@@ -38,8 +40,16 @@ class Property(ABC):
             other = Literal(other)
         return ~Equal(self, other)
 
-    def cmp(self, func: Callable):
-        return Compare(self, func)
+    def cmp(self, func: Callable, vectorized: bool = False):
+        return Compare(self, func, vectorized)
+
+    def within_regions(self, regions, anchor: str = "bottom_center"):
+        """
+        Whether the anchor of the box is inside any of the regions, e.g.
+        self.person.tlbr.within_regions([[(0, 0), (100, 0), (100, 80)]]).
+        Only supported on tlbr, see WithinRegions.
+        """
+        return WithinRegions(self, regions, anchor)
 
     def is_literal(self):
         return False
@@ -73,12 +83,27 @@ class Literal(Property):
 
 
 class VobjProperty(Property):
-    def __init__(self, vobj, inputs: Dict[str, int], func: Callable):
+    def __init__(self, vobj, inputs: Dict[str, int], func: Callable,
+                 vectorized: bool = False, cost: Optional[float] = None):
         self.vobj = vobj
         self.inputs = inputs
         self.func = func
         self.name = func.__name__
         self.stateful = self._stateful()
+        # a vectorized property function computes the property of all vobjs
+        # at once, taking in a dict of arrays of the inputs and returning an
+        # array of property values. It can not depend on history.
+        self.vectorized = vectorized
+        if vectorized and any(hist_len > 0
+                              for hist_len in inputs.values()):
+            raise ValueError(f"Vectorized property {self.name} can not "
+                             f"depend on history.")
+        # relative cost of computing the property for one vobj, which the
+        # planner uses to order the filters. Estimated if None.
+        if cost is not None and cost < 0:
+            raise ValueError(f"Invalid cost of property {self.name}: {cost}, "
+                             f"which should be non-negative.")
+        self.cost = cost
 
     def _stateful(self):
         self_stateful = any(
@@ -107,3 +132,39 @@ class VobjProperty(Property):
 
     def is_vobj_property(self):
         return True
+
+
+class CrossVObjProperty(VobjProperty):
+    def __init__(self, vobj, inputs: Dict[str, int], func: Callable,
+                 other_vobj, other_inputs: List[str],
+                 max_distance: Optional[float] = None,
+                 overlap: bool = False,
+                 cost: Optional[float] = None):
+        # a property of the vobj computed from the vobjs of another class
+        # near it on the same frame. func takes in the values of inputs and
+        # the list of the values of other_inputs of the other vobjs, see
+        # CrossVObjProjector.
+        super().__init__(vobj, inputs, func, vectorized=False, cost=cost)
+        if (max_distance is None) == (not overlap):
+            raise ValueError(f"Exactly one of max_distance and overlap "
+                             f"should be set for cross vobj property "
+                             f"{self.name}.")
+        self.other_vobj = other_vobj
+        self.other_inputs = list(other_inputs)
+        self.max_distance = max_distance
+        self.overlap = overlap
+
+    def get_other_dep_properties(self):
+        # vobj properties of the other vobj in other_inputs
+        built_in_names = self.other_vobj.get_builtin_property_names()
+        return [self.other_vobj.get_property(name)
+                for name in self.other_inputs
+                if name not in built_in_names]
+
+    def __str__(self):
+        return (
+            f"CrossVObjProp(vobj={self.vobj.__class__.__name__},\n"
+            f"\t\tinputs={self.inputs}, Prop={self.name},\n"
+            f"\t\tother_vobj={self.other_vobj.__class__.__name__},\n"
+            f"\t\tother_inputs={self.other_inputs})"
+        )
@@ -1,5 +1,7 @@
-from typing import Dict, Callable
-from vqpy.frontend.vobj.property import BuiltInProperty, VobjProperty
+from typing import Dict, Callable, List, Optional
+from vqpy.frontend.vobj.property import (
+    BuiltInProperty, CrossVObjProperty, VobjProperty
+)
 from abc import ABC
 
 
@@ -15,6 +17,10 @@ class VObjBase(ABC):
         self.frame_height = BuiltInProperty(self, "frame_height")
         self.n_frames = BuiltInProperty(self, "n_frames")
         self.track_id = BuiltInProperty(self, "track_id")
+        self.frame_id = BuiltInProperty(self, "frame_id")
+        # the spatial indexes of the vobjs on the frame, see
+        # vqpy.utils.spatial_index.FrameSpatialIndex
+        self.spatial_index = BuiltInProperty(self, "spatial_index")
 
         self.name = name or self.__class__.__name__
 
@@ -26,16 +32,57 @@ class VObjBase(ABC):
         return getattr(self, name)
 
 
-def vobj_property(inputs: Dict[str, int]):
+def vobj_property(inputs: Dict[str, int],
+                  vectorized: bool = False,
+                  cost: Optional[float] = None):
 
     def decorator(func: Callable):
         def create_vobj_property(self):
-            return VobjProperty(self, inputs, func)
+            return VobjProperty(self, inputs, func, vectorized, cost)
         return property(create_vobj_property)
 
     return decorator
 
 
+def cross_vobj_property(vobj_type,
+                        inputs: Dict[str, int],
+                        other_inputs: List[str],
+                        max_distance: Optional[float] = None,
+                        overlap: bool = False,
+                        cost: Optional[float] = None):
+    """
+    Declare a property computed from the vobjs of another class near the
+    vobj on the same frame, e.g.
+
+        @cross_vobj_property(vobj_type=Baggage, inputs={"tlbr": 0},
+                             other_inputs=["tlbr", "track_id"],
+                             max_distance=200)
+        def nearby_baggage(self, values, others):
+            return [other["track_id"] for other in others]
+
+    where others are the values of other_inputs of the other vobjs, from the
+    nearest to the farthest. The other vobjs are detected and tracked with
+    the settings of vobj_type.
+    :param vobj_type: the VObjBase class (or instance) of the other vobjs.
+    :param max_distance: only the other vobjs whose box centers are within
+        max_distance pixels of the box center of the vobj are passed.
+    :param overlap: only the other vobjs whose boxes overlap with the box of
+        the vobj are passed. Exactly one of max_distance and overlap should
+        be set.
+    """
+
+    def decorator(func: Callable):
+        def create_cross_vobj_property(self):
+            other_vobj = vobj_type() if isinstance(vobj_type, type) \
+                else vobj_type
+            return CrossVObjProperty(self, inputs, func, other_vobj,
+                                     other_inputs, max_distance, overlap,
+                                     cost)
+        return property(create_cross_vobj_property)
+
+    return decorator
+
+
 class MyVobj(VObjBase):
 
     @vobj_property(inputs={})
@@ -117,7 +117,8 @@ def access_data(cond: Dict[str, Callable]):
 # cross_vobj_property only needs to provide the required list of properties
 # of vobjs
 def cross_vobj_property(
-        vobj_type=None, vobj_num="ALL", vobj_input_fields=None
+        vobj_type=None, vobj_num="ALL", vobj_input_fields=None,
+        vobj_radius=None
         ):
     """Decorator for cross-object property computation.
 
@@ -140,6 +141,12 @@ def cross_vobj_property(
         number of VObjs to retrieve
     vobj_input_fields: List[str]
         list of names of properties to retrieve from VObjs
+    vobj_radius: Optional[Union[float, Callable]]
+        if not None, only retrieve VObjs whose box centers are within the
+        radius of the box center of this VObj, from the nearest to the
+        farthest, with a spatial index built once per frame instead of
+        passing all VObjs to every VObj. It is a number of pixels, or a
+        function of this VObj returning the radius.
     """
     # vobj_num defaults to "ALL" for now
     # other possible options could be user-specified number
@@ -166,7 +173,7 @@ def cross_vobj_property(
                 # initialization
                 # register function name, required VObj type and fields
                 self._registered_cross_vobj_names[func.__name__] = \
-                    (vobj_type, vobj_input_fields)
+                    (vobj_type, vobj_input_fields, vobj_radius)
                 return None
         return wrapped_func
     return wrap
@@ -19,3 +19,11 @@ class DetectorBase(object):
         returns: list of objects, expressed in dictionaries
         """
         raise NotImplementedError
+
+    def inference_batch(self, imgs: List[np.ndarray]) -> List[List[Dict]]:
+        """Get the detected objects from a batch of images
+        imgs (List[np.ndarray]): the inferenced images
+        returns: list of detection results, one for each image in order.
+        Detectors supporting batched forward pass should override it.
+        """
+        return [self.inference(img) for img in imgs]
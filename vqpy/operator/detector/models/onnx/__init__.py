@@ -1,8 +1,121 @@
-def onnx_inference(img_data, model_path):
-    import onnxruntime as rt
-    sess = rt.InferenceSession(
-        model_path,
-        providers=['CUDAExecutionProvider', 'CPUExecutionProvider'])
-    input_name = sess.get_inputs()[0].name
-    outputs = sess.run(None, {input_name: img_data})
+import os
+import threading
+from typing import Dict, List, Optional
+
+from loguru import logger
+
+DEFAULT_PROVIDERS = ['CUDAExecutionProvider', 'CPUExecutionProvider']
+
+GRAPH_OPTIMIZATION_LEVELS = {
+    "disable": "ORT_DISABLE_ALL",
+    "basic": "ORT_ENABLE_BASIC",
+    "extended": "ORT_ENABLE_EXTENDED",
+    "all": "ORT_ENABLE_ALL",
+}
+
+
+class OnnxSessionManager:
+    """Create and cache onnxruntime InferenceSessions.
+
+    Building an InferenceSession loads and optimizes the whole model graph,
+    so each session is created once per model path (and session options)
+    and reused by all later callers.
+    """
+
+    def __init__(self):
+        self._sessions: Dict[tuple, object] = dict()
+        self._lock = threading.Lock()
+
+    def get_session(self,
+                    model_path: str,
+                    intra_op_num_threads: Optional[int] = None,
+                    inter_op_num_threads: Optional[int] = None,
+                    graph_optimization_level: str = "all",
+                    optimized_model_path: Optional[str] = None,
+                    providers: Optional[List[str]] = None):
+        """Get the cached session of the model, creating it if needed.
+
+        Args:
+            model_path: path to the onnx model.
+            intra_op_num_threads: number of threads used within an operator.
+                Defaults to None, which lets onnxruntime decide.
+            inter_op_num_threads: number of threads used across operators.
+                Defaults to None, which lets onnxruntime decide.
+            graph_optimization_level: one of "disable", "basic", "extended"
+                and "all". Defaults to "all".
+            optimized_model_path: path to save the optimized model to. If
+                the file already exists, the session is built from it with
+                graph optimizations disabled, skipping re-optimization.
+                Defaults to None, which does not cache the optimized model.
+            providers: execution providers of the session. Defaults to
+                CUDA with CPU fallback.
+        """
+        if graph_optimization_level not in GRAPH_OPTIMIZATION_LEVELS:
+            raise ValueError(
+                f"Invalid graph_optimization_level "
+                f"{graph_optimization_level}, which should be one of "
+                f"{list(GRAPH_OPTIMIZATION_LEVELS.keys())}.")
+        providers = list(providers or DEFAULT_PROVIDERS)
+        key = (os.path.realpath(model_path), intra_op_num_threads,
+               inter_op_num_threads, graph_optimization_level,
+               optimized_model_path, tuple(providers))
+        with self._lock:
+            if key not in self._sessions:
+                self._sessions[key] = self._create_session(
+                    model_path, intra_op_num_threads, inter_op_num_threads,
+                    graph_optimization_level, optimized_model_path,
+                    providers)
+            return self._sessions[key]
+
+    @staticmethod
+    def _create_session(model_path, intra_op_num_threads,
+                        inter_op_num_threads, graph_optimization_level,
+                        optimized_model_path, providers):
+        import onnxruntime as rt
+
+        options = rt.SessionOptions()
+        if intra_op_num_threads is not None:
+            options.intra_op_num_threads = intra_op_num_threads
+        if inter_op_num_threads is not None:
+            options.inter_op_num_threads = inter_op_num_threads
+
+        load_path = model_path
+        if optimized_model_path is not None \
+                and os.path.exists(optimized_model_path):
+            # the cached model has already been optimized offline
+            load_path = optimized_model_path
+            level = "disable"
+        else:
+            level = graph_optimization_level
+            if optimized_model_path is not None:
+                options.optimized_model_filepath = optimized_model_path
+        options.graph_optimization_level = getattr(
+            rt.GraphOptimizationLevel, GRAPH_OPTIMIZATION_LEVELS[level])
+
+        logger.info(f"Creating onnxruntime session for {load_path}")
+        return rt.InferenceSession(load_path, sess_options=options,
+                                   providers=providers)
+
+    def clear(self):
+        with self._lock:
+            self._sessions.clear()
+
+
+session_manager = OnnxSessionManager()
+
+
+def get_session(model_path: str, **session_kwargs):
+    """Get the session of the model from the default session manager."""
+    return session_manager.get_session(model_path, **session_kwargs)
+
+
+def onnx_inference(img_data, session):
+    """Run the onnx session on img_data.
+    session can also be a model path, in which case the session is fetched
+    from the default session manager.
+    """
+    if isinstance(session, str):
+        session = get_session(session)
+    input_name = session.get_inputs()[0].name
+    outputs = session.run(None, {input_name: img_data})
     return outputs
@@ -1,4 +1,7 @@
-from vqpy.operator.detector.models.onnx import onnx_inference
+from vqpy.operator.detector.models.onnx import (
+    onnx_inference,
+    get_session,
+)
 from vqpy.operator.detector.base import DetectorBase
 from vqpy.class_names.coco import COCO_CLASSES
 import numpy as np
@@ -12,9 +15,17 @@ class FasterRCNNDdetector(DetectorBase):
     cls_names = COCO_CLASSES
     output_fields = ["tlbr", "score", "class_id"]
 
+    def __init__(self, model_path: str, **session_kwargs) -> None:
+        """
+        session_kwargs: onnxruntime session options, see
+            `OnnxSessionManager.get_session`.
+        """
+        super().__init__(model_path)
+        self.session = get_session(model_path, **session_kwargs)
+
     def inference(self, img: np.ndarray) -> List[Dict]:
         processed_img = preprocess(img)
-        detections = onnx_inference(processed_img, self.model_path)
+        detections = onnx_inference(processed_img, self.session)
         outputs = postprocess(detections, img.shape)
         return outputs
 
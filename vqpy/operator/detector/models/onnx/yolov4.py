@@ -4,7 +4,10 @@ import numpy as np
 from typing import Dict, List
 import cv2
 from scipy import special
-from vqpy.operator.detector.models.onnx import onnx_inference
+from vqpy.operator.detector.models.onnx import (
+    onnx_inference,
+    get_session,
+)
 
 MODEL_INPUT_SIZE = (416, 416)
 STRIDES = [8, 16, 32]
@@ -19,9 +22,17 @@ class Yolov4Detector(DetectorBase):
     cls_names = COCO_CLASSES
     output_fields = ["tlbr", "score", "class_id"]
 
+    def __init__(self, model_path: str, **session_kwargs) -> None:
+        """
+        session_kwargs: onnxruntime session options, see
+            `OnnxSessionManager.get_session`.
+        """
+        super().__init__(model_path)
+        self.session = get_session(model_path, **session_kwargs)
+
     def inference(self, img: np.ndarray) -> List[Dict]:
         processed_img = preprocess(img)
-        detections = onnx_inference(processed_img, self.model_path)
+        detections = onnx_inference(processed_img, self.session)
         outputs = postprocess(detections, img.shape)
         return outputs
 
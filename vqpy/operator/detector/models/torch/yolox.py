@@ -55,25 +55,33 @@ class YOLOXDetector(DetectorBase):
         self.postproc = postprocess
 
     def inference(self, img) -> List[Dict]:
-        ratio = min(self.test_size[0] / img.shape[0],
-                    self.test_size[1] / img.shape[1])
+        return self.inference_batch([img])[0]
 
-        img, _ = self.preproc(img, None, self.test_size)
-        img = torch.from_numpy(img).unsqueeze(0)
-        img = img.float()
+    def inference_batch(self, imgs) -> List[List[Dict]]:
+        ratios = [min(self.test_size[0] / img.shape[0],
+                      self.test_size[1] / img.shape[1]) for img in imgs]
+
+        batch = np.stack([self.preproc(img, None, self.test_size)[0]
+                          for img in imgs])
+        batch = torch.from_numpy(batch)
+        batch = batch.float()
         if self.device == "gpu":
-            img = img.cuda()
+            batch = batch.cuda()
             if self.fp16:
-                img = img.half()  # to FP16
+                batch = batch.half()  # to FP16
 
         with torch.no_grad():
-            outputs = self.model(img)
+            outputs = self.model(batch)
             outputs = self.postproc(
                 outputs, self.num_classes, self.confthre,
                 self.nmsthre, class_agnostic=True
             )
 
-        outputs = outputs[0]
+        return [self._format_outputs(output, ratio)
+                for output, ratio in zip(outputs, ratios)]
+
+    @staticmethod
+    def _format_outputs(outputs, ratio) -> List[Dict]:
         if outputs is None:
             return []
         bboxes = (outputs[:, 0:4] / ratio).cpu()
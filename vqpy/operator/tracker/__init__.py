@@ -4,6 +4,7 @@ All visible instances in this folder inherits (base.py).
 """
 
 from .byte_tracker import ByteTracker
+from .array_byte_tracker import ArrayByteTracker
 
 vqpy_trackers = {}
 
@@ -18,6 +19,7 @@ def register(tracker_name, tracker):
 
 
 register("byte", ByteTracker)
+register("byte_array", ArrayByteTracker)
 
 
 def setup_ground_tracker(tracker_name: str = "byte", **kwargs):
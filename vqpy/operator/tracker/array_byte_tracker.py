@@ -0,0 +1,294 @@
+from __future__ import annotations
+
+from typing import Dict, List, Tuple
+
+import numpy as np
+from vqpy.operator.tracker.base import GroundTrackerBase
+
+from . import matching
+from vqpy.operator.tracker.base_track import BaseTrack, TrackState
+from .kalman_filter import KalmanFilter
+
+
+def tlbr_to_xyah(tlbr: np.ndarray) -> np.ndarray:
+    """Convert Nx4 bounding boxes to format `(center x, center y,
+    aspect ratio, height)`, where the aspect ratio is `width / height`.
+    """
+    ret = tlbr.copy()
+    ret[:, 2:] -= ret[:, :2]
+    ret[:, :2] += ret[:, 2:] / 2
+    ret[:, 2] /= ret[:, 3]
+    return ret
+
+
+def xyah_to_tlbr(xyah: np.ndarray) -> np.ndarray:
+    """Convert Nx4 `(center x, center y, aspect ratio, height)` to
+    bounding box format
+    """
+    ret = xyah.copy()
+    ret[:, 2] *= ret[:, 3]
+    ret[:, :2] -= ret[:, 2:] / 2
+    ret[:, 2:] += ret[:, :2]
+    return ret
+
+
+def fuse_score(cost_matrix: np.ndarray, scores: np.ndarray) -> np.ndarray:
+    if cost_matrix.size == 0:
+        return cost_matrix
+    return 1 - (1 - cost_matrix) * scores[np.newaxis, :]
+
+
+def joint_tracks(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Tracks in a, followed by tracks in b but not in a."""
+    return np.concatenate((a, b[~np.isin(b, a)]))
+
+
+def sub_tracks(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Tracks in a but not in b, in the order of the first occurrence."""
+    _, first = np.unique(a, return_index=True)
+    a = a[np.sort(first)]
+    return a[~np.isin(a, b)]
+
+
+class ArrayByteTracker(GroundTrackerBase):
+    """ByteTracker with the track states kept in contiguous arrays.
+
+    It gives the same outputs as ByteTracker, while the Kalman filter steps,
+    IoU distances and state transitions of all tracks run as whole-array
+    operations instead of on one ByteTracker.Data object per track. Track
+    lists are arrays of slot indexes into the state arrays.
+    """
+    shared_kalman = KalmanFilter()
+
+    input_fields = ["tlbr", "score"]
+    output_fields = ["track_id"]
+
+    def __init__(self, fps):
+        self.track_thresh = 0.6
+        self.det_thresh = self.track_thresh + 0.1
+        self.match_thresh = 0.9
+        self.buffer_size = int(fps / 30.0 * 30)
+        self.max_time_lost = self.buffer_size
+        self.kalman_filter = KalmanFilter()
+
+        # states of the tracks in tracked and lost tracks, one slot per track
+        self.mean = np.zeros((0, 8))
+        self.covariance = np.zeros((0, 8, 8))
+        self.tlbr = np.zeros((0, 4))
+        self.track_id = np.zeros(0, dtype=int)
+        self.state = np.zeros(0, dtype=int)
+        self.is_activated = np.zeros(0, dtype=bool)
+        self.frame_id = np.zeros(0, dtype=int)
+        self.start_frame = np.zeros(0, dtype=int)
+        self.data: List[Dict] = []
+
+        # slot indexes of tracked and lost tracks
+        self.tracked_stracks = np.zeros(0, dtype=int)
+        self.lost_stracks = np.zeros(0, dtype=int)
+        self.removed_ids = set()
+
+    def _add_tracks(self, det_tlbr, det_ids, det_data, frame_id):
+        """Initiate tracks from detections, and return their slots."""
+        n_slots = len(self.track_id)
+        n_new = len(det_ids)
+        mean, covariance = self.kalman_filter.multi_initiate(
+            tlbr_to_xyah(det_tlbr))
+        self.mean = np.concatenate((self.mean, mean))
+        self.covariance = np.concatenate((self.covariance, covariance))
+        self.tlbr = np.concatenate((self.tlbr, det_tlbr))
+        self.track_id = np.concatenate((self.track_id, det_ids))
+        self.state = np.concatenate(
+            (self.state, np.full(n_new, TrackState.Tracked)))
+        self.is_activated = np.concatenate(
+            (self.is_activated, np.full(n_new, frame_id == 1)))
+        self.frame_id = np.concatenate(
+            (self.frame_id, np.full(n_new, frame_id)))
+        self.start_frame = np.concatenate(
+            (self.start_frame, np.full(n_new, frame_id)))
+        self.data.extend(det_data)
+        return np.arange(n_slots, n_slots + n_new)
+
+    def _update_tracks(self, slots, det_tlbr, det_data, frame_id):
+        """Update tracks with their matched detections."""
+        if len(slots) == 0:
+            return
+        self.state[slots] = TrackState.Tracked
+        self.is_activated[slots] = True
+        self.frame_id[slots] = frame_id
+        for slot, data in zip(slots, det_data):
+            self.data[slot] = data
+        mean, covariance = self.kalman_filter.multi_update(
+            self.mean[slots], self.covariance[slots], tlbr_to_xyah(det_tlbr))
+        self.mean[slots] = mean
+        self.covariance[slots] = covariance
+        self.tlbr[slots] = xyah_to_tlbr(mean[:, :4])
+
+    def _multipredict(self, slots):
+        if len(slots) > 0:
+            multi_mean = self.mean[slots]
+            multi_mean[self.state[slots] != TrackState.Tracked, 7] = 0
+            multi_mean, multi_covariance = self.shared_kalman.multi_predict(
+                multi_mean, self.covariance[slots])
+            self.mean[slots] = multi_mean
+            self.covariance[slots] = multi_covariance
+
+    def _compact(self):
+        """Drop the states of tracks that are neither tracked nor lost."""
+        slots = np.concatenate((self.tracked_stracks, self.lost_stracks))
+        self.mean = self.mean[slots]
+        self.covariance = self.covariance[slots]
+        self.tlbr = self.tlbr[slots]
+        self.track_id = self.track_id[slots]
+        self.state = self.state[slots]
+        self.is_activated = self.is_activated[slots]
+        self.frame_id = self.frame_id[slots]
+        self.start_frame = self.start_frame[slots]
+        self.data = [self.data[slot] for slot in slots]
+        n_tracked = len(self.tracked_stracks)
+        self.tracked_stracks = np.arange(n_tracked)
+        self.lost_stracks = np.arange(n_tracked, len(slots))
+
+    def _extract_data(self, slots) -> List[Dict]:
+        ret = []
+        for slot in slots:
+            data = self.data[slot].copy()
+            data["track_id"] = int(self.track_id[slot])
+            ret.append(data)
+        return ret
+
+    def update(self,
+               frame_id: int,
+               data: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+        n_dets = len(data)
+        det_tlbr = np.asarray([x["tlbr"] for x in data],
+                              dtype=float).reshape(n_dets, 4)
+        det_score = np.asarray([x["score"] for x in data], dtype=float)
+        # every detection takes a track id, as in ByteTracker
+        det_ids = BaseTrack._count + 1 + np.arange(n_dets)
+        BaseTrack._count += n_dets
+
+        def det_data(dets):
+            return [data[i] for i in dets]
+
+        dets_high = np.flatnonzero(det_score > self.track_thresh)
+        dets_low = np.flatnonzero((det_score <= self.track_thresh)
+                                  & (det_score > 0.1))
+
+        '''Step 1: Add newly detected tracklets to tracked_stracks'''
+        activated = self.is_activated[self.tracked_stracks]
+        unconfirmed = self.tracked_stracks[~activated]
+        tracked_stracks = self.tracked_stracks[activated]
+
+        ''' Step 2: First association, with high score detection boxes'''
+        strack_pool = joint_tracks(tracked_stracks, self.lost_stracks)
+        # Predict the current location with KF
+        self._multipredict(strack_pool)
+        dists = matching.iou_distance(self.tlbr[strack_pool],
+                                      det_tlbr[dets_high])
+        dists = fuse_score(dists, det_score[dets_high])
+        matches, u_track, u_detection = matching.linear_assignment(
+            dists, thresh=self.match_thresh)
+        matches = np.asarray(matches, dtype=int).reshape(-1, 2)
+        u_track = np.asarray(u_track, dtype=int)
+        u_detection = np.asarray(u_detection, dtype=int)
+
+        matched = strack_pool[matches[:, 0]]
+        matched_dets = dets_high[matches[:, 1]]
+        was_tracked = self.state[matched] == TrackState.Tracked
+        activated_stracks = [matched[was_tracked]]
+        refind_stracks = [matched[~was_tracked]]
+        self._update_tracks(matched, det_tlbr[matched_dets],
+                            det_data(matched_dets), frame_id)
+
+        ''' Step 3: Second association, with low score detection boxes'''
+        # association the untrack to the low score detections
+        r_tracked_stracks = strack_pool[u_track]
+        r_tracked_stracks = r_tracked_stracks[
+            self.state[r_tracked_stracks] == TrackState.Tracked]
+        dists = matching.iou_distance(self.tlbr[r_tracked_stracks],
+                                      det_tlbr[dets_low])
+        matches, u_track, _ = matching.linear_assignment(dists, thresh=0.5)
+        matches = np.asarray(matches, dtype=int).reshape(-1, 2)
+        u_track = np.asarray(u_track, dtype=int)
+
+        matched = r_tracked_stracks[matches[:, 0]]
+        matched_dets = dets_low[matches[:, 1]]
+        was_tracked = self.state[matched] == TrackState.Tracked
+        activated_stracks.append(matched[was_tracked])
+        refind_stracks.append(matched[~was_tracked])
+        self._update_tracks(matched, det_tlbr[matched_dets],
+                            det_data(matched_dets), frame_id)
+
+        lost_stracks = r_tracked_stracks[u_track]
+        lost_stracks = lost_stracks[
+            self.state[lost_stracks] != TrackState.Lost]
+        self.state[lost_stracks] = TrackState.Lost
+
+        '''Deal with unconfirmed tracks, usually tracks with only one
+        beginning frame'''
+        dets_rem = dets_high[u_detection]
+        dists = matching.iou_distance(self.tlbr[unconfirmed],
+                                      det_tlbr[dets_rem])
+        dists = fuse_score(dists, det_score[dets_rem])
+        matches, u_unconfirmed, u_detection = matching.linear_assignment(
+            dists, thresh=0.7)
+        matches = np.asarray(matches, dtype=int).reshape(-1, 2)
+        u_unconfirmed = np.asarray(u_unconfirmed, dtype=int)
+        u_detection = np.asarray(u_detection, dtype=int)
+
+        matched = unconfirmed[matches[:, 0]]
+        matched_dets = dets_rem[matches[:, 1]]
+        self._update_tracks(matched, det_tlbr[matched_dets],
+                            det_data(matched_dets), frame_id)
+        activated_stracks.append(matched)
+        removed_stracks = [unconfirmed[u_unconfirmed]]
+        self.state[removed_stracks[0]] = TrackState.Removed
+
+        """ Step 4: Init new stracks"""
+        new_dets = dets_rem[u_detection]
+        new_dets = new_dets[det_score[new_dets] >= self.det_thresh]
+        activated_stracks.append(self._add_tracks(
+            det_tlbr[new_dets], det_ids[new_dets], det_data(new_dets),
+            frame_id))
+
+        """ Step 5: Update state"""
+        timeout = self.lost_stracks[
+            frame_id - self.frame_id[self.lost_stracks] > self.max_time_lost]
+        self.state[timeout] = TrackState.Removed
+        removed_stracks.append(timeout)
+
+        tracked = self.tracked_stracks[
+            self.state[self.tracked_stracks] == TrackState.Tracked]
+        tracked = joint_tracks(tracked, np.concatenate(activated_stracks))
+        tracked = joint_tracks(tracked, np.concatenate(refind_stracks))
+        lost = sub_tracks(self.lost_stracks, tracked)
+        lost = np.concatenate((lost, lost_stracks))
+        removed_slots = np.asarray(
+            [slot for slot in lost
+             if int(self.track_id[slot]) in self.removed_ids], dtype=int)
+        lost = sub_tracks(lost, removed_slots)
+        self.removed_ids.update(
+            int(track_id)
+            for track_id in self.track_id[np.concatenate(removed_stracks)])
+        tracked, lost = self._remove_duplicate_stracks(tracked, lost)
+        self.tracked_stracks, self.lost_stracks = tracked, lost
+
+        ret = (self._extract_data(self.tracked_stracks),
+               self._extract_data(self.lost_stracks))
+        self._compact()
+        return ret
+
+    def _remove_duplicate_stracks(self, stracksa, stracksb):
+        pdist = matching.iou_distance(self.tlbr[stracksa],
+                                      self.tlbr[stracksb])
+        p, q = np.where(pdist < 0.15)
+        timep = self.frame_id[stracksa[p]] - self.start_frame[stracksa[p]]
+        timeq = self.frame_id[stracksb[q]] - self.start_frame[stracksb[q]]
+        dupa = p[timep <= timeq]
+        dupb = q[timep > timeq]
+        resa = np.delete(stracksa, dupa)
+        resb = np.delete(stracksb, dupb)
+        return resa, resb
+
+    def reset(self):
+        BaseTrack.reset()
@@ -180,10 +180,8 @@ class KalmanFilter(object):
             self._std_weight_velocity * mean[:, 3]]
         sqr = np.square(np.r_[std_pos, std_vel]).T
 
-        motion_cov = []
-        for i in range(len(mean)):
-            motion_cov.append(np.diag(sqr[i]))
-        motion_cov = np.asarray(motion_cov)
+        motion_cov = np.zeros((len(mean), 8, 8))
+        motion_cov[:, np.arange(8), np.arange(8)] = sqr
 
         mean = np.dot(mean, self._motion_mat.T)
         left = np.dot(self._motion_mat, covariance).transpose((1, 0, 2))
@@ -225,6 +223,104 @@ class KalmanFilter(object):
             kalman_gain, projected_cov, kalman_gain.T))
         return new_mean, new_covariance
 
+    def multi_initiate(self, measurement):
+        """Create tracks from unassociated measurements (Vectorized version).
+
+        Parameters
+        ----------
+        measurement : ndarray
+            The Nx4 dimensional matrix of bounding box coordinates
+            (x, y, a, h) with center position (x, y), aspect ratio a, and
+            height h.
+
+        Returns
+        -------
+        (ndarray, ndarray)
+            Returns the Nx8 dimensional mean matrix and Nx8x8 dimensional
+            covariance matrices of the new tracks. Unobserved velocities are
+            initialized to 0 mean.
+
+        """
+        mean = np.concatenate(
+            (measurement, np.zeros_like(measurement)), axis=1)
+
+        std = [
+            2 * self._std_weight_position * measurement[:, 3],
+            2 * self._std_weight_position * measurement[:, 3],
+            1e-2 * np.ones_like(measurement[:, 3]),
+            2 * self._std_weight_position * measurement[:, 3],
+            10 * self._std_weight_velocity * measurement[:, 3],
+            10 * self._std_weight_velocity * measurement[:, 3],
+            1e-5 * np.ones_like(measurement[:, 3]),
+            10 * self._std_weight_velocity * measurement[:, 3]]
+        covariance = np.zeros((len(measurement), 8, 8))
+        covariance[:, np.arange(8), np.arange(8)] = np.square(std).T
+        return mean, covariance
+
+    def multi_project(self, mean, covariance):
+        """Project state distributions to measurement space (Vectorized
+        version).
+
+        Parameters
+        ----------
+        mean : ndarray
+            The Nx8 dimensional mean matrix of the states.
+        covariance : ndarray
+            The Nx8x8 dimensional covariance matrices of the states.
+
+        Returns
+        -------
+        (ndarray, ndarray)
+            Returns the Nx4 dimensional projected means and Nx4x4
+            dimensional projected covariance matrices.
+
+        """
+        std = [
+            self._std_weight_position * mean[:, 3],
+            self._std_weight_position * mean[:, 3],
+            1e-1 * np.ones_like(mean[:, 3]),
+            self._std_weight_position * mean[:, 3]]
+        innovation_cov = np.zeros((len(mean), 4, 4))
+        innovation_cov[:, np.arange(4), np.arange(4)] = np.square(std).T
+
+        mean = np.dot(mean, self._update_mat.T)
+        covariance = np.matmul(
+            np.matmul(self._update_mat, covariance), self._update_mat.T)
+        return mean, covariance + innovation_cov
+
+    def multi_update(self, mean, covariance, measurement):
+        """Run Kalman filter correction step (Vectorized version).
+
+        Parameters
+        ----------
+        mean : ndarray
+            The Nx8 dimensional mean matrix of the predicted states.
+        covariance : ndarray
+            The Nx8x8 dimensional covariance matrices of the states.
+        measurement : ndarray
+            The Nx4 dimensional matrix of measurement vectors (x, y, a, h).
+
+        Returns
+        -------
+        (ndarray, ndarray)
+            Returns the measurement-corrected state distributions.
+
+        """
+        projected_mean, projected_cov = self.multi_project(mean, covariance)
+
+        # the covariance matrices are symmetric, so the transposed kalman
+        # gain solves projected_cov * K^T = H * covariance
+        kalman_gain = np.linalg.solve(
+            projected_cov, np.matmul(self._update_mat, covariance)
+        ).transpose((0, 2, 1))
+        innovation = measurement - projected_mean
+
+        new_mean = mean + np.einsum("nij,nj->ni", kalman_gain, innovation)
+        new_covariance = covariance - np.matmul(
+            np.matmul(kalman_gain, projected_cov),
+            kalman_gain.transpose((0, 2, 1)))
+        return new_mean, new_covariance
+
     def gating_distance(self, mean, covariance, measurements,
                         only_position=False, metric='maha'):
         """Compute gating distance between state distribution and measurements.
@@ -1,5 +1,7 @@
 import cv2
 from loguru import logger
+from typing import Optional, Union
+from vqpy.utils.interrupt import InterruptHook, resolve_interrupt_hook
 
 # TODO: support different types of video streams
 
@@ -7,7 +9,11 @@ from loguru import logger
 class FrameStream:
     output_fields = ['frame', 'frame_id', 'frame_width', 'frame_height', 'fps']
 
-    def __init__(self, path):
+    def __init__(self, path,
+                 headless: Optional[bool] = None,
+                 interrupt_hook: Union[InterruptHook, str, None] = None):
+        self._interrupt_hook = resolve_interrupt_hook(headless,
+                                                      interrupt_hook)
         self._cap = cv2.VideoCapture(path)
         self.frame_width = self._cap.get(cv2.CAP_PROP_FRAME_WIDTH)  # float
         self.frame_height = self._cap.get(cv2.CAP_PROP_FRAME_HEIGHT)  # float
@@ -26,7 +32,6 @@ class FrameStream:
             logger.info(f"Failed to load frame stream with id of "
                         f"{self.frame_id}")
             raise IOError
-        ch = cv2.waitKey(1)
-        if ch == 27 or ch == ord("q") or ch == ord('Q'):
+        if self._interrupt_hook is not None and self._interrupt_hook():
             raise KeyboardInterrupt
         return self.frame
@@ -1,11 +1,19 @@
+from functools import lru_cache
+
+
+@lru_cache(maxsize=32)
+def _region_index(regions):
+    from vqpy.utils.spatial_index import RegionIndex
+    return RegionIndex(regions)
+
 
 def within_regions(regions):
+    # the regions are prepared once, and tested for every point. Properties
+    # often call within_regions(REGIONS) per vobj, so the prepared regions
+    # are cached.
+    region_index = _region_index(
+        tuple(tuple(map(tuple, region)) for region in regions))
+
     def point_within_regions(coordinate):
-        from shapely.geometry import Point, Polygon
-        point = Point(coordinate)
-        for region in regions:
-            poly = Polygon(region)
-            if point.within(poly):
-                return True
-        return False
+        return region_index.contains(coordinate)
     return point_within_regions
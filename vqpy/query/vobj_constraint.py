@@ -4,6 +4,7 @@ from typing import Callable, Dict, List, Optional
 from vqpy.obj.frame import FrameInterface
 from vqpy.obj.vobj.base import VObjBaseInterface
 from vqpy.query.continuing import continuing
+from vqpy.utils.spatial_index import SpatialIndex
 
 
 class VObjConstraintInterface(object):
@@ -167,13 +168,17 @@ class VObjConstraint(VObjConstraintInterface):
         # within each query, we only need to retrieve the values of the
         # properties once, using _registered_cross_vobj_names from any VObj
         # of that type (use the first one here)
+        # Properties with a vobj_radius get a SpatialIndex over the boxes of
+        # the other VObjs instead, which gives the properties of the VObjs
+        # near each VObj.
         cross_vobj_args = {}
+        spatial_indexes = {}
         for cross_vobj_property in \
                 vobjs[0]._registered_cross_vobj_names.keys():
             # only compute properties used in the conditions
             if cross_vobj_property not in property_names:
                 continue
-            other_vobj_type, other_vobj_input_fields = \
+            other_vobj_type, other_vobj_input_fields, vobj_radius = \
                 vobjs[0]._registered_cross_vobj_names[cross_vobj_property]
             other_vobjs = frame.get_tracked_vobjs(other_vobj_type)
             properties = []
@@ -184,10 +189,25 @@ class VObjConstraint(VObjConstraintInterface):
                         for input_field in other_vobj_input_fields
                     )
                 )
-            cross_vobj_args[cross_vobj_property] = properties
+            if vobj_radius is None:
+                cross_vobj_args[cross_vobj_property] = properties
+            else:
+                spatial_indexes[cross_vobj_property] = SpatialIndex(
+                    [other_vobj.getv("tlbr") for other_vobj in other_vobjs],
+                    properties)
 
         # for each vobj, compute value of cross_vobj_property
         for obj in vobjs:
             for property_name in property_names:
-                if property_name in obj._registered_cross_vobj_names.keys():
+                if property_name in spatial_indexes:
+                    vobj_radius = \
+                        obj._registered_cross_vobj_names[property_name][2]
+                    radius = vobj_radius(obj) if callable(vobj_radius) \
+                        else vobj_radius
+                    tlbr = obj.getv("tlbr")
+                    neighbors = [] if tlbr is None else \
+                        spatial_indexes[property_name].neighbors(tlbr,
+                                                                 radius)
+                    getattr(obj, property_name)(neighbors)
+                elif property_name in obj._registered_cross_vobj_names:
                     getattr(obj, property_name)(cross_vobj_args[property_name])
@@ -22,7 +22,10 @@ def crop_image(img, tlbr, ext=0):
     Returns:
         Optional[np.ndarray]: the cropped image.
     """
-    _, _, w, h = tlbr_to_xyah(tlbr)
+    # same as the aspect ratio and height given by tlbr_to_xyah, without
+    # allocating a new array
+    h = tlbr[3] - tlbr[1]
+    w = (tlbr[2] - tlbr[0]) / h
     if (tlbr[0] >= -w * 0.2 and tlbr[1] >= -h * 0.2 and
             tlbr[2] <= img.shape[1] + w * 0.2 and
             tlbr[3] <= img.shape[0] + h * 0.2):
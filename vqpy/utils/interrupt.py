@@ -0,0 +1,52 @@
+import os
+import sys
+from typing import Callable, Optional, Union
+
+InterruptHook = Callable[[], bool]
+# interrupt_hook value of the opt-in key press check, see
+# highgui_interrupt_hook
+HIGHGUI_INTERRUPT_HOOK = "highgui"
+
+
+def has_display() -> bool:
+    """Whether a display is available for HighGUI windows."""
+    if sys.platform.startswith("linux"):
+        return bool(os.environ.get("DISPLAY")
+                    or os.environ.get("WAYLAND_DISPLAY"))
+    return True
+
+
+def highgui_interrupt_hook() -> bool:
+    """
+    Return True if 'q' or ESC is pressed in a HighGUI window. It costs about
+    1ms per call, and only sees key presses when a HighGUI window is open.
+    """
+    import cv2
+    ch = cv2.waitKey(1)
+    return ch == 27 or ch == ord("q") or ch == ord('Q')
+
+
+def resolve_interrupt_hook(
+    headless: Optional[bool] = None,
+    interrupt_hook: Union[InterruptHook, str, None] = None,
+) -> Optional[InterruptHook]:
+    """
+    Get the hook polled by video readers on every frame, which stops
+    reading by raising KeyboardInterrupt when it returns True.
+    :param headless: whether to never touch HighGUI. If None, it is headless
+        when there is no display.
+    :param interrupt_hook: a callable used as the hook, or "highgui" to
+        check 'q' or ESC key presses with cv2.waitKey unless headless. If
+        None, there is no hook.
+    """
+    if interrupt_hook is None or callable(interrupt_hook):
+        return interrupt_hook
+    if interrupt_hook != HIGHGUI_INTERRUPT_HOOK:
+        raise ValueError(f"Invalid interrupt_hook: {interrupt_hook}, which "
+                         f"should be a callable or "
+                         f"\"{HIGHGUI_INTERRUPT_HOOK}\".")
+    if headless is None:
+        headless = not has_display()
+    if headless:
+        return None
+    return highgui_interrupt_hook
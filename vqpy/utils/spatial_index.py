@@ -0,0 +1,133 @@
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+
+def _center(tlbr_or_point) -> np.ndarray:
+    # the center of a tlbr box, or the point itself
+    array = np.asarray(tlbr_or_point, dtype=float).reshape(-1)
+    if array.shape[0] == 4:
+        return (array[:2] + array[2:]) / 2
+    if array.shape[0] == 2:
+        return array
+    raise ValueError(f"Invalid box or point: {tlbr_or_point}, which should "
+                     f"be a tlbr box or an (x, y) point.")
+
+
+class SpatialIndex:
+    def __init__(self, tlbrs: Sequence, items: Optional[Sequence] = None):
+        """
+        KD-tree over the centers of boxes, e.g. the vobjs on a frame, which
+        answers proximity queries in O(log N) instead of comparing all pairs
+        of boxes.
+        :param tlbrs: the boxes, an (N, 4) array or a list of tlbr. Boxes
+            that are None are not indexed.
+        :param items: the items returned by the queries, one per box, e.g.
+            the vobj data. Defaults to None, which returns the indexes of
+            the boxes.
+        """
+        if items is not None and len(items) != len(tlbrs):
+            raise ValueError(f"items should have one item per box, got "
+                             f"{len(items)} items for {len(tlbrs)} boxes.")
+        positions = [i for i, tlbr in enumerate(tlbrs) if tlbr is not None]
+        self._items = [items[i] if items is not None else i
+                       for i in positions]
+        self.centers = np.array([_center(tlbrs[i]) for i in positions],
+                                dtype=float).reshape(-1, 2)
+        self._tree = cKDTree(self.centers) if positions else None
+
+    def __len__(self):
+        return len(self._items)
+
+    def neighbors(self, tlbr_or_point, radius: float) -> List[Any]:
+        """
+        Items whose centers are within radius of the center of the box (or
+        the point), from the nearest to the farthest. It includes the item
+        of the box itself if the box is indexed.
+        """
+        if self._tree is None:
+            return []
+        center = _center(tlbr_or_point)
+        indexes = self._tree.query_ball_point(center, radius)
+        distances = np.linalg.norm(self.centers[indexes] - center, axis=1)
+        order = np.argsort(distances, kind="stable")
+        return [self._items[indexes[i]] for i in order]
+
+    def nearest(self, tlbr_or_point, k: int = 1,
+                max_distance: float = np.inf) -> List[Tuple[Any, float]]:
+        """
+        The k nearest items to the center of the box (or the point), as
+        (item, distance) pairs from the nearest, within max_distance.
+        """
+        if self._tree is None or k < 1:
+            return []
+        k = min(k, len(self._items))
+        distances, indexes = self._tree.query(
+            _center(tlbr_or_point), k=k, distance_upper_bound=max_distance)
+        return [(self._items[i], float(d))
+                for d, i in zip(np.atleast_1d(distances),
+                                np.atleast_1d(indexes))
+                if np.isfinite(d)]
+
+    def pairs(self, radius: float) -> Set[Tuple[int, int]]:
+        """
+        Pairs (i, j) with i < j of the indexes (in the order of the indexed
+        boxes) of items whose centers are within radius of each other.
+        """
+        if self._tree is None:
+            return set()
+        return self._tree.query_pairs(radius)
+
+
+class FrameSpatialIndex:
+    def __init__(self, vobj_data: Dict[str, List[Dict]]):
+        """
+        Spatial indexes of the vobjs of each class on a frame, built on
+        first use, e.g. frame_index["person"].neighbors(tlbr, 50) returns
+        the data of the persons near the box. See SpatialIndex.
+        :param vobj_data: the vobj data of the frame, see Frame.vobj_data.
+        """
+        self._vobj_data = vobj_data
+        self._indexes: Dict[str, SpatialIndex] = dict()
+
+    def __getitem__(self, class_name: str) -> SpatialIndex:
+        if class_name not in self._indexes:
+            vobjs = self._vobj_data.get(class_name, [])
+            self._indexes[class_name] = SpatialIndex(
+                [vobj.get("tlbr") for vobj in vobjs], vobjs)
+        return self._indexes[class_name]
+
+
+class RegionIndex:
+    def __init__(self, regions: Sequence):
+        """
+        Static regions with prepared Shapely geometries, which tests points
+        against all regions at once. Points outside of the bounding box of
+        the regions are rejected without Shapely.
+        :param regions: a list of polygons, each a list of (x, y) vertices.
+        """
+        import shapely
+        from shapely.geometry import Polygon
+
+        self._shapely = shapely
+        self._geometry = shapely.union_all(
+            [Polygon(region) for region in regions])
+        shapely.prepare(self._geometry)
+        self.bounds = self._geometry.bounds
+
+    def contains_points(self, points) -> np.ndarray:
+        """Whether each of the (N, 2) points is inside any region."""
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        x1, y1, x2, y2 = self.bounds
+        mask = (points[:, 0] >= x1) & (points[:, 0] <= x2) \
+            & (points[:, 1] >= y1) & (points[:, 1] <= y2)
+        if mask.any():
+            candidates = points[mask]
+            mask[mask] = self._shapely.contains_xy(
+                self._geometry, candidates[:, 0], candidates[:, 1])
+        return mask
+
+    def contains(self, point) -> bool:
+        """Whether the (x, y) point is inside any region."""
+        return bool(self.contains_points(point)[0])